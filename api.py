@@ -0,0 +1,643 @@
+"""API HTTP du traitement des documents ISPA, à côté de l'interface Streamlit.
+
+Exemples :
+    python api.py --port 8502 --actifs actifs/
+    curl -T logo.png http://localhost:8502/actifs/logo-ispa.png
+    curl -F document=@deck.pptx -F logo=logo-ispa.png -o ISPA_deck.pptx \\
+         http://localhost:8502/convertir
+    curl -F document=@rapport.docx -F logo=@logo.png -F style=styles -o ISPA_rapport.docx \\
+         http://localhost:8502/convertir
+    curl --data-binary @deck.pptx -o ISPA_deck.pptx \\
+         "http://localhost:8502/convertir?logo=logo-ispa.png&favicon=favicon.png&nom=deck.pptx"
+
+Routes :
+    POST   /convertir       document en multipart/form-data (champ "document")
+                            ou corps brut ; résultat renvoyé dans la réponse
+    GET    /actifs          logos et favicons enregistrés
+    GET    /profils         profils de marque disponibles (ISPA_PROFILS_DIR)
+    PUT    /actifs/<nom>    enregistre (ou remplace) une image png / jpg
+    DELETE /actifs/<nom>
+    GET    /sante           état du serveur, budget mémoire compris
+
+Le logo et le favicon sont envoyés avec le document (champs fichiers
+"logo" / "favicon") ou désignés par le nom d'un actif enregistré (champ
+texte ou paramètre d'URL). Options, en champs texte ou en paramètres
+d'URL : moteur, placement, style, detection, medias, compression
+(rapide, standard, maximale, stockage), profil (nom d'un profil de
+marque), format (pptx / docx, sinon déduit du nom, du Content-Type ou du
+contenu) et nom.
+
+Les corps reçus sont écrits sur disque au fil de la lecture, jamais
+gardés entiers en mémoire ; le résultat est renvoyé par blocs depuis le
+tampon de sortie. Chaque connexion est servie par son propre thread et
+reste ouverte entre les requêtes (HTTP/1.1) ; au plus --simultanes
+conversions tournent à la fois, sous le budget mémoire de l'interface.
+
+Tests d'intégration (tests/test_api.py) : ServeurApi(("127.0.0.1", 0),
+dossier_actifs) écoute sur un port libre (serveur.server_address[1]) ;
+serve_forever() dans un thread, shutdown() à la fin.
+"""
+
+import argparse
+import hmac
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from email.parser import HeaderParser
+from email.utils import collapse_rfc2231_value
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, quote, unquote, urlsplit
+
+import ispa
+from PIL import Image as ImagePIL
+
+MAX_ENVOI_OCTETS = int(os.environ.get("ISPA_API_MAX_ENVOI_MO", 512)) * 1024 * 1024
+MAX_IMAGE_OCTETS = 20 * 1024 * 1024
+# Champs texte d'un formulaire multipart et en-têtes de chaque partie
+MAX_CHAMP_OCTETS = 4 * 1024
+MAX_ENTETES_PARTIE_OCTETS = 16 * 1024
+TAILLE_BLOC = 64 * 1024
+
+# Connexion keep-alive fermée après ce délai sans requête
+DELAI_INACTIVITE_SECONDES = 30
+
+# Jeton exigé (Authorization: Bearer ...) sur toutes les routes sauf /sante
+JETON = os.environ.get("ISPA_API_JETON")
+DOSSIER_ACTIFS = (os.environ.get("ISPA_ACTIFS_DIR")
+                  or os.path.join(tempfile.gettempdir(), "ispa_actifs"))
+
+TYPES_DOCUMENTS = {
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+FORMATS_IMAGES = ("PNG", "JPEG")
+# Partie principale de chaque format, pour reconnaître un document sans nom
+PARTIES_PRINCIPALES = {"pptx": "ppt/presentation.xml", "docx": "word/document.xml"}
+
+# Noms d'actifs : pas de chemin, pas de fichier caché (les ".part" en cours d'écriture)
+NOM_ACTIF = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,99}")
+
+class ErreurApi(Exception):
+    """Requête refusée : statut HTTP et message renvoyés au client."""
+
+    def __init__(self, statut, message, entetes=None):
+        super().__init__(message)
+        self.statut = statut
+        self.entetes = entetes or {}
+
+# ============================================================================
+# CORPS DES REQUÊTES
+# ============================================================================
+
+class CorpsRequete:
+    """Corps d'une requête lu par blocs (Content-Length ou Transfer-Encoding: chunked)."""
+
+    def __init__(self, rfile, entetes, max_octets=MAX_ENVOI_OCTETS):
+        self.rfile = rfile
+        self.max_octets = max_octets
+        self.lus = 0
+        self.chunked = "chunked" in entetes.get("Transfer-Encoding", "").lower()
+        self.restant = 0  # Octets restants du corps, ou du bloc courant en chunked
+        self.fini = False
+        if not self.chunked:
+            longueur = entetes.get("Content-Length")
+            if longueur is None:
+                raise ErreurApi(411, "Content-Length ou Transfer-Encoding: chunked attendu")
+            try:
+                self.restant = int(longueur)
+            except ValueError:
+                raise ErreurApi(400, f"Content-Length invalide : {longueur!r}")
+            if self.restant > max_octets:
+                raise ErreurApi(413, f"Envoi limité à {max_octets / 2**20:.0f} Mo")
+            self.fini = self.restant == 0
+
+    def read(self, n=TAILLE_BLOC):
+        if self.fini:
+            return b""
+        if self.chunked and not self.restant:
+            ligne = self.rfile.readline(1024)
+            try:
+                taille = int(ligne.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise ErreurApi(400, "Bloc chunked invalide")
+            if not taille:
+                # Fin du corps : en-têtes de fin ignorés jusqu'à la ligne vide
+                while self.rfile.readline(1024) not in (b"\r\n", b"\n", b""):
+                    pass
+                self.fini = True
+                return b""
+            self.restant = taille
+        morceau = self.rfile.read(min(n, self.restant))
+        if not morceau:
+            raise ErreurApi(400, "Corps de requête tronqué")
+        self.restant -= len(morceau)
+        self.lus += len(morceau)
+        if self.lus > self.max_octets:
+            raise ErreurApi(413, f"Envoi limité à {self.max_octets / 2**20:.0f} Mo")
+        if not self.restant:
+            if self.chunked:
+                self.rfile.readline(16)  # CRLF de fin de bloc
+            else:
+                self.fini = True
+        return morceau
+
+    def copier(self, destination):
+        while morceau := self.read():
+            destination.write(morceau)
+
+    def vider(self):
+        while self.read():
+            pass
+
+def _avancer(corps, tampon, delimiteur, ecrire):
+    """Passe à `ecrire` les données jusqu'au délimiteur ; retourne ce qui le suit.
+
+    Les derniers octets du tampon, qui peuvent être le début du délimiteur,
+    sont gardés jusqu'au bloc suivant.
+    """
+    garde = len(delimiteur) - 1
+    while True:
+        position = tampon.find(delimiteur)
+        if position >= 0:
+            ecrire(tampon[:position])
+            return tampon[position + len(delimiteur):]
+        if len(tampon) > garde:
+            ecrire(tampon[:-garde])
+            tampon = tampon[-garde:]
+        morceau = corps.read()
+        if not morceau:
+            raise ErreurApi(400, "Corps multipart tronqué")
+        tampon += morceau
+
+def _ignorer(octets):
+    pass
+
+def _disposition(entetes):
+    """(nom du champ, nom du fichier ou None) d'après le Content-Disposition d'une partie."""
+    message = HeaderParser().parsestr(entetes.decode("utf-8", "replace"))
+    nom = message.get_param("name", header="content-disposition")
+    if nom is None:
+        raise ErreurApi(400, "Partie multipart sans nom de champ")
+    return collapse_rfc2231_value(nom), message.get_filename()
+
+def lire_multipart(corps, frontiere, dossier, max_fichiers=None):
+    """Champs d'un corps multipart/form-data : {nom: texte ou (nom du fichier, chemin)}.
+
+    Les fichiers sont écrits dans `dossier` au fil de la lecture, limités à
+    max_fichiers[nom] octets pour les champs qui y figurent ; les champs
+    texte sont limités à MAX_CHAMP_OCTETS.
+    """
+    max_fichiers = max_fichiers or {}
+    delimiteur = b"\r\n--" + frontiere
+    champs = {}
+    # Le premier délimiteur n'est pas précédé d'un CRLF ; le préambule est ignoré
+    tampon = _avancer(corps, b"\r\n", delimiteur, _ignorer)
+    while True:
+        while len(tampon) < 2:
+            morceau = corps.read()
+            if not morceau:
+                raise ErreurApi(400, "Corps multipart tronqué")
+            tampon += morceau
+        if tampon.startswith(b"--"):
+            break
+        if not tampon.startswith(b"\r\n"):
+            raise ErreurApi(400, "Délimiteur multipart invalide")
+        tampon = tampon[2:]
+        while (fin := tampon.find(b"\r\n\r\n")) < 0:
+            if len(tampon) > MAX_ENTETES_PARTIE_OCTETS:
+                raise ErreurApi(400, "En-têtes de partie multipart trop longs")
+            morceau = corps.read()
+            if not morceau:
+                raise ErreurApi(400, "Corps multipart tronqué")
+            tampon += morceau
+        nom, nom_fichier = _disposition(tampon[:fin])
+        tampon = tampon[fin + 4:]
+        if nom_fichier is not None:
+            chemin = os.path.join(dossier, f"champ-{len(champs)}")
+            maximum = max_fichiers.get(nom)
+            with open(chemin, "wb") as f:
+
+                def ecrire(octets):
+                    f.write(octets)
+                    if maximum is not None and f.tell() > maximum:
+                        raise ErreurApi(413, f"Fichier {nom!r} limité à "
+                                             f"{maximum / 2**20:.0f} Mo")
+
+                tampon = _avancer(corps, tampon, delimiteur, ecrire)
+            champs[nom] = (os.path.basename(nom_fichier), chemin)
+        else:
+            valeur = bytearray()
+
+            def ajouter(octets):
+                valeur.extend(octets)
+                if len(valeur) > MAX_CHAMP_OCTETS:
+                    raise ErreurApi(413, f"Champ {nom!r} trop long")
+
+            tampon = _avancer(corps, tampon, delimiteur, ajouter)
+            champs[nom] = valeur.decode("utf-8", "replace")
+    corps.vider()  # Épilogue
+    return champs
+
+# ============================================================================
+# ACTIFS ENREGISTRÉS (LOGOS ET FAVICONS)
+# ============================================================================
+
+def verifier_image(chemin):
+    """Lève ErreurApi (415) si le fichier n'est pas une image png / jpg lisible."""
+    try:
+        with ImagePIL.open(chemin) as image:
+            format_image = image.format
+            image.verify()
+    except Exception:
+        raise ErreurApi(415, "Image png ou jpg attendue")
+    if format_image not in FORMATS_IMAGES:
+        raise ErreurApi(415, f"Image png ou jpg attendue (reçu : {format_image})")
+
+class Actifs:
+    """Logos et favicons enregistrés une fois, puis désignés par leur nom."""
+
+    def __init__(self, dossier=DOSSIER_ACTIFS):
+        self.dossier = dossier
+        os.makedirs(dossier, exist_ok=True)
+
+    def chemin(self, nom):
+        if not NOM_ACTIF.fullmatch(nom):
+            raise ErreurApi(400, f"Nom d'actif invalide : {nom!r} (lettres, chiffres, . _ -)")
+        return os.path.join(self.dossier, nom)
+
+    def lire(self, nom):
+        """Octets de l'actif, en flux : un remplacement pendant le traitement est sans effet."""
+        try:
+            flux = io.BytesIO(ispa.lire_fichier(self.chemin(nom)))
+        except FileNotFoundError:
+            raise ErreurApi(404, f"Actif inconnu : {nom!r}")
+        flux.name = nom
+        return flux
+
+    def enregistrer(self, nom, corps):
+        """Écrit l'image reçue sous `nom` (remplacement atomique) ; retourne sa taille."""
+        chemin = self.chemin(nom)
+        corps.max_octets = min(corps.max_octets, MAX_IMAGE_OCTETS)
+        with tempfile.NamedTemporaryFile(dir=self.dossier, prefix=".", suffix=".part",
+                                         delete=False) as tmp:
+            try:
+                corps.copier(tmp)
+                tmp.close()
+                verifier_image(tmp.name)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+        os.replace(tmp.name, chemin)
+        return os.path.getsize(chemin)
+
+    def supprimer(self, nom):
+        try:
+            os.unlink(self.chemin(nom))
+        except FileNotFoundError:
+            raise ErreurApi(404, f"Actif inconnu : {nom!r}")
+
+    def lister(self):
+        return sorted(
+            ({"nom": entree.name, "octets": entree.stat().st_size}
+             for entree in os.scandir(self.dossier)
+             if entree.is_file() and NOM_ACTIF.fullmatch(entree.name)),
+            key=lambda actif: actif["nom"])
+
+# ============================================================================
+# CONVERSION
+# ============================================================================
+
+def lire_booleen(cle, valeur):
+    if valeur.lower() in ("1", "true", "oui", "on"):
+        return True
+    if valeur.lower() in ("", "0", "false", "non", "off"):
+        return False
+    raise ErreurApi(400, f"{cle} : {valeur!r} (attendu : 1 ou 0)")
+
+def options_conversion(options, est_pptx):
+    """(moteur, arguments de convertir_*) d'après les options reçues, validées."""
+    def choix(cle, valeurs, defaut):
+        valeur = options.get(cle, defaut)
+        if valeur not in valeurs:
+            raise ErreurApi(400, f"{cle} : {valeur!r} (attendu : {', '.join(valeurs)})")
+        return valeur
+
+    moteur = choix("moteur", ispa.MOTEURS, ispa.MOTEUR)
+    arguments = {"medias": (lire_booleen("medias", options["medias"]) if "medias" in options
+                            else ispa.OPTIMISER_MEDIAS),
+                 "compression": choix("compression", ispa.COMPRESSIONS, ispa.COMPRESSION)}
+    if est_pptx:
+        arguments["placement"] = choix("placement", ispa.PLACEMENTS_LOGO, ispa.PLACEMENT_LOGO)
+        arguments["style"] = choix("style", ispa.STYLES_PPTX, ispa.STYLE_PPTX)
+        arguments["detection"] = choix("detection", ispa.DETECTIONS_LOGOS, ispa.DETECTION_LOGOS)
+        if moteur == "zip":
+            arguments["processus"] = ispa.PROCESSUS_PAR_TRAVAIL
+    else:
+        arguments["style"] = choix("style", ispa.STYLES_WORD, ispa.STYLE_WORD)
+    if options.get("profil"):
+        # Un nom du dossier des profils, jamais un chemin choisi par le client
+        try:
+            arguments["profil"] = ispa.charger_profil(ispa.chemin_profil(options["profil"]))
+        except ispa.ProfilInvalide as e:
+            raise ErreurApi(400, str(e))
+    return moteur, arguments
+
+def format_document(chemin, format_demande=None, nom=None, type_contenu=None):
+    """"pptx" ou "docx" : format demandé, sinon extension du nom, Content-Type ou contenu."""
+    if not zipfile.is_zipfile(chemin):
+        raise ErreurApi(415, "Document PowerPoint (.pptx) ou Word (.docx) attendu")
+    if format_demande:
+        if format_demande not in TYPES_DOCUMENTS:
+            raise ErreurApi(400, f"format : {format_demande!r} (attendu : pptx, docx)")
+        return format_demande
+    extension = os.path.splitext(nom or "")[1].lower().lstrip(".")
+    if extension in TYPES_DOCUMENTS:
+        return extension
+    for format_doc, type_doc in TYPES_DOCUMENTS.items():
+        if type_contenu == type_doc:
+            return format_doc
+    with zipfile.ZipFile(chemin) as archive:
+        noms = set(archive.namelist())
+    for format_doc, partie in PARTIES_PRINCIPALES.items():
+        if partie in noms:
+            return format_doc
+    raise ErreurApi(415, "Document PowerPoint (.pptx) ou Word (.docx) attendu")
+
+def disposition_fichier(nom):
+    """Content-Disposition d'un téléchargement, nom non ASCII compris (RFC 6266)."""
+    ascii_seul = nom.encode("ascii", "replace").decode().replace('"', "_").replace("?", "_")
+    return f"attachment; filename=\"{ascii_seul}\"; filename*=UTF-8''{quote(nom)}"
+
+# ============================================================================
+# SERVEUR
+# ============================================================================
+
+class GestionnaireApi(BaseHTTPRequestHandler):
+    """Une instance par connexion ; les requêtes s'y succèdent tant qu'elle reste ouverte."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ISPA-API/1"
+    timeout = DELAI_INACTIVITE_SECONDES
+
+    def do_GET(self):
+        self._traiter("GET")
+
+    def do_POST(self):
+        self._traiter("POST")
+
+    def do_PUT(self):
+        self._traiter("PUT")
+
+    def do_DELETE(self):
+        self._traiter("DELETE")
+
+    def _traiter(self, methode):
+        self._corps = None
+        self._reponse_commencee = False
+        url = urlsplit(self.path)
+        try:
+            self._router(methode, url.path, dict(parse_qsl(url.query)))
+        except ErreurApi as e:
+            self._erreur(e.statut, str(e), e.entetes)
+        except ispa.BudgetMemoireDepasse as e:
+            self._erreur(503, str(e), {"Retry-After": "30"})
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except Exception as e:
+            self.log_error("Échec de %s %s : %r", methode, url.path, e)
+            self._erreur(500, f"Échec du traitement : {e}")
+        if self._corps_non_lu():
+            self.close_connection = True
+
+    def _router(self, methode, chemin, parametres):
+        if chemin == "/sante":
+            self._exiger(methode, "GET")
+            return self._json(200, {"statut": "ok", "budget": self.server.budget.stats(),
+                                    "conversions": self.server.stats()})
+        self._verifier_jeton()
+        if chemin == "/convertir":
+            self._exiger(methode, "POST")
+            return self._convertir(parametres)
+        if chemin == "/actifs":
+            self._exiger(methode, "GET")
+            return self._json(200, {"actifs": self.server.actifs.lister()})
+        if chemin == "/profils":
+            self._exiger(methode, "GET")
+            return self._json(200, {"profils": ispa.lister_profils()})
+        if chemin.startswith("/actifs/"):
+            nom = unquote(chemin[len("/actifs/"):])
+            self._exiger(methode, "PUT", "DELETE")
+            if methode == "PUT":
+                octets = self.server.actifs.enregistrer(nom, self._lire_corps())
+                return self._json(201, {"nom": nom, "octets": octets})
+            self.server.actifs.supprimer(nom)
+            return self._json(200, {"nom": nom, "supprime": True})
+        raise ErreurApi(404, f"Route inconnue : {chemin}")
+
+    def _exiger(self, methode, *permises):
+        if methode not in permises:
+            raise ErreurApi(405, f"Méthode {methode} non permise",
+                            {"Allow": ", ".join(permises)})
+
+    def _verifier_jeton(self):
+        jeton = self.server.jeton
+        if jeton and not hmac.compare_digest(self.headers.get("Authorization", ""),
+                                             f"Bearer {jeton}"):
+            raise ErreurApi(401, "Jeton manquant ou invalide",
+                            {"WWW-Authenticate": "Bearer"})
+
+    def _corps_non_lu(self):
+        """Vrai si un corps reste en partie dans la connexion : la requête suivante y serait
+        illisible, la connexion doit être fermée."""
+        if self._corps is not None:
+            return not self._corps.fini
+        return ("chunked" in self.headers.get("Transfer-Encoding", "").lower()
+                or self.headers.get("Content-Length", "0") != "0")
+
+    def _lire_corps(self):
+        self._corps = CorpsRequete(self.rfile, self.headers)
+        return self._corps
+
+    def _image(self, nom, fichiers, options):
+        """Flux de l'image `nom` : fichier envoyé avec le document ou actif désigné."""
+        if nom in fichiers:
+            nom_fichier, chemin = fichiers[nom]
+            verifier_image(chemin)
+            flux = io.BytesIO(ispa.lire_fichier(chemin))
+            flux.name = nom_fichier  # Description de l'image insérée
+            return flux
+        if options.get(nom):
+            return self.server.actifs.lire(options[nom])
+        return None
+
+    def _convertir(self, options):
+        type_contenu = self.headers.get_content_type()
+        with tempfile.TemporaryDirectory(prefix="ispa_api_") as dossier:
+            corps = self._lire_corps()
+            if type_contenu == "multipart/form-data":
+                frontiere = self.headers.get_param("boundary")
+                if not frontiere:
+                    raise ErreurApi(400, "Frontière multipart manquante")
+                # Logo et favicon limités comme les actifs enregistrés (PUT /actifs)
+                champs = lire_multipart(corps, frontiere.encode("latin-1"), dossier,
+                                        {"logo": MAX_IMAGE_OCTETS, "favicon": MAX_IMAGE_OCTETS})
+                fichiers = {cle: valeur for cle, valeur in champs.items()
+                            if isinstance(valeur, tuple)}
+                options.update((cle, valeur) for cle, valeur in champs.items()
+                               if isinstance(valeur, str))
+                if "document" not in fichiers:
+                    raise ErreurApi(400, "Champ fichier 'document' manquant")
+                nom_envoye, chemin = fichiers["document"]
+                nom = options.get("nom") or nom_envoye
+            else:
+                fichiers = {}
+                chemin = os.path.join(dossier, "document")
+                with open(chemin, "wb") as f:
+                    corps.copier(f)
+                nom = options.get("nom")
+
+            logo = self._image("logo", fichiers, options)
+            if logo is None:
+                raise ErreurApi(400, "Logo manquant : fichier 'logo' ou nom d'un actif enregistré")
+            format_doc = format_document(chemin, options.get("format"), nom, type_contenu)
+            est_pptx = format_doc == "pptx"
+            # Le favicon n'est pas géré pour Word (comme dans l'interface)
+            favicon = self._image("favicon", fichiers, options) if est_pptx else None
+            moteur, arguments = options_conversion(options, est_pptx)
+            nom = os.path.basename(nom or f"document.{format_doc}")
+
+            debut = time.perf_counter()
+            with self.server.convertir(chemin, logo, favicon, est_pptx, moteur,
+                                       arguments) as resultat:
+                self._envoyer_fichier(resultat, f"ISPA_{nom}", TYPES_DOCUMENTS[format_doc],
+                                      {"X-ISPA-Duree-Secondes":
+                                       f"{time.perf_counter() - debut:.3f}"})
+
+    def _envoyer_fichier(self, flux, nom, type_contenu, entetes=()):
+        flux.seek(0, os.SEEK_END)
+        taille = flux.tell()
+        flux.seek(0)
+        self._reponse_commencee = True
+        self.send_response(200)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(taille))
+        self.send_header("Content-Disposition", disposition_fichier(nom))
+        for cle, valeur in dict(entetes).items():
+            self.send_header(cle, valeur)
+        self.end_headers()
+        shutil.copyfileobj(flux, self.wfile, TAILLE_BLOC)
+
+    def _json(self, statut, contenu, entetes=()):
+        octets = json.dumps(contenu, ensure_ascii=False).encode("utf-8")
+        self._reponse_commencee = True
+        self.send_response(statut)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(octets)))
+        for cle, valeur in dict(entetes).items():
+            self.send_header(cle, valeur)
+        self.end_headers()
+        self.wfile.write(octets)
+
+    def _erreur(self, statut, message, entetes=()):
+        if self._reponse_commencee:
+            # Réponse déjà partie : le client voit une réponse tronquée
+            self.close_connection = True
+            return
+        entetes = dict(entetes)
+        if self._corps_non_lu():
+            entetes["Connection"] = "close"
+        try:
+            self._json(statut, {"erreur": message}, entetes)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+class ServeurApi(ThreadingHTTPServer):
+    """Serveur de l'API : un thread par connexion, conversions bornées et sous budget mémoire."""
+
+    daemon_threads = True
+
+    def __init__(self, adresse, dossier_actifs=DOSSIER_ACTIFS,
+                 simultanes=ispa.TRAVAUX_SIMULTANES, budget=None, jeton=JETON):
+        super().__init__(adresse, GestionnaireApi)
+        self.actifs = Actifs(dossier_actifs)
+        self.budget = budget or ispa.BudgetMemoire(ispa.BUDGET_MEMOIRE_OCTETS)
+        self.jeton = jeton
+        self.simultanes = simultanes
+        self._places = threading.BoundedSemaphore(simultanes)
+        self._verrou = threading.Lock()
+        self.en_cours = 0
+        self.reussies = 0
+        self.echecs = 0
+
+    def convertir(self, chemin, logo, favicon, est_pptx, moteur, arguments):
+        """Convertit le document ; retourne le tampon de sortie (à fermer par l'appelant).
+
+        Attend une place parmi `simultanes`, puis dans le budget mémoire ;
+        lève BudgetMemoireDepasse au-delà de ATTENTE_BUDGET_SECONDES.
+        """
+        if not self._places.acquire(timeout=ispa.ATTENTE_BUDGET_SECONDES):
+            raise ispa.BudgetMemoireDepasse("Serveur occupé : réessayez dans quelques instants")
+        with self._verrou:
+            self.en_cours += 1
+        reussie = False
+        try:
+            with open(chemin, "rb") as document:
+                octets = ispa.estimer_memoire(document, moteur, arguments.get("processus", 1))
+                with self.budget.reserver(octets):
+                    resultat = ispa.convertisseur(est_pptx, moteur)(document, logo, favicon,
+                                                                   **arguments)
+            reussie = True
+            return resultat
+        finally:
+            self._places.release()
+            with self._verrou:
+                self.en_cours -= 1
+                if reussie:
+                    self.reussies += 1
+                else:
+                    self.echecs += 1
+
+    def stats(self):
+        with self._verrou:
+            return {"en_cours": self.en_cours, "reussies": self.reussies,
+                    "echecs": self.echecs, "simultanes": self.simultanes}
+
+# ============================================================================
+# LIGNE DE COMMANDE
+# ============================================================================
+
+def construire_parser():
+    parser = argparse.ArgumentParser(
+        description="API HTTP de conversion PPTX / DOCX à la charte ISPA."
+    )
+    parser.add_argument("--hote", default="127.0.0.1",
+                        help="Adresse d'écoute (défaut : 127.0.0.1 ; 0.0.0.0 pour le réseau)")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--actifs", default=DOSSIER_ACTIFS,
+                        help="Dossier des logos et favicons enregistrés (ISPA_ACTIFS_DIR)")
+    parser.add_argument("--simultanes", type=int, default=ispa.TRAVAUX_SIMULTANES,
+                        help="Conversions simultanées au plus (défaut : nombre de cœurs)")
+    return parser
+
+def main(argv=None):
+    args = construire_parser().parse_args(argv)
+    serveur = ServeurApi((args.hote, args.port), args.actifs, max(1, args.simultanes))
+    hote, port = serveur.server_address[:2]
+    print(f"🌐 API ISPA sur http://{hote}:{port} (actifs : {args.actifs})", flush=True)
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Benchmarks du traitement PowerPoint / Word, sans serveur Streamlit.
+
+Exemples :
+    python benchmarks/bench.py
+    python benchmarks/bench.py --scenarios pptx_200 docx_100 --repetitions 5
+    python benchmarks/bench.py --comparer benchmarks/baseline.json
+    python benchmarks/bench.py --enregistrer benchmarks/baseline.json
+
+Chaque scénario est généré une fois (fichiers synthétiques mis en cache dans
+--dossier), puis converti par chaque moteur dans un processus neuf : le pic
+de mémoire mesuré (RSS au-delà de celui des imports, Linux) est celui du seul
+traitement. Le temps affiché est la médiane des répétitions ; --comparer
+s'appuie sur le meilleur temps, moins sensible à la charge de la machine, et
+sort en erreur (code 1) si un cas est plus lent ou plus gourmand que la
+référence au-delà de --tolerance.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import generateurs  # noqa: E402
+
+MOTEURS = ("zip", "python")
+
+# Scénarios : type de document et paramètres du générateur
+SCENARIOS = {
+    "pptx_20": ("pptx", {"slides": 20}),
+    "pptx_200": ("pptx", {"slides": 200, "formes": 6, "runs": 4, "medias": 10, "media_ko": 500}),
+    "pptx_texte_dense": ("pptx", {"slides": 50, "formes": 10, "paragraphes": 6, "runs": 8,
+                                  "tableaux": 3, "medias": 0}),
+    "docx_20": ("docx", {"pages": 20}),
+    "docx_100": ("docx", {"pages": 100, "runs": 5, "medias": 10, "media_ko": 500}),
+    "docx_texte_dense": ("docx", {"pages": 200, "paragraphes": 20, "runs": 8, "tableaux": 2,
+                                  "medias": 0}),
+}
+
+# ============================================================================
+# GÉNÉRATION
+# ============================================================================
+
+def fichier_scenario(nom, dossier):
+    """Chemin du fichier du scénario, généré s'il n'existe pas encore."""
+    type_doc, parametres = SCENARIOS[nom]
+    empreinte = hashlib.sha256(json.dumps(parametres, sort_keys=True).encode()).hexdigest()[:12]
+    chemin = os.path.join(dossier, f"{nom}_{empreinte}.{type_doc}")
+    if not os.path.exists(chemin):
+        generer = generateurs.generer_pptx if type_doc == "pptx" else generateurs.generer_docx
+        temporaire = chemin + ".part"
+        generer(temporaire, **parametres)
+        os.replace(temporaire, chemin)
+    return chemin
+
+def images_traitement(dossier):
+    """Logo et favicon du traitement (PNG simples)."""
+    chemins = {}
+    for nom, couleur in (("logo", (30, 160, 60, 255)), ("favicon", (30, 60, 160, 128))):
+        chemins[nom] = os.path.join(dossier, f"{nom}.png")
+        if not os.path.exists(chemins[nom]):
+            with open(chemins[nom], "wb") as f:
+                f.write(generateurs.image_png(couleur))
+    return chemins["logo"], chemins["favicon"]
+
+# ============================================================================
+# MESURE (PROCESSUS DÉDIÉ)
+# ============================================================================
+
+def _statut_memoire(champ):
+    """Valeur (octets) d'un champ de /proc/self/status : VmRSS, VmHWM..."""
+    with open("/proc/self/status") as f:
+        for ligne in f:
+            if ligne.startswith(champ + ":"):
+                return int(ligne.split()[1]) * 1024
+    raise KeyError(champ)
+
+def _remettre_pic_a_zero():
+    """Efface le pic RSS (VmHWM) laissé par les imports ; False si le noyau refuse."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def mesurer(chemin, type_doc, moteur, logo, favicon, repetitions, processus_slides):
+    """Convertit `repetitions` fois le fichier ; exécuté dans un processus neuf."""
+    import ispa
+
+    if type_doc == "pptx":
+        from pptx import Presentation
+        unites = len(Presentation(chemin).slides)
+        if moteur == "zip":
+            def convertir(f):
+                return ispa.convertir_pptx_zip(f, logo, favicon, processus=processus_slides)
+        else:
+            def convertir(f):
+                return ispa.convertir_pptx(f, logo, favicon)
+    else:
+        unites = None  # pages : renseignées par l'appelant (saut de page explicite)
+        convertir_docx = ispa.convertir_docx_zip if moteur == "zip" else ispa.convertir_docx
+
+        def convertir(f):
+            return convertir_docx(f, logo, None)
+
+    # Bibliothèque du format importée avant la mesure, comme le reste du paquet
+    ispa.convertisseur(type_doc == "pptx", moteur)
+    _remettre_pic_a_zero()
+    rss_depart = _statut_memoire("VmRSS")
+    durees = []
+    for _ in range(repetitions):
+        with open(chemin, "rb") as f:
+            debut = time.perf_counter()
+            sortie = convertir(f)
+            durees.append(time.perf_counter() - debut)
+        sortie.seek(0, os.SEEK_END)
+        octets_sortie = sortie.tell()
+        sortie.close()
+    return {
+        "durees": durees,
+        "unites": unites,
+        "octets_sortie": octets_sortie,
+        "pic_memoire_octets": max(0, _statut_memoire("VmHWM") - rss_depart),
+    }
+
+def mesurer_isole(*args):
+    """mesurer() dans un processus "spawn" neuf : RSS de départ non pollué."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(mesurer, *args).result()
+
+def executer(scenarios, moteurs, dossier, repetitions, processus_slides):
+    logo, favicon = images_traitement(dossier)
+    resultats = {}
+    for nom in scenarios:
+        type_doc, parametres = SCENARIOS[nom]
+        chemin = fichier_scenario(nom, dossier)
+        for moteur in moteurs:
+            mesure = mesurer_isole(chemin, type_doc, moteur, logo, favicon,
+                                   repetitions, processus_slides)
+            unites = mesure["unites"] or parametres.get("pages")
+            mediane = statistics.median(mesure["durees"])
+            cas = f"{nom}/{moteur}"
+            resultats[cas] = {
+                "secondes": round(mediane, 4),
+                "secondes_min": round(min(mesure["durees"]), 4),
+                "unites_par_seconde": round(unites / mediane, 2),
+                "pic_memoire_mo": round(mesure["pic_memoire_octets"] / 2**20, 1),
+                "octets_entree": os.path.getsize(chemin),
+                "octets_sortie": mesure["octets_sortie"],
+            }
+            unite = "slides" if type_doc == "pptx" else "pages"
+            print(f"{cas:<28} {mediane:8.3f} s  {unites / mediane:9.1f} {unite}/s  "
+                  f"{resultats[cas]['pic_memoire_mo']:8.1f} Mo", flush=True)
+    return resultats
+
+# ============================================================================
+# RÉFÉRENCE
+# ============================================================================
+
+def comparer(resultats, reference, tolerance):
+    """Liste des régressions (temps ou mémoire) au-delà de `tolerance` (0.25 = +25 %)."""
+    regressions = []
+    for cas, mesure in resultats.items():
+        ref = reference.get("resultats", {}).get(cas)
+        if ref is None:
+            continue
+        for cle, libelle in (("secondes_min", "temps"), ("pic_memoire_mo", "mémoire")):
+            # Les très petites valeurs sont dominées par le bruit de mesure
+            plancher = 0.05 if cle == "secondes_min" else 5
+            if mesure[cle] > max(ref[cle], plancher) * (1 + tolerance):
+                regressions.append(f"{cas} : {libelle} {ref[cle]} → {mesure[cle]} "
+                                   f"(+{mesure[cle] / max(ref[cle], plancher) - 1:.0%})")
+    return regressions
+
+def machine():
+    return {"python": platform.python_version(), "systeme": platform.platform(),
+            "processeur": platform.processor() or platform.machine(),
+            "coeurs": os.cpu_count()}
+
+# ============================================================================
+# LIGNE DE COMMANDE
+# ============================================================================
+
+def construire_parser():
+    parser = argparse.ArgumentParser(
+        description="Mesure temps, débit et pic mémoire du traitement PPTX / DOCX."
+    )
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS),
+                        default=list(SCENARIOS), help="Scénarios à exécuter (défaut : tous)")
+    parser.add_argument("--moteurs", nargs="+", choices=MOTEURS, default=list(MOTEURS))
+    parser.add_argument("--repetitions", type=int, default=3,
+                        help="Conversions par cas ; la médiane est retenue")
+    parser.add_argument("--processus-slides", type=int, default=1,
+                        help="Processus par présentation (moteur zip)")
+    parser.add_argument("--dossier", default=os.path.join(tempfile.gettempdir(), "ispa_bench"),
+                        help="Dossier des fichiers générés (réutilisés d'une exécution à l'autre)")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    parser.add_argument("--enregistrer", help="Écrit les résultats comme nouvelle référence")
+    parser.add_argument("--comparer", help="Référence à comparer (code 1 en cas de régression)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Écart toléré par rapport à la référence (défaut : 0.25 = +25 %%)")
+    return parser
+
+def main(argv=None):
+    args = construire_parser().parse_args(argv)
+    os.makedirs(args.dossier, exist_ok=True)
+
+    resultats = executer(args.scenarios, args.moteurs, args.dossier,
+                         args.repetitions, args.processus_slides)
+    rapport = {"machine": machine(), "repetitions": args.repetitions, "resultats": resultats}
+    for chemin in (args.json, args.enregistrer):
+        if chemin:
+            with open(chemin, "w", encoding="utf-8") as f:
+                json.dump(rapport, f, indent=2, ensure_ascii=False)
+                f.write("\n")
+
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            reference = json.load(f)
+        regressions = comparer(resultats, reference, args.tolerance)
+        print("---")
+        if regressions:
+            for ligne in regressions:
+                print(f"❌ {ligne}", file=sys.stderr)
+            return 1
+        print(f"✅ Aucune régression au-delà de {args.tolerance:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
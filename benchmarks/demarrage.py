@@ -0,0 +1,142 @@
+"""Temps de démarrage à froid : imports du paquet ispa et première conversion.
+
+Exemples :
+    python benchmarks/demarrage.py
+    python benchmarks/demarrage.py --repetitions 10 --json demarrage.json
+
+Chaque cas est exécuté dans un interpréteur neuf, --repetitions fois ; le
+temps retenu est la médiane. "import" est mesuré dans le processus, du
+premier import à la fin du cas ; "processus" est la durée totale vue de
+l'extérieur, démarrage de Python compris. Les modules chargés (nombre, et
+présence de streamlit, python-pptx et python-docx) montrent ce que chaque
+cas importe réellement : `import ispa` ne doit charger aucun des trois.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import generateurs  # noqa: E402
+
+BIBLIOTHEQUES = ("streamlit", "pptx", "docx")
+
+# Cas : code exécuté dans l'interpréteur neuf ; {document_pptx},
+# {document_docx} et {logo} désignent les fichiers générés
+CAS = {
+    "import_ispa": "import ispa",
+    "ispa_pptx": "import ispa\nispa.convertisseur(True)",
+    "ispa_docx": "import ispa\nispa.convertisseur(False)",
+    "premiere_pptx": ("import ispa\nwith open({document_pptx!r}, 'rb') as f:\n"
+                      "    ispa.convertisseur(True)(f, {logo!r}, None).close()"),
+    "premiere_docx": ("import ispa\nwith open({document_docx!r}, 'rb') as f:\n"
+                      "    ispa.convertisseur(False)(f, {logo!r}, None).close()"),
+    # Référence : la page Streamlit importe le paquet et Streamlit
+    "import_app": "import app",
+}
+
+# Enveloppe du cas : durée mesurée dans le processus et modules chargés
+SCRIPT = """\
+import sys, time
+sys.path.insert(0, {racine!r})
+debut = time.perf_counter()
+{code}
+duree = time.perf_counter() - debut
+print({marque!r} + __import__("json").dumps({{
+    "secondes": duree, "modules": len(sys.modules),
+    "charges": [b for b in {bibliotheques!r} if b in sys.modules]}}))
+"""
+MARQUE = "@@demarrage@@"
+
+# ============================================================================
+# MESURE
+# ============================================================================
+
+def fichiers(dossier):
+    """Petits documents et logo des cas de première conversion (générés une fois)."""
+    chemins = {"document_pptx": os.path.join(dossier, "demarrage.pptx"),
+               "document_docx": os.path.join(dossier, "demarrage.docx"),
+               "logo": os.path.join(dossier, "logo.png")}
+    if not os.path.exists(chemins["document_pptx"]):
+        generateurs.generer_pptx(chemins["document_pptx"], slides=1)
+    if not os.path.exists(chemins["document_docx"]):
+        generateurs.generer_docx(chemins["document_docx"], pages=1)
+    if not os.path.exists(chemins["logo"]):
+        with open(chemins["logo"], "wb") as f:
+            f.write(generateurs.image_png((30, 160, 60, 255)))
+    return chemins
+
+def mesurer(code):
+    """Exécute le cas dans un interpréteur neuf ; None s'il échoue (Streamlit absent...)."""
+    script = SCRIPT.format(racine=RACINE, code=code, marque=MARQUE,
+                           bibliotheques=BIBLIOTHEQUES)
+    debut = time.perf_counter()
+    resultat = subprocess.run([sys.executable, "-c", script], cwd=RACINE,
+                              capture_output=True, text=True)
+    duree = time.perf_counter() - debut
+    ligne = next((texte for texte in resultat.stdout.splitlines() if texte.startswith(MARQUE)),
+                 None)
+    if resultat.returncode or ligne is None:
+        return None
+    mesure = json.loads(ligne[len(MARQUE):])
+    mesure["processus"] = duree
+    return mesure
+
+def executer(cas, dossier, repetitions):
+    chemins = fichiers(dossier)
+    resultats = {}
+    for nom in cas:
+        mesures = [mesurer(CAS[nom].format(**chemins)) for _ in range(repetitions)]
+        if None in mesures:
+            print(f"{nom:<16} indisponible", flush=True)
+            continue
+        resultats[nom] = {
+            "import_ms": round(statistics.median(m["secondes"] for m in mesures) * 1000, 1),
+            "processus_ms": round(statistics.median(m["processus"] for m in mesures) * 1000, 1),
+            "modules": mesures[-1]["modules"],
+            "charges": mesures[-1]["charges"],
+        }
+        r = resultats[nom]
+        print(f"{nom:<16} {r['import_ms']:8.1f} ms  {r['processus_ms']:8.1f} ms  "
+              f"{r['modules']:5d} modules  {', '.join(r['charges']) or '-'}", flush=True)
+    return resultats
+
+# ============================================================================
+# LIGNE DE COMMANDE
+# ============================================================================
+
+def construire_parser():
+    parser = argparse.ArgumentParser(
+        description="Mesure le temps de démarrage à froid du paquet ispa."
+    )
+    parser.add_argument("--cas", nargs="+", choices=list(CAS), default=list(CAS),
+                        help="Cas à exécuter (défaut : tous)")
+    parser.add_argument("--repetitions", type=int, default=5,
+                        help="Processus neufs par cas ; la médiane est retenue")
+    parser.add_argument("--dossier", default=os.path.join(tempfile.gettempdir(), "ispa_bench"),
+                        help="Dossier des fichiers générés (réutilisés d'une exécution à l'autre)")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    return parser
+
+def main(argv=None):
+    args = construire_parser().parse_args(argv)
+    os.makedirs(args.dossier, exist_ok=True)
+
+    print(f"{'cas':<16} {'import':>11}  {'processus':>11}")
+    resultats = executer(args.cas, args.dossier, args.repetitions)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"repetitions": args.repetitions, "resultats": resultats}, f,
+                      indent=2, ensure_ascii=False)
+            f.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Générateurs de présentations et de documents synthétiques pour les benchmarks.
+
+Les fichiers produits reproduisent ce que le traitement rencontre sur les
+documents réels : ancien logo sur les masters (ou dans l'en-tête Word),
+titres, corps et bullets en plusieurs runs, tableaux, photos embarquées.
+Tout est déterministe (graine fixe) : deux générations avec les mêmes
+paramètres donnent les mêmes textes et les mêmes images.
+"""
+
+import io
+import random
+
+from PIL import Image
+from docx import Document
+from docx.shared import Cm as DocxCm
+from pptx import Presentation
+from pptx.util import Cm, Pt
+
+MOTS = ("ispa", "charte", "formation", "apprentissage", "projet", "équipe", "bilan",
+        "objectif", "module", "évaluation", "compétence", "atelier", "calendrier")
+
+# ============================================================================
+# IMAGES
+# ============================================================================
+
+def image_png(couleur, taille=(200, 200)):
+    """PNG uni, utilisé pour les anciens logos et le logo du traitement."""
+    flux = io.BytesIO()
+    Image.new("RGBA", taille, couleur).save(flux, "PNG")
+    return flux.getvalue()
+
+def image_media(numero, ko, graine=0):
+    """JPEG de bruit d'environ `ko` Ko (le bruit ne se compresse presque pas)."""
+    aleatoire = random.Random(f"{graine}/{numero}")
+    cote = max(16, int((ko * 1024 / 1.5) ** 0.5))
+    image = Image.frombytes("RGB", (cote, cote), aleatoire.randbytes(cote * cote * 3))
+    flux = io.BytesIO()
+    image.save(flux, "JPEG", quality=90)
+    return flux.getvalue()
+
+def texte(aleatoire, mots=4):
+    return " ".join(aleatoire.choice(MOTS) for _ in range(mots))
+
+# ============================================================================
+# POWERPOINT
+# ============================================================================
+
+def _ajouter_ancien_logo(conteneur, octets):
+    """Petite image dans le coin haut-gauche : détectée comme ancien logo."""
+    partie, rId = conteneur.part.get_or_add_image_part(io.BytesIO(octets))
+    spTree = conteneur.shapes._spTree
+    id_ = spTree.max_shape_id + 1
+    spTree.add_pic(id_, f"Logo {id_}", partie.desc, rId, Cm(0.5), Cm(0.5), Cm(2), Cm(2))
+
+def _remplir(text_frame, aleatoire, paragraphes, runs):
+    for i in range(paragraphes):
+        paragraphe = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
+        paragraphe.level = min(i, 2)
+        for _ in range(runs):
+            run = paragraphe.add_run()
+            run.text = texte(aleatoire) + " "
+            run.font.size = Pt(aleatoire.choice((14, 18, 24)))
+
+def generer_pptx(chemin, slides=20, formes=4, paragraphes=3, runs=3, tableaux=1,
+                 logos_master=True, medias=2, media_ko=200, graine=0):
+    """Présentation de `slides` slides.
+
+    formes : formes texte par slide (titre et corps compris) ;
+    paragraphes / runs : par forme / par paragraphe ;
+    tableaux : tableaux 3 × 3 par slide ;
+    logos_master : ancien logo sur chaque master et layout ;
+    medias / media_ko : photos distinctes (réparties sur les slides) et leur poids.
+    """
+    aleatoire = random.Random(graine)
+    pres = Presentation()
+    if logos_master:
+        ancien_logo = image_png((200, 30, 30, 255))
+        for master in pres.slide_masters:
+            _ajouter_ancien_logo(master, ancien_logo)
+            for layout in master.slide_layouts:
+                _ajouter_ancien_logo(layout, ancien_logo)
+    photos = [image_media(n, media_ko, graine) for n in range(medias)]
+
+    for idx in range(slides):
+        slide = pres.slides.add_slide(pres.slide_layouts[1])
+        slide.shapes.title.text = texte(aleatoire, 3).capitalize()
+        _remplir(slide.placeholders[1].text_frame, aleatoire, paragraphes, runs)
+        for n in range(max(0, formes - 2)):
+            boite = slide.shapes.add_textbox(Cm(1 + 6 * n), Cm(14), Cm(6), Cm(3))
+            _remplir(boite.text_frame, aleatoire, paragraphes, runs)
+        for n in range(tableaux):
+            table = slide.shapes.add_table(3, 3, Cm(14 + n), Cm(4 + n), Cm(10), Cm(4)).table
+            for cellule in (c for ligne in table.rows for c in ligne.cells):
+                cellule.text = texte(aleatoire, 2)
+        if photos:
+            slide.shapes.add_picture(io.BytesIO(photos[idx % len(photos)]),
+                                     Cm(16), Cm(10), Cm(6), Cm(4.5))
+    pres.save(chemin)
+    return chemin
+
+# ============================================================================
+# WORD
+# ============================================================================
+
+def generer_docx(chemin, pages=20, paragraphes=8, runs=3, tableaux=1,
+                 logo_entete=True, medias=2, media_ko=200, graine=0):
+    """Document de `pages` pages (sauts de page explicites).
+
+    paragraphes / runs : paragraphes de corps par page / runs par paragraphe ;
+    tableaux : tableaux 3 × 3 par page ;
+    logo_entete : ancien logo dans l'en-tête et en tête du corps ;
+    medias / media_ko : photos distinctes (réparties sur les pages) et leur poids.
+    """
+    aleatoire = random.Random(graine)
+    doc = Document()
+    if logo_entete:
+        ancien_logo = image_png((200, 30, 30, 255))
+        doc.sections[0].header.paragraphs[0].add_run().add_picture(
+            io.BytesIO(ancien_logo), width=DocxCm(2))
+        doc.add_paragraph().add_run().add_picture(io.BytesIO(ancien_logo), width=DocxCm(2))
+    photos = [image_media(n, media_ko, graine) for n in range(medias)]
+
+    doc.add_heading(texte(aleatoire, 3).capitalize(), 0)
+    for idx in range(pages):
+        doc.add_heading(f"Partie {idx + 1} : {texte(aleatoire, 2)}", 1)
+        for n in range(paragraphes):
+            if n == paragraphes // 2:
+                doc.add_heading(texte(aleatoire, 3).capitalize(), 2)
+            paragraphe = doc.add_paragraph(style="List Bullet" if n % 4 == 3 else None)
+            for _ in range(runs):
+                run = paragraphe.add_run(texte(aleatoire, 6) + " ")
+                run.bold = aleatoire.random() < 0.2
+        for _ in range(tableaux):
+            table = doc.add_table(3, 3)
+            for cellule in (c for ligne in table.rows for c in ligne.cells):
+                cellule.text = texte(aleatoire, 2)
+        if photos:
+            doc.add_picture(io.BytesIO(photos[idx % len(photos)]), width=DocxCm(8))
+        doc.add_page_break()
+    doc.save(chemin)
+    return chemin
@@ -0,0 +1,282 @@
+"""Traitement par lots des documents ISPA, sans interface Streamlit.
+
+Exemples :
+    python cli.py --logo logo.png -o sortie/ presentations/
+    python cli.py --logo logo.png --favicon favicon.png -j 8 -o sortie/ "partage/**/*.pptx"
+
+Chaque document est traité dans un processus séparé (un document par tâche) ;
+les fichiers convertis sont écrits dans le dossier de sortie au fur et à mesure,
+et un échec sur un fichier n'interrompt pas le lot.
+"""
+
+import argparse
+import contextlib
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Charte seule (aucune dépendance) : options par défaut, sans charger les formats
+from ispa.charte import (COMPRESSION, COMPRESSIONS, DETECTION_LOGOS, DETECTIONS_LOGOS, MOTEUR,
+                         MOTEURS, OPTIMISER_MEDIAS, PLACEMENT_LOGO, PLACEMENTS_LOGO,
+                         PROCESSUS_SLIDES, STYLE_PPTX, STYLE_WORD, STYLES_PPTX, STYLES_WORD)
+
+EXTENSIONS = (".pptx", ".docx")
+
+# ============================================================================
+# SÉLECTION DES FICHIERS
+# ============================================================================
+
+def _est_document(chemin):
+    nom = os.path.basename(chemin)
+    # "~$..." : fichiers verrous laissés par Office sur les partages
+    return nom.lower().endswith(EXTENSIONS) and not nom.startswith("~$")
+
+def _racine_motif(motif):
+    """Partie fixe d'un motif glob, utilisée pour recréer l'arborescence."""
+    parties = []
+    for partie in motif.split(os.sep):
+        if glob.has_magic(partie):
+            break
+        parties.append(partie)
+    return os.sep.join(parties) or "."
+
+def lister_fichiers(entrees):
+    """Retourne les couples (chemin, chemin relatif de sortie) à traiter.
+
+    Les entrées peuvent être des fichiers, des dossiers (parcourus
+    récursivement) ou des motifs glob ("**" accepté).
+    """
+    vus = set()
+    fichiers = []
+
+    def ajouter(chemin, racine):
+        cle = os.path.abspath(chemin)
+        if cle in vus or not _est_document(chemin):
+            return
+        vus.add(cle)
+        relatif = os.path.relpath(chemin, racine) if racine else os.path.basename(chemin)
+        fichiers.append((chemin, relatif))
+
+    for entree in entrees:
+        if os.path.isdir(entree):
+            for dossier, _, noms in os.walk(entree):
+                for nom in sorted(noms):
+                    ajouter(os.path.join(dossier, nom), entree)
+        elif glob.has_magic(entree):
+            racine = _racine_motif(entree)
+            for chemin in sorted(glob.glob(entree, recursive=True)):
+                if os.path.isfile(chemin):
+                    ajouter(chemin, racine)
+        elif os.path.isfile(entree):
+            ajouter(entree, None)
+        else:
+            print(f"⚠️ Entrée introuvable : {entree}", file=sys.stderr)
+
+    return fichiers
+
+def chemin_sortie(dossier_sortie, relatif):
+    dossier, nom = os.path.split(relatif)
+    return os.path.join(dossier_sortie, dossier, f"ISPA_{nom}")
+
+# ============================================================================
+# TRAITEMENT (PROCESSUS DE TRAVAIL)
+# ============================================================================
+
+def _initialiser_processus():
+    # Import unique par processus plutôt qu'à chaque document ; python-pptx et
+    # python-docx sont chargés au premier document de leur format
+    import ispa  # noqa: F401
+
+def traiter_fichier(chemin, sortie, logo_path, favicon_path, placement=PLACEMENT_LOGO,
+                    moteur=MOTEUR, processus_slides=PROCESSUS_SLIDES, style=STYLE_PPTX, style_word=STYLE_WORD,
+                    medias=OPTIMISER_MEDIAS, mesures=None, detection=DETECTION_LOGOS,
+                    profil=None, compression=COMPRESSION):
+    """Convertit un document et écrit le résultat.
+
+    Retourne la durée en secondes et le rapport d'optimisation des images
+    (None sans `medias`). mesures : "json" ou "prometheus", durées des phases
+    et compteurs écrits à côté du résultat (<sortie>.mesures.json / .prom).
+    profil : nom ou chemin d'un profil de marque, compilé une fois par processus.
+    compression : profil de compression du résultat, voir COMPRESSION.
+    """
+    import ispa
+
+    debut = time.perf_counter()
+    enregistree = ispa.ProgressionEnregistree()
+    progression = ispa.ProgressionMesuree(enregistree) if mesures else enregistree
+    os.makedirs(os.path.dirname(sortie) or ".", exist_ok=True)
+    temporaire = sortie + ".part"
+    # Écriture directe dans le fichier final : aucune copie du résultat en mémoire
+    try:
+        with open(chemin, "rb") as f, open(temporaire, "wb") as resultat:
+            if chemin.lower().endswith(".pptx"):
+                if moteur == "zip":
+                    ispa.convertir_pptx_zip(f, logo_path, favicon_path, progression,
+                                           placement=placement, style=style,
+                                           processus=processus_slides, sortie=resultat,
+                                           medias=medias, detection=detection,
+                                           profil=profil, compression=compression)
+                else:
+                    ispa.convertir_pptx(f, logo_path, favicon_path, progression,
+                                       placement=placement, style=style, sortie=resultat,
+                                       medias=medias, detection=detection, profil=profil,
+                                       compression=compression)
+            else:
+                # Le favicon n'est pas géré pour Word (comme dans l'interface)
+                convertir = ispa.convertir_docx_zip if moteur == "zip" else ispa.convertir_docx
+                convertir(f, logo_path, None, progression, style=style_word, sortie=resultat,
+                          medias=medias, profil=profil, compression=compression)
+    except BaseException:
+        # Le .part n'existe pas si l'ouverture de l'entrée ou de la sortie a échoué
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temporaire)
+        raise
+    os.replace(temporaire, sortie)
+    if mesures:
+        extension, texte = (("json", progression.exporter_json()) if mesures == "json"
+                            else ("prom", progression.exporter_prometheus()))
+        with open(f"{sortie}.mesures.{extension}", "w", encoding="utf-8") as f:
+            f.write(texte)
+    rapport = next((detail for type_evt, detail in enregistree.evenements
+                    if type_evt == "medias"), None)
+    return time.perf_counter() - debut, rapport
+
+# ============================================================================
+# LIGNE DE COMMANDE
+# ============================================================================
+
+def construire_parser():
+    parser = argparse.ArgumentParser(
+        description="Applique la charte ISPA à des lots de fichiers PPTX / DOCX."
+    )
+    parser.add_argument("entrees", nargs="+",
+                        help="Fichiers, dossiers ou motifs glob à traiter")
+    parser.add_argument("--logo", required=True, help="Logo principal (png/jpg)")
+    parser.add_argument("--favicon", help="Favicon (PowerPoint uniquement)")
+    parser.add_argument("-o", "--sortie", required=True, help="Dossier de sortie")
+    parser.add_argument("--placement", choices=PLACEMENTS_LOGO, default=PLACEMENT_LOGO,
+                        help="Logo posé une fois sur les masters ou sur chaque slide")
+    parser.add_argument("--style", choices=STYLES_PPTX, default=STYLE_PPTX,
+                        help="runs : styles écrits sur chaque texte ; "
+                             "theme : styles du master et du thème, dont les textes héritent")
+    parser.add_argument("--detection", choices=DETECTIONS_LOGOS, default=DETECTION_LOGOS,
+                        help="empreintes : images des anciens logos (masters, layouts, "
+                             "ISPA_EMPREINTES_LOGO) retirées partout, groupes compris ; "
+                             "position : toute petite image dans un coin "
+                             "(défaut : ISPA_DETECTION_LOGOS, sinon empreintes)")
+    parser.add_argument("--style-word", choices=STYLES_WORD, default=STYLE_WORD,
+                        help="runs : styles écrits sur chaque run ; "
+                             "styles : définitions de styles de styles.xml, dont les runs héritent")
+    parser.add_argument("--profil",
+                        help="Profil de marque : nom (dossier ISPA_PROFILS_DIR) ou fichier "
+                             ".toml / .json ; défaut : ISPA_PROFIL, sinon la charte ISPA")
+    parser.add_argument("--moteur", choices=MOTEURS, default=MOTEUR,
+                        help="zip : médias recopiés sans recompression ; "
+                             "python : ouverture complète par python-pptx / python-docx")
+    parser.add_argument("--medias", action=argparse.BooleanOptionalAction,
+                        default=OPTIMISER_MEDIAS,
+                        help="Optimise les images : réduction à la taille d'affichage, "
+                             "doublons fusionnés, images inutilisées retirées "
+                             "(défaut : ISPA_OPTIMISER_MEDIAS)")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default=COMPRESSION,
+                        help="Compression des parties écrites : rapide (niveau 1), standard, "
+                             "maximale (niveau 9, archivage) ou stockage (aucune) ; "
+                             "images et vidéos toujours stockées telles quelles "
+                             "(défaut : ISPA_COMPRESSION, sinon standard)")
+    parser.add_argument("--mesures", choices=("json", "prometheus"),
+                        help="Écrit les durées des phases, par slide, et les compteurs "
+                             "à côté de chaque résultat (<sortie>.mesures.json / .prom)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("--processus-slides", type=int, default=PROCESSUS_SLIDES,
+                        help="Processus par présentation pour les slides (moteur zip) ; "
+                             "utile pour quelques très grosses présentations "
+                             "(défaut : ISPA_PROCESSUS_SLIDES, sinon 1)")
+    parser.add_argument("--max-taches-par-processus", type=int, default=None,
+                        help="Recycle chaque processus après N documents")
+    parser.add_argument("--ecraser", action="store_true",
+                        help="Retraite les fichiers déjà présents en sortie")
+    return parser
+
+def main(argv=None):
+    args = construire_parser().parse_args(argv)
+
+    for image in (args.logo, args.favicon):
+        if image and not os.path.isfile(image):
+            print(f"❌ Image introuvable : {image}", file=sys.stderr)
+            return 2
+
+    # Profil vérifié une fois avant le lot ; chaque processus le recompile depuis son fichier
+    from ispa.profils import ProfilInvalide, charger_profil
+    try:
+        profil = charger_profil(args.profil)
+    except ProfilInvalide as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    if args.profil and os.path.isfile(args.profil):
+        args.profil = os.path.abspath(args.profil)
+
+    fichiers = lister_fichiers(args.entrees)
+    if not args.ecraser:
+        fichiers = [(c, r) for c, r in fichiers
+                    if not os.path.exists(chemin_sortie(args.sortie, r))]
+    if not fichiers:
+        print("Aucun document à traiter.")
+        return 0
+
+    logo_path = os.path.abspath(args.logo)
+    favicon_path = os.path.abspath(args.favicon) if args.favicon else None
+    jobs = max(1, min(args.jobs, len(fichiers)))
+    print(f"📄 {len(fichiers)} document(s) à traiter sur {jobs} processus "
+          f"(profil {profil.nom})")
+
+    reussis = 0
+    echecs = []
+    economises = 0
+    debut = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs,
+                             initializer=_initialiser_processus,
+                             max_tasks_per_child=args.max_taches_par_processus) as pool:
+        taches = {
+            pool.submit(traiter_fichier, chemin,
+                        chemin_sortie(args.sortie, relatif),
+                        logo_path, favicon_path, args.placement, args.moteur,
+                        args.processus_slides, args.style, args.style_word,
+                        args.medias, args.mesures, args.detection, args.profil,
+                        args.compression): chemin
+            for chemin, relatif in fichiers
+        }
+        for numero, tache in enumerate(as_completed(taches), start=1):
+            chemin = taches[tache]
+            try:
+                duree, rapport = tache.result()
+            except Exception as e:
+                echecs.append((chemin, e))
+                print(f"[{numero}/{len(fichiers)}] ❌ {chemin} : {e}", flush=True)
+            else:
+                reussis += 1
+                images = ""
+                if rapport:
+                    economises += rapport["octets_economises"]
+                    images = (f", images : -{rapport['octets_economises'] / 2**20:.1f} Mo, "
+                              f"{rapport['images_reduites']} réduites, "
+                              f"{rapport['doublons_fusionnes']} doublons, "
+                              f"{rapport['images_retirees']} retirées")
+                print(f"[{numero}/{len(fichiers)}] ✅ {chemin} ({duree:.1f} s{images})", flush=True)
+
+    total = time.perf_counter() - debut
+    print("---")
+    print(f"Réussis : {reussis}   Échecs : {len(echecs)}   Durée : {total:.1f} s   "
+          f"Débit : {len(fichiers) / total:.2f} fichiers/s")
+    if args.medias:
+        print(f"Images : {economises / 2**20:.1f} Mo économisés")
+    for chemin, e in echecs:
+        print(f"  ❌ {chemin} : {e}", file=sys.stderr)
+
+    return 1 if echecs else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
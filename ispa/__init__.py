@@ -0,0 +1,55 @@
+"""Moteur de la charte ISPA, utilisable sans Streamlit (interface, ligne de commande, API).
+
+    import ispa
+    with open("deck.pptx", "rb") as f:
+        ispa.convertir_pptx_zip(f, "logo.png", None, sortie=open("ISPA_deck.pptx", "wb"))
+
+python-pptx et python-docx ne sont importés qu'au premier document de leur
+format : `import ispa` ne charge que la charte, les profils de marque, les
+puits de progression, le budget mémoire, le cache et la file de traitements. Les fonctions de
+conversion (convertir_pptx, convertir_docx...) et le reste des modules
+ispa.powerpoint / ispa.word sont résolus à leur premier accès.
+"""
+
+import importlib
+
+from .cache import (CACHE_DISQUE_DOSSIER, CACHE_DISQUE_OCTETS, CACHE_MEMOIRE_OCTETS,
+                    CacheResultats, cle_cache, options_cle)
+from .charte import (COMPRESSION, COMPRESSION_INTERFACE, COMPRESSIONS, DETECTION_LOGOS,
+                     DETECTIONS_LOGOS, MANIFESTE_SLIDES, MEDIAS_DPI, MEDIAS_MARGE,
+                     MEDIAS_QUALITE_JPEG, MOTEUR, MOTEURS, OPTIMISER_MEDIAS, PLACEMENT_LOGO,
+                     PLACEMENTS_LOGO, PROCESSUS_SLIDES, STYLE_PPTX, STYLE_WORD, STYLES_PPTX,
+                     STYLES_WORD, THREADS_COMPRESSION, version_charte)
+from .conversion import convertisseur
+from .profils import (PROFILS_DOSSIER, Profil, ProfilInvalide, charger_profil, chemin_profil,
+                      compiler_profil, lister_profils)
+from .progression import (ProgressionEnregistree, ProgressionMesuree, ProgressionMuette,
+                          ProgressionResumee, ProgressionTravail, rejouer_mesures)
+from .ressources import (ATTENTE_BUDGET_SECONDES, BUDGET_MEMOIRE_OCTETS,
+                         TELECHARGEMENT_MAX_OCTETS, BudgetMemoire, BudgetMemoireDepasse, conserver_resultat,
+                         estimer_memoire, lire_fichier, tampon_sortie, telechargeable)
+from .travaux import (PROCESSUS_PAR_TRAVAIL, TRAVAUX_PAR_UTILISATEUR, TRAVAUX_SIMULTANES,
+                      FileTraitements, Travail, TravailRefuse, travail_de_traitement)
+
+# Noms publics → module qui les définit, importé à la demande (PEP 562)
+_DIFFERES = {
+    "convertir_pptx": "powerpoint",
+    "convertir_pptx_zip": "powerpoint",
+    "brander_presentation": "powerpoint",
+    "convertir_docx": "word",
+    "convertir_docx_zip": "word",
+    "brander_document": "word",
+    "optimiser_medias": "medias",
+    "PaquetZip": "paquet",
+}
+
+def __getattr__(nom):
+    if nom in _DIFFERES:
+        module = importlib.import_module(f".{_DIFFERES[nom]}", __name__)
+        valeur = getattr(module, nom)
+        globals()[nom] = valeur  # Accès suivants sans repasser par ici
+        return valeur
+    raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_DIFFERES))
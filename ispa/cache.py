@@ -0,0 +1,178 @@
+"""Cache des fichiers produits, en mémoire et sur disque, partagé entre traitements."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+
+from .charte import (COMPRESSION_INTERFACE, MANIFESTE_SLIDES, MEDIAS_DPI, MEDIAS_MARGE,
+                     MEDIAS_QUALITE_JPEG, MOTEUR, PLACEMENT_LOGO, STYLE_PPTX, STYLE_WORD,
+                     version_charte)
+from .profils import charger_profil
+from .ressources import SEUIL_SPOOL_OCTETS, epingler_fichier
+
+# Un même document retraité avec les mêmes logo / favicon / charte donne le
+# même fichier : le résultat est mis en cache sous l'empreinte de ces entrées.
+# Tier mémoire (LRU borné en octets) + tier disque optionnel (ISPA_CACHE_DIR).
+
+CACHE_MEMOIRE_OCTETS = 256 * 1024 * 1024
+CACHE_DISQUE_DOSSIER = os.environ.get("ISPA_CACHE_DIR")
+CACHE_DISQUE_OCTETS = 2 * 1024 * 1024 * 1024
+
+def options_cle(est_pptx, medias=False, profil=None, noms_images=(),
+                compression=COMPRESSION_INTERFACE, moteur=MOTEUR, placement=PLACEMENT_LOGO,
+                style=STYLE_PPTX, style_word=STYLE_WORD, manifeste=MANIFESTE_SLIDES):
+    """Options d'un traitement qui changent le résultat, pour cle_cache.
+
+    Seul endroit où elles sont assemblées : tout réglage qui change les
+    octets produits (hors charte, voir version_charte) doit y figurer.
+    profil : profil de marque compilé, nom ou chemin (None : profil par défaut).
+    noms_images : noms des fichiers logo / favicon, repris dans la description
+    des images insérées.
+    """
+    options = (f"{placement}/{style}/manifeste:{manifeste:d}" if est_pptx else style_word)
+    options += f"/moteur:{moteur}"
+    if medias:
+        options += f"/medias:{MEDIAS_DPI}:{MEDIAS_MARGE}:{MEDIAS_QUALITE_JPEG}"
+    if any(noms_images):
+        options += "/images:" + "|".join(nom or "" for nom in noms_images)
+    return options + f"/profil:{charger_profil(profil).empreinte}/compression:{compression}"
+
+def cle_cache(document, logo, favicon=None, options=""):
+    """Clé d'un résultat : empreintes du document, du logo, du favicon et de la charte."""
+    empreintes = [hashlib.sha256(octets).hexdigest() if octets else "-"
+                  for octets in (document, logo, favicon)]
+    return hashlib.sha256("|".join([version_charte(), *empreintes, options]).encode()).hexdigest()
+
+class CacheResultats:
+    """Cache des fichiers produits, partagé entre les sessions (thread-safe).
+
+    get / put travaillent en octets, ou en chemins de fichiers pour les
+    résultats de plus de max_octets_entree_memoire : ceux-là ne sont jamais
+    chargés en mémoire et ne vivent que dans le tier disque. Le chemin rendu
+    par get est une copie épinglée (voir epingler_fichier), que l'éviction du
+    tier disque ne peut pas retirer avant le téléchargement.
+    Les compteurs de stats() servent au suivi.
+    """
+
+    def __init__(self, max_octets_memoire=CACHE_MEMOIRE_OCTETS, dossier=None,
+                 max_octets_disque=CACHE_DISQUE_OCTETS,
+                 max_octets_entree_memoire=SEUIL_SPOOL_OCTETS):
+        self.max_octets_memoire = max_octets_memoire
+        self.dossier = dossier
+        self.max_octets_disque = max_octets_disque
+        self.max_octets_entree_memoire = max_octets_entree_memoire
+        self._memoire = OrderedDict()
+        self._octets_memoire = 0
+        self._verrou = threading.Lock()
+        self.compteurs = Counter()
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, cle[:2], cle)
+
+    def get(self, cle):
+        with self._verrou:
+            if cle in self._memoire:
+                self._memoire.move_to_end(cle)
+                self.compteurs["hits_memoire"] += 1
+                return self._memoire[cle]
+        donnees = self._lire_disque(cle)
+        with self._verrou:
+            if donnees is None:
+                self.compteurs["misses"] += 1
+                return None
+            self.compteurs["hits_disque"] += 1
+            if not isinstance(donnees, str):
+                self._garder_en_memoire(cle, donnees)
+        return donnees
+
+    def put(self, cle, donnees):
+        """donnees : octets, ou chemin d'un fichier recopié dans le tier disque."""
+        if isinstance(donnees, str):
+            if self.dossier:
+                self._ecrire_disque(cle, source=donnees)
+            return
+        donnees = bytes(donnees)
+        with self._verrou:
+            self._garder_en_memoire(cle, donnees)
+        if self.dossier:
+            self._ecrire_disque(cle, donnees)
+
+    def _garder_en_memoire(self, cle, donnees):
+        if len(donnees) > min(self.max_octets_memoire, self.max_octets_entree_memoire):
+            return
+        if cle in self._memoire:
+            self._octets_memoire -= len(self._memoire.pop(cle))
+        self._memoire[cle] = donnees
+        self._octets_memoire += len(donnees)
+        while self._octets_memoire > self.max_octets_memoire:
+            _, ancien = self._memoire.popitem(last=False)
+            self._octets_memoire -= len(ancien)
+            self.compteurs["evictions_memoire"] += 1
+
+    def _lire_disque(self, cle):
+        """Octets du fichier, ou son chemin s'il est trop gros pour la mémoire."""
+        if not self.dossier:
+            return None
+        chemin = self._chemin(cle)
+        try:
+            os.utime(chemin)  # date de dernier accès pour l'éviction LRU
+            if os.path.getsize(chemin) > self.max_octets_entree_memoire:
+                # Évincé entre-temps : None, traité comme un miss
+                return epingler_fichier(cle, chemin)
+            with open(chemin, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _ecrire_disque(self, cle, donnees=None, source=None):
+        chemin = self._chemin(cle)
+        try:
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(chemin), delete=False) as tmp:
+                if source is not None:
+                    with open(source, "rb") as f:
+                        shutil.copyfileobj(f, tmp)
+                else:
+                    tmp.write(donnees)
+            os.replace(tmp.name, chemin)
+            self._evincer_disque()
+        except OSError:
+            self.compteurs["erreurs_disque"] += 1
+
+    def _evincer_disque(self):
+        """Supprime les fichiers les moins récemment utilisés au-delà de max_octets_disque."""
+        fichiers = []
+        for dossier, _, noms in os.walk(self.dossier):
+            for nom in noms:
+                chemin = os.path.join(dossier, nom)
+                try:
+                    stat = os.stat(chemin)
+                except OSError:
+                    continue
+                fichiers.append((stat.st_mtime, stat.st_size, chemin))
+        total = sum(taille for _, taille, _ in fichiers)
+        for _, taille, chemin in sorted(fichiers):
+            if total <= self.max_octets_disque:
+                break
+            try:
+                os.unlink(chemin)
+                total -= taille
+                with self._verrou:
+                    self.compteurs["evictions_disque"] += 1
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._verrou:
+            stats = dict(self.compteurs)
+            stats["entrees_memoire"] = len(self._memoire)
+            stats["octets_memoire"] = self._octets_memoire
+        hits = stats.get("hits_memoire", 0) + stats.get("hits_disque", 0)
+        demandes = hits + stats.get("misses", 0)
+        stats["taux_hits"] = hits / demandes if demandes else 0.0
+        return stats
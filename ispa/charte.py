@@ -0,0 +1,204 @@
+"""Charte graphique ISPA et options de traitement par défaut.
+
+Aucune dépendance : longueurs en EMU (entiers, comme les Length de
+python-pptx / python-docx) et couleurs en hexadécimal, converties par les
+modules de chaque format.
+"""
+
+import hashlib
+import os
+
+EMU_PAR_POUCE = 914400
+
+def cm(valeur):
+    """Longueur en EMU, comme pptx.util.Cm."""
+    return int(valeur * 360000)
+
+def pt(valeur):
+    """Taille en EMU, comme pptx.util.Pt / docx.shared.Pt."""
+    return int(valeur * 12700)
+
+# ============================================================================
+# CONFIGURATION DES STYLES ISPA
+# ============================================================================
+
+# Configuration du logo principal
+LOGO_X = cm(0.85)
+LOGO_Y = cm(0.98)
+LOGO_WIDTH = cm(2.73)
+LOGO_HEIGHT = cm(2.74)
+
+# Configuration du favicon
+FAVICON_X = cm(4.29)
+FAVICON_Y = cm(4.14)
+FAVICON_WIDTH = cm(8.62)
+FAVICON_HEIGHT = cm(4.48)
+
+# Logo et favicon réduits une fois par traitement au nombre de pixels affichés
+# dans leur cadre à LOGO_DPI (ISPA_LOGO_DPI) ; proportions et transparence
+# conservées, JPEG réencodés en LOGO_QUALITE_JPEG
+LOGO_DPI = int(os.environ.get("ISPA_LOGO_DPI", 300))
+LOGO_QUALITE_JPEG = 90
+
+# Placement du nouveau logo / favicon (PowerPoint) :
+# - "master" : une seule fois sur les slide masters (et les layouts qui masquent
+#   les formes du master), les slides en héritent ; insertion sur la slide
+#   uniquement si l'ancien logo était une forme propre à la slide.
+# - "slide" : insertion sur chaque slide (ancien comportement).
+PLACEMENT_LOGO = "master"
+PLACEMENTS_LOGO = ("master", "slide")
+
+# Application des styles PowerPoint :
+# - "runs" : police, taille et couleur écrites sur chaque paragraphe et chaque run
+# - "theme" : écrites une fois dans les styles du master (p:txStyles), le thème
+#   et les styles par défaut de la présentation ; les surcharges locales
+#   contraires sont retirées pour que le texte en hérite. Seules les formes dont
+#   le rôle (titre / corps) diffère de leur placeholder reçoivent un style propre.
+#   Les tableaux restent stylés cellule par cellule (styles de tableau).
+STYLE_PPTX = "runs"
+STYLES_PPTX = ("runs", "theme")
+
+# Moteur de traitement :
+# - "zip" : seules les parties XML concernées sont lues et réécrites, les
+#   médias sont recopiés sans décompression (voir MOTEUR ZIP)
+# - "python" : ouverture / sauvegarde complète par python-pptx / python-docx
+MOTEUR = "zip"
+MOTEURS = ("zip", "python")
+
+# Moteur zip : slides transformées en parallèle sur PROCESSUS_SLIDES processus
+# (ISPA_PROCESSUS_SLIDES), à partir de SEUIL_SLIDES_PARALLELE slides ; en
+# dessous, le démarrage des processus coûte plus qu'il ne rapporte. Défaut 1 :
+# l'interface et l'API traitent déjà plusieurs documents à la fois, un pool par
+# document y multiplierait les processus (la ligne de commande l'active avec
+# --processus-slides)
+PROCESSUS_SLIDES = int(os.environ.get("ISPA_PROCESSUS_SLIDES", 1)) or 1
+SEUIL_SLIDES_PARALLELE = 40
+
+# Moteur zip : manifeste des slides (partie customXml) écrit dans chaque
+# présentation. Au traitement suivant, aux mêmes réglages, seules les slides
+# modifiées depuis sont retraitées ; un document déjà à jour est rendu tel
+# quel (ISPA_MANIFESTE_SLIDES=0 : pas de manifeste, tout est retraité)
+MANIFESTE_SLIDES = os.environ.get("ISPA_MANIFESTE_SLIDES", "1") not in ("", "0")
+
+# Compression des parties écrites à la sauvegarde (ISPA_COMPRESSION) :
+# - "rapide" : deflate au niveau 1, pour les téléchargements de l'interface
+#   (ISPA_COMPRESSION_INTERFACE)
+# - "standard" : niveau par défaut de zlib
+# - "maximale" : niveau 9, pour l'archivage
+# - "stockage" : aucune compression
+# Quel que soit le profil, les médias déjà compressés (PNG, JPEG, vidéos...)
+# sont stockés tels quels. Les parties sont compressées en parallèle sur
+# THREADS_COMPRESSION threads (ISPA_THREADS_COMPRESSION), l'archive restant
+# identique à une compression séquentielle.
+COMPRESSION = os.environ.get("ISPA_COMPRESSION", "standard")
+COMPRESSION_INTERFACE = os.environ.get("ISPA_COMPRESSION_INTERFACE", "rapide")
+COMPRESSIONS = ("rapide", "standard", "maximale", "stockage")
+THREADS_COMPRESSION = (int(os.environ.get("ISPA_THREADS_COMPRESSION", 0))
+                       or min(4, os.cpu_count() or 1))
+
+# Optimisation des images du document (facultative, ISPA_OPTIMISER_MEDIAS=1) :
+# images fusionnées si identiques, images inutilisées retirées, photos réduites
+# à MEDIAS_DPI pour leur plus grand affichage lorsqu'elles le dépassent de plus
+# de MEDIAS_MARGE fois, puis réencodées (JPEG en MEDIAS_QUALITE_JPEG)
+OPTIMISER_MEDIAS = os.environ.get("ISPA_OPTIMISER_MEDIAS", "") not in ("", "0")
+MEDIAS_DPI = int(os.environ.get("ISPA_MEDIAS_DPI", 220))
+MEDIAS_MARGE = 1.5
+MEDIAS_QUALITE_JPEG = 85
+
+# ---------------------------------------------------------------------------
+# STYLES DE TEXTE (POWERPOINT)
+# ---------------------------------------------------------------------------
+
+TITRE_POLICE = "Lexend Bold"
+TITRE_TAILLE = pt(40)  # Changé de 42 à 40 selon vos specs
+TITRE_COULEUR = "6F9CEB"  # Bleu
+
+CORPS_POLICE = "Lexend Regular"
+CORPS_TAILLE = pt(22)
+CORPS_COULEUR = "000000"  # Noir
+
+# À partir du 2ème niveau (bullets)
+BULLET_POLICE = "Lexend Light"
+BULLET_TAILLE = pt(18)
+BULLET_COULEUR = "000000"  # Noir
+
+# ---------------------------------------------------------------------------
+# SEUILS DE DÉTECTION LOGO
+# ---------------------------------------------------------------------------
+
+MAX_LEFT_LOGO = cm(2)
+MAX_TOP_LOGO = cm(2)
+MIN_RIGHT_FAVICON = cm(43)
+MAX_RIGHT_FAVICON = cm(46)
+MIN_TOP_FAVICON = cm(3)
+MAX_TOP_FAVICON = cm(5)
+
+# Doubles dimensions pour détection
+DOUBLE_LOGO_WIDTH = 2 * LOGO_WIDTH
+DOUBLE_LOGO_HEIGHT = 2 * LOGO_HEIGHT
+DOUBLE_FAVICON_WIDTH = 2 * FAVICON_WIDTH
+DOUBLE_FAVICON_HEIGHT = 2 * FAVICON_HEIGHT
+
+# Détection des anciens logo / favicon (PowerPoint) :
+# - "empreintes" : les images des masters et layouts placées dans les coins
+#   ci-dessus (groupes compris) sont indexées par empreinte SHA-256, avec
+#   EMPREINTES_ANCIENS_LOGOS ; toute image du paquet qui pointe vers une image
+#   indexée est retirée, sur les masters, les layouts et les slides, groupes
+#   compris. Une petite image propre à une slide n'est plus prise pour un logo,
+#   sauf si aucun ancien logo n'a été trouvé sur les masters et layouts (ni
+#   fourni) : la détection "position" s'applique alors aux slides.
+# - "position" : images de premier niveau placées dans un coin, sur les
+#   masters et les slides (ancien comportement).
+DETECTION_LOGOS = os.environ.get("ISPA_DETECTION_LOGOS", "empreintes")
+DETECTIONS_LOGOS = ("empreintes", "position")
+
+# Empreintes SHA-256 (hexadécimal) d'anciens logos / favicons connus, retirés
+# où qu'ils soient : ISPA_EMPREINTES_LOGO, ISPA_EMPREINTES_FAVICON (séparées
+# par des virgules)
+EMPREINTES_ANCIENS_LOGOS = {
+    empreinte.strip().lower(): nom
+    for nom in ("logo", "favicon")
+    for empreinte in os.environ.get(f"ISPA_EMPREINTES_{nom.upper()}", "").split(",")
+    if empreinte.strip()
+}
+
+# ========== STYLES WORD SPÉCIFIQUES ==========
+
+WORD_TITLE_STYLE_NAMES = ["Title", "Titre 1", "Heading 1"]
+WORD_SUBTIT_STYLE_NAMES = ["Subtitle", "Titre 2", "Heading 2"]
+
+WORD_TITRE_POLICE = "Lexend Bold"
+WORD_TITRE_TAILLE = pt(28)
+WORD_TITRE_COULEUR = "6F9CEB"
+
+WORD_SOUS_TITRE_POLICE = "Lexend Light"
+WORD_SOUS_TITRE_TAILLE = pt(14)
+
+WORD_TEXTE_POLICE = "Lexend Regular"
+WORD_TEXTE_TAILLE = pt(11)
+
+# Application des styles Word :
+# - "runs" : police, taille et couleur écrites sur chaque run
+# - "styles" : écrites une fois dans les définitions de styles (titres,
+#   sous-titres, style par défaut) et les valeurs par défaut du document
+#   (styles.xml) ; les runs ne perdent que leurs surcharges contraires. Seuls
+#   le titre par défaut et les puces saisies "- " / "* " reçoivent un style propre.
+STYLE_WORD = "runs"
+STYLES_WORD = ("runs", "styles")
+
+# ---------------------------------------------------------------------------
+# VERSION DE LA CHARTE
+# ---------------------------------------------------------------------------
+
+# Constantes qui changent le résultat : géométrie des logos, seuils et mode
+# de détection, empreintes d'anciens logos et styles de texte
+PREFIXES_CHARTE = ("LOGO_", "FAVICON_", "MAX_", "MIN_", "DOUBLE_", "DETECTION_", "EMPREINTES_",
+                   "TITRE_", "CORPS_", "BULLET_", "WORD_")
+
+def version_charte():
+    """Empreinte des constantes de la charte ; change dès qu'un style est modifié."""
+    empreinte = hashlib.sha256()
+    for nom in sorted(globals()):
+        if nom.startswith(PREFIXES_CHARTE) and nom.isupper():
+            empreinte.update(f"{nom}={globals()[nom]!r};".encode())
+    return empreinte.hexdigest()[:16]
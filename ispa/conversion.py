@@ -0,0 +1,16 @@
+"""Choix de la fonction de conversion ; la bibliothèque du format n'est importée qu'ici."""
+
+from .charte import MOTEUR
+
+def convertisseur(est_pptx, moteur=MOTEUR):
+    """convertir_pptx(_zip) ou convertir_docx(_zip), selon le format et le moteur.
+
+    python-pptx et python-docx ne sont chargés qu'au premier document de leur
+    format : un processus qui ne traite que des présentations n'importe jamais
+    python-docx, et inversement.
+    """
+    if est_pptx:
+        from . import powerpoint
+        return powerpoint.convertir_pptx_zip if moteur == "zip" else powerpoint.convertir_pptx
+    from . import word
+    return word.convertir_docx_zip if moteur == "zip" else word.convertir_docx
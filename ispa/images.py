@@ -0,0 +1,154 @@
+"""Logo et favicon préparés une fois par traitement ; réduction d'images (Pillow)."""
+
+import hashlib
+import io
+import math
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image as ImagePIL
+
+from .charte import (EMU_PAR_POUCE, FAVICON_HEIGHT, FAVICON_WIDTH, LOGO_DPI, LOGO_HEIGHT,
+                     LOGO_QUALITE_JPEG, LOGO_WIDTH)
+
+MAX_IMAGES_PREPAREES = 32
+_images_preparees = OrderedDict()
+_verrou_images_preparees = threading.Lock()
+
+def pixels_cible(longueur, dpi=LOGO_DPI):
+    """Pixels nécessaires pour afficher `longueur` (EMU) à `dpi`."""
+    return max(1, math.ceil(longueur / EMU_PAR_POUCE * dpi))
+
+def preparer_image(octets, largeur, hauteur, dpi=LOGO_DPI):
+    """Image réduite au nombre de pixels affichés dans le cadre largeur × hauteur à `dpi`.
+
+    Les proportions sont conservées (aucune dimension ne descend sous celle du
+    cadre), la transparence aussi (PNG). L'image d'origine est gardée si elle
+    est déjà assez petite ou si Pillow ne sait pas la lire.
+    """
+    return reduire_image(octets, pixels_cible(largeur, dpi), pixels_cible(hauteur, dpi),
+                         LOGO_QUALITE_JPEG)
+
+def reduire_image(octets, cible_x, cible_y, qualite_jpeg, marge=1.0):
+    """Image réduite à au moins cible_x × cible_y pixels, proportions conservées.
+
+    Rien n'est fait tant que l'image ne dépasse pas la cible de plus de `marge`
+    fois. Un JPEG reste un JPEG (profil ICC et EXIF conservés), le reste devient
+    PNG (transparence conservée). L'image d'origine est gardée si le résultat
+    n'est pas plus léger, si elle est animée ou si Pillow ne sait pas la lire.
+    """
+    try:
+        image = ImagePIL.open(io.BytesIO(octets))
+        if getattr(image, "n_frames", 1) > 1:
+            return octets
+        if image.getexif().get(0x0112, 1) > 4:
+            # Orientation EXIF tournée d'un quart de tour : largeur et hauteur
+            # affichées sont inversées, la plus grande cible vaut pour les deux
+            cible_x = cible_y = max(cible_x, cible_y)
+        facteur = max(cible_x / image.width, cible_y / image.height)
+        if facteur * marge >= 1:
+            return octets
+        if image.format == "JPEG":
+            # Décodage directement à l'échelle 1/2, 1/4 ou 1/8 la plus proche
+            image.draft(image.mode, (image.width * facteur, image.height * facteur))
+            facteur = max(cible_x / image.width, cible_y / image.height)
+
+        jpeg = image.format == "JPEG" and image.mode in ("RGB", "L", "CMYK")
+        infos = image.info
+        if not jpeg and image.mode not in ("RGB", "RGBA", "L", "LA"):
+            # Palette, 16 bits... : convertis pour un rééchantillonnage de qualité
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        taille = (max(1, round(image.width * facteur)), max(1, round(image.height * facteur)))
+        image = image.resize(taille, ImagePIL.LANCZOS, reducing_gap=3.0)
+
+        sortie = io.BytesIO()
+        if jpeg:
+            image.save(sortie, "JPEG", quality=qualite_jpeg, optimize=True,
+                       icc_profile=infos.get("icc_profile"), exif=infos.get("exif", b""))
+        else:
+            image.save(sortie, "PNG", optimize=True, icc_profile=infos.get("icc_profile"))
+    except Exception:
+        return octets
+    return min(sortie.getvalue(), octets, key=len)
+
+def image_preparee(octets, largeur, hauteur, dpi=LOGO_DPI):
+    """preparer_image mis en cache par empreinte : un même logo n'est préparé qu'une fois."""
+    cle = (hashlib.sha256(octets).hexdigest(), int(largeur), int(hauteur), dpi)
+    with _verrou_images_preparees:
+        if cle in _images_preparees:
+            _images_preparees.move_to_end(cle)
+            return _images_preparees[cle]
+    resultat = preparer_image(octets, largeur, hauteur, dpi)
+    with _verrou_images_preparees:
+        _images_preparees[cle] = resultat
+        while len(_images_preparees) > MAX_IMAGES_PREPAREES:
+            _images_preparees.popitem(last=False)
+    return resultat
+
+class ImagesDuTraitement:
+    """Logo et favicon lus et préparés une seule fois par traitement.
+
+    Les octets sont lus et réduits au démarrage (voir image_preparee) ; la
+    partie image est créée (ou retrouvée par son empreinte) une seule fois
+    dans le paquet, puis simplement reliée à chaque slide / layout / master
+    qui l'affiche. `empreintes` (SHA-256 → "logo" / "favicon") et
+    reconnaitre() retrouvent ces images dans un document traité auparavant.
+    `noms` : nom du fichier de chaque image (voir nom_image), repris dans la
+    description des images insérées.
+    """
+
+    def __init__(self, logo_path, favicon_path=None):
+        self.octets = {"logo": image_preparee(lire_image(logo_path), LOGO_WIDTH, LOGO_HEIGHT)}
+        self.noms = {"logo": nom_image(logo_path)}
+        if favicon_path:
+            self.octets["favicon"] = image_preparee(lire_image(favicon_path),
+                                                    FAVICON_WIDTH, FAVICON_HEIGHT)
+            self.noms["favicon"] = nom_image(favicon_path)
+        self.empreintes = {hashlib.sha256(octets).hexdigest(): nom
+                           for nom, octets in self.octets.items()}
+        self._tailles = {len(octets) for octets in self.octets.values()}
+        self._parties = {}
+        self._reconnues = {}  # partie image → "logo", "favicon" ou None
+
+    def __contains__(self, nom):
+        return nom in self.octets
+
+    def flux(self, nom):
+        return io.BytesIO(self.octets[nom])
+
+    def reconnaitre(self, partie):
+        """"logo" / "favicon" si une partie image du document est déjà l'image du traitement.
+
+        Seules les images de même taille sont lues et hachées, une fois chacune.
+        """
+        if partie not in self._reconnues:
+            try:
+                taille = partie.taille if hasattr(partie, "taille") else len(partie.blob)
+                self._reconnues[partie] = (
+                    self.empreintes.get(hashlib.sha256(partie.blob).hexdigest())
+                    if taille in self._tailles else None)
+            except KeyError:
+                self._reconnues[partie] = None  # Relation vers un membre absent du paquet
+        return self._reconnues[partie]
+
+    def partie(self, package, nom):
+        if nom not in self._parties:
+            self._parties[nom] = package.get_or_add_image_part(self.flux(nom))
+        return self._parties[nom]
+
+def lire_image(image):
+    """Octets d'une image passée par chemin ou par flux."""
+    if hasattr(image, "read"):
+        image.seek(0)
+        return image.read()
+    with open(image, "rb") as f:
+        return f.read()
+
+def nom_image(image):
+    """Nom du fichier d'une image passée par chemin ou par flux nommé (attribut `name`,
+    fichier téléversé) ; None pour un flux anonyme."""
+    nom = getattr(image, "name", None) if hasattr(image, "read") else image
+    if not isinstance(nom, (str, os.PathLike)):
+        return None
+    return os.path.basename(os.fspath(nom)) or None
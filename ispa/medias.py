@@ -0,0 +1,277 @@
+"""Optimisation facultative des images d'un paquet enregistré, et écriture de la sortie."""
+
+import hashlib
+import math
+import os
+import posixpath
+import zipfile
+
+from lxml import etree
+
+from .charte import COMPRESSION, EMU_PAR_POUCE, MEDIAS_DPI, MEDIAS_MARGE, MEDIAS_QUALITE_JPEG
+from .images import reduire_image
+from .paquet import (NS_CONTENT_TYPES, RT_OFFICE_DOCUMENT, EcrivainZip, PaquetZip, chemin_rels,
+                     lire_membre_brut, serialiser)
+from .ressources import tampon_sortie
+
+# ============================================================================
+# OPTIMISATION DES MÉDIAS
+# ============================================================================
+#
+# Étape facultative, appliquée au paquet déjà enregistré (les deux moteurs en
+# profitent) et réécrite au niveau du zip comme dans le moteur zip :
+# 1. les images de contenu identique sont fusionnées (relations redirigées) ;
+# 2. les images qui ne sont plus la cible d'aucune relation sont retirées ;
+# 3. la taille affichée de chaque image est lue dans les parties XML
+#    (a:xfrm / wp:extent, recadrage a:srcRect, mise à l'échelle des groupes) ;
+#    une image utilisée à plusieurs tailles est calibrée pour la plus grande.
+#    Une image dont un seul usage n'a pas de taille connue (VML, mosaïque,
+#    SmartArt...) n'est pas réduite.
+
+NS_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+NS_P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+NS_WP = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+TYPES_IMAGES_REDUCTIBLES = ("image/jpeg", "image/png")
+SIGNATURES_IMAGES = {"image/jpeg": b"\xff\xd8", "image/png": b"\x89PNG"}
+
+def types_de_contenu(types):
+    """Fonction nom de membre → type de contenu, d'après [Content_Types].xml."""
+    defaults = {d.get("Extension", "").lower(): d.get("ContentType")
+                for d in types.iter(f"{{{NS_CONTENT_TYPES}}}Default")}
+    overrides = {o.get("PartName", "").lstrip("/"): o.get("ContentType")
+                 for o in types.iter(f"{{{NS_CONTENT_TYPES}}}Override")}
+
+    def type_de(nom):
+        if nom in overrides:
+            return overrides[nom]
+        return defaults.get(posixpath.splitext(nom)[1][1:].lower(), "")
+    return type_de
+
+def source_rels(nom_rels):
+    """Partie dont `nom_rels` porte les relations (inverse de chemin_rels)."""
+    dossier = posixpath.dirname(posixpath.dirname(nom_rels))
+    return posixpath.join(dossier, posixpath.basename(nom_rels)[:-len(".rels")])
+
+def taille_affichee(blip, taille_page):
+    """(cx, cy) en EMU de l'image entière telle qu'affichée par `blip`, ou None.
+
+    Le recadrage (a:srcRect) agrandit l'image entière d'autant ; les groupes
+    (a:chExt) appliquent leur échelle. None pour une mosaïque ou une taille
+    introuvable (placeholder sans a:xfrm propre...).
+    """
+    remplissage = blip.getparent()
+    if remplissage is None or remplissage.find(f"{{{NS_A}}}tile") is not None:
+        return None
+    forme = remplissage.getparent()
+    if forme is None:
+        return None
+    etendue = None
+    if forme.tag == f"{{{NS_P}}}bgPr":
+        etendue = taille_page
+    else:
+        if forme.tag.endswith("}spPr"):
+            forme = forme.getparent()  # Remplissage image d'une forme
+        ext = forme.find(f"./*/{{{NS_A}}}xfrm/{{{NS_A}}}ext")
+        if ext is not None:
+            etendue = (int(ext.get("cx", 0)), int(ext.get("cy", 0)))
+
+    echelle_x = echelle_y = 1.0
+    for ancetre in forme.iterancestors():
+        if etendue is None and ancetre.tag in (f"{{{NS_WP}}}inline", f"{{{NS_WP}}}anchor"):
+            ext = ancetre.find(f"{{{NS_WP}}}extent")
+            if ext is not None:
+                etendue = (int(ext.get("cx", 0)), int(ext.get("cy", 0)))
+        ext = ancetre.find(f"./*/{{{NS_A}}}xfrm/{{{NS_A}}}ext")
+        ch_ext = ancetre.find(f"./*/{{{NS_A}}}xfrm/{{{NS_A}}}chExt")
+        if ext is not None and ch_ext is not None:
+            cx, cy = int(ext.get("cx", 0)), int(ext.get("cy", 0))
+            ch_cx, ch_cy = int(ch_ext.get("cx", 0)), int(ch_ext.get("cy", 0))
+            if cx and cy and ch_cx and ch_cy:
+                echelle_x *= cx / ch_cx
+                echelle_y *= cy / ch_cy
+    if not etendue or not all(etendue):
+        return None
+
+    visible_x = visible_y = 1.0
+    recadrage = remplissage.find(f"{{{NS_A}}}srcRect")
+    if recadrage is not None:
+        visible_x = 1 - (int(recadrage.get("l", 0)) + int(recadrage.get("r", 0))) / 100000
+        visible_y = 1 - (int(recadrage.get("t", 0)) + int(recadrage.get("b", 0))) / 100000
+    return (etendue[0] * echelle_x / max(visible_x, 0.01),
+            etendue[1] * echelle_y / max(visible_y, 0.01))
+
+def optimiser_medias(entree, sortie, dpi=MEDIAS_DPI, compression=COMPRESSION,
+                     progression=None):
+    """Réécrit le paquet `entree` dans `sortie` avec des images optimisées.
+
+    Retourne le rapport : tailles avant / après, octets économisés, nombre
+    d'images réduites, de doublons fusionnés et d'images retirées, et
+    "modifie" (False : parties recopiées telles quelles). Le temps
+    de compression est rapporté à `progression` (voir EcrivainZip.rapporter).
+    """
+    entree.seek(0, os.SEEK_END)
+    octets_avant = entree.tell()
+    entree.seek(0)
+    debut_sortie = sortie.tell()
+    archive = zipfile.ZipFile(entree)
+    infos = {info.filename: info for info in archive.infolist()}
+    types = etree.fromstring(archive.read("[Content_Types].xml"))
+    type_de = types_de_contenu(types)
+    images = {nom for nom in infos if type_de(nom).startswith("image/")}
+
+    # Relations internes de chaque partie
+    rels = {}
+    liens = []  # (relation, partie source, membre cible)
+    for nom in infos:
+        if nom.endswith(".rels"):
+            rels[nom] = etree.fromstring(archive.read(nom))
+            source = source_rels(nom)
+            for rel in rels[nom]:
+                if rel.get("TargetMode") != "External":
+                    liens.append((rel, source, PaquetZip._resoudre(source, rel.get("Target"))))
+
+    # 1. Doublons : même taille et même CRC, puis contenu comparé
+    canonique = {}
+    candidats = {}
+    for nom in sorted(images):
+        info = infos[nom]
+        candidats.setdefault((info.file_size, info.CRC, type_de(nom)), []).append(nom)
+    for noms in candidats.values():
+        premiers = {}
+        for nom in noms:
+            empreinte = hashlib.sha256(archive.read(nom)).digest() if len(noms) > 1 else None
+            canonique[nom] = premiers.setdefault(empreinte, nom)
+    doublons = {nom for nom, canon in canonique.items() if nom != canon}
+    rels_modifies = set()
+    for rel, source, cible in liens:
+        if cible in doublons:
+            rel.set("Target", posixpath.relpath(canonique[cible],
+                                                posixpath.dirname(source) or "."))
+            rels_modifies.add(chemin_rels(source))
+
+    # 2. Plus grande taille affichée de chaque image (None : inconnue), en
+    #    parcourant les parties qui ont des relations image
+    taille_page = None
+    for rel, source, cible in liens:
+        if source == "" and rel.get("Type") == RT_OFFICE_DOCUMENT and cible.startswith("ppt/"):
+            sld_sz = etree.fromstring(archive.read(cible)).find(f"{{{NS_P}}}sldSz")
+            if sld_sz is not None:
+                taille_page = (int(sld_sz.get("cx")), int(sld_sz.get("cy")))
+    par_source = {}
+    for rel, source, cible in liens:
+        if cible in images:
+            par_source.setdefault(source, {})[rel.get("Id")] = canonique[cible]
+    usages = {}
+    inutilisees = []  # Relations image qu'aucun élément XML n'emploie (ancien logo remplacé...)
+    for source, rIds in par_source.items():
+        try:
+            racine = etree.fromstring(archive.read(source))
+        except (KeyError, etree.XMLSyntaxError):
+            for nom in rIds.values():
+                usages[nom] = None
+            continue
+        employes = set()
+        for element in racine.iter():
+            for attribut, rId in element.attrib.items():
+                if rId not in rIds:
+                    continue
+                employes.add(rId)
+                if not attribut.startswith(f"{{{NS_R}}}"):
+                    continue
+                nom = rIds[rId]
+                taille = (taille_affichee(element, taille_page)
+                          if element.tag == f"{{{NS_A}}}blip" else None)
+                if taille is None or usages.get(nom, ()) is None:
+                    usages[nom] = None
+                else:
+                    precedente = usages.get(nom, (0, 0))
+                    usages[nom] = (max(precedente[0], taille[0]), max(precedente[1], taille[1]))
+        inutilisees.extend((source, rId) for rId in rIds if rId not in employes)
+    for source, rId in inutilisees:
+        nom_rels = chemin_rels(source)
+        for rel in rels[nom_rels]:
+            if rel.get("Id") == rId:
+                rels[nom_rels].remove(rel)
+                rels_modifies.add(nom_rels)
+
+    # 3. Images qui ne sont plus la cible d'aucune relation
+    referencees = {canonique.get(cible, cible) for rel, _, cible in liens
+                   if rel.getparent() is not None}
+    retirees = images - referencees
+    for override in list(types.iter(f"{{{NS_CONTENT_TYPES}}}Override")):
+        if override.get("PartName", "").lstrip("/") in retirees:
+            types.remove(override)
+
+    # 4. Réduction à la plus grande taille affichée
+    reduites = {}
+    for nom, taille in usages.items():
+        type_contenu = type_de(nom)
+        if taille is None or nom in retirees or type_contenu not in TYPES_IMAGES_REDUCTIBLES:
+            continue
+        octets = archive.read(nom)
+        cible_x = max(1, math.ceil(taille[0] / EMU_PAR_POUCE * dpi))
+        cible_y = max(1, math.ceil(taille[1] / EMU_PAR_POUCE * dpi))
+        resultat = reduire_image(octets, cible_x, cible_y, MEDIAS_QUALITE_JPEG, MEDIAS_MARGE)
+        # Le nom de la partie fixe son format : un JPEG devenu PNG est écarté
+        if resultat is not octets and resultat.startswith(SIGNATURES_IMAGES[type_contenu]):
+            reduites[nom] = resultat
+
+    # Réécriture : membres inchangés recopiés bruts
+    ecrivain = EcrivainZip(sortie, compression)
+    for nom, info in infos.items():
+        if nom in retirees:
+            continue
+        if nom in reduites:
+            ecrivain.ecrire(nom, reduites[nom], info.date_time)
+        elif nom in rels_modifies:
+            ecrivain.ecrire(nom, serialiser(rels[nom]), info.date_time)
+        elif nom == "[Content_Types].xml" and retirees:
+            ecrivain.ecrire(nom, serialiser(types), info.date_time)
+        else:
+            ecrivain.copier_brut(info, lire_membre_brut(entree, info))
+    ecrivain.fermer()
+    if progression is not None:
+        ecrivain.rapporter(progression)
+
+    octets_apres = sortie.tell() - debut_sortie
+    return {"octets_avant": octets_avant, "octets_apres": octets_apres,
+            "octets_economises": octets_avant - octets_apres,
+            "images_reduites": len(reduites), "doublons_fusionnes": len(doublons),
+            "images_retirees": len(retirees - doublons),
+            "modifie": bool(reduites or rels_modifies or retirees)}
+
+def enregistrer_sortie(enregistrer, sortie, medias, progression, compression=COMPRESSION):
+    """Appelle enregistrer(flux, compression) vers `sortie` (défaut : tampon_sortie()),
+    repositionnée au début.
+
+    enregistrer retourne l'EcrivainZip utilisé (None pour un paquet recopié
+    tel quel) : le temps de compression est rapporté à part, en phase
+    "compression". Avec `medias`, le paquet passe par optimiser_medias ; le
+    rapport est transmis à la progression (événement "medias"). Un paquet
+    recopié tel quel, sans image modifiée, est signalé par l'événement
+    "document_inchange".
+    """
+    output = sortie if sortie is not None else tampon_sortie()
+    if medias:
+        with tampon_sortie() as brut:
+            with progression.phase("sauvegarde"):
+                ecrivain = enregistrer(brut, compression)
+                if ecrivain is not None:
+                    ecrivain.rapporter(progression)
+            progression.etape("Optimisation des images...")
+            with progression.phase("optimisation_medias"):
+                rapport = optimiser_medias(brut, output, compression=compression,
+                                           progression=progression)
+            progression.evenement("medias", rapport)
+        inchange = ecrivain is None and not rapport["modifie"]
+    else:
+        with progression.phase("sauvegarde"):
+            ecrivain = enregistrer(output, compression)
+            if ecrivain is not None:
+                ecrivain.rapporter(progression)
+        inchange = ecrivain is None
+    if inchange:
+        progression.evenement("document_inchange")
+    output.seek(0)
+    return output
@@ -0,0 +1,636 @@
+"""Moteur zip : paquet OOXML lu et réécrit membre par membre, sans python-pptx ni python-docx.
+
+Les bibliothèques du format ne sont importées qu'à l'usage (analyse d'une
+partie, proxys, images) : ce module se charge sans elles.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import shutil
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from lxml import etree
+
+from .charte import COMPRESSION, THREADS_COMPRESSION
+from .images import lire_image
+
+# ============================================================================
+# MOTEUR ZIP (PASSE-PLAT OOXML)
+# ============================================================================
+#
+# Le paquet est lu directement avec zipfile : seules les parties XML touchées
+# par la charte (présentation, masters, layouts, slides / document, en-têtes,
+# styles) sont analysées. Tous les autres membres (vidéos, images, polices...)
+# sont recopiés tels quels, sans décompression ni recompression.
+#
+# Les proxys python-pptx / python-docx (Slide, SlideMaster, Document...) sont
+# construits au-dessus de ces parties : brander_presentation et
+# brander_document s'exécutent à l'identique et produisent le même XML que le
+# moteur "python".
+
+NS_RELATIONS = "http://schemas.openxmlformats.org/package/2006/relationships"
+NS_CONTENT_TYPES = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+# Types de relations utilisés par le moteur (mêmes valeurs que
+# RELATIONSHIP_TYPE de python-pptx / python-docx, sans importer ces derniers)
+_RT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+RT_CUSTOM_XML = _RT + "customXml"
+RT_IMAGE = _RT + "image"
+RT_OFFICE_DOCUMENT = _RT + "officeDocument"
+RT_SLIDE_LAYOUT = _RT + "slideLayout"
+RT_SLIDE_MASTER = _RT + "slideMaster"
+RT_STYLES = _RT + "styles"
+
+# Noms de parties numérotées, comme PackURI._filename_re de chaque bibliothèque
+_NUMEROS_PARTIES = {"pptx": re.compile(r"([a-zA-Z]+)([0-9][0-9]*)?"),
+                    "docx": re.compile(r"([a-zA-Z]+)([1-9][0-9]*)?")}
+
+def numero_partie(nom, format_fichier):
+    """Numéro d'une partie ("ppt/media/image12.png" → 12), comme PackURI.idx ; None sinon."""
+    base = posixpath.splitext(posixpath.basename(nom))[0]
+    trouve = _NUMEROS_PARTIES[format_fichier].match(base)
+    if trouve is None or not trouve.group(2):
+        return None
+    return int(trouve.group(2))
+
+def serialiser(element):
+    return etree.tostring(element, encoding="UTF-8", standalone=True)
+
+def chemin_rels(nom_partie):
+    """Nom du membre .rels d'une partie ("" pour les relations du paquet)."""
+    dossier, nom = posixpath.split(nom_partie)
+    return posixpath.join(dossier, "_rels", f"{nom}.rels")
+
+def lire_membre_brut(fp, info):
+    """Octets compressés d'un membre, lus sans décompression."""
+    fp.seek(info.header_offset)
+    entete = fp.read(30)
+    if entete[:4] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"En-tête local invalide : {info.filename}")
+    longueur_nom, longueur_extra = struct.unpack("<HH", entete[26:30])
+    fp.seek(info.header_offset + 30 + longueur_nom + longueur_extra)
+    return fp.read(info.compress_size)
+
+# Niveau zlib de chaque profil de compression (voir COMPRESSION), None : stockage
+NIVEAUX_COMPRESSION = {"rapide": 1, "standard": zlib.Z_DEFAULT_COMPRESSION, "maximale": 9,
+                       "stockage": None}
+# Médias déjà compressés : deflate n'y gagne presque rien, ils sont stockés
+EXTENSIONS_COMPRESSEES = (".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff", ".wdp", ".mp3",
+                          ".m4a", ".mp4", ".m4v", ".mov", ".wmv", ".avi", ".wma", ".zip")
+# En dessous, une partie est compressée sur place : le passage par un thread coûterait plus
+SEUIL_COMPRESSION_THREAD = 64 * 1024
+# Octets gardés en mémoire au plus en attendant la compression des membres précédents
+ATTENTE_MAX_OCTETS = 64 * 1024 * 1024
+
+_POOL_COMPRESSION = (None, None)  # (pid, pool) : un pool par processus, créé à la demande
+_VERROU_POOL = threading.Lock()
+
+def pool_compression():
+    """Threads de compression partagés par tous les EcrivainZip du processus."""
+    global _POOL_COMPRESSION
+    with _VERROU_POOL:
+        pid, pool = _POOL_COMPRESSION
+        if pid != os.getpid():
+            pool = ThreadPoolExecutor(max_workers=THREADS_COMPRESSION,
+                                      thread_name_prefix="ispa-compression")
+            _POOL_COMPRESSION = (os.getpid(), pool)
+        return pool
+
+def compresser(donnees, niveau):
+    """(CRC, octets deflate bruts, secondes) ; zlib relâche le GIL pendant le calcul."""
+    debut = time.perf_counter()
+    compresseur = zlib.compressobj(niveau, zlib.DEFLATED, -15)
+    comprime = compresseur.compress(donnees) + compresseur.flush()
+    return zlib.crc32(donnees), comprime, time.perf_counter() - debut
+
+class EcrivainZip:
+    """Écrit une archive zip en mêlant membres recopiés bruts et membres compressés.
+
+    Les membres passés à ecrire() sont compressés au profil `compression`
+    (voir NIVEAUX_COMPRESSION), en parallèle sur les threads de
+    pool_compression() au-delà de SEUIL_COMPRESSION_THREAD, puis écrits dans
+    l'ordre des appels : l'archive est identique à une compression
+    séquentielle ; `parallele` à False, tout est compressé sur place.
+    duree_compression cumule le temps de compression de tous les threads,
+    voir rapporter().
+
+    Pas de zip64 : les paquets OOXML traités restent loin des 4 Go.
+    """
+
+    def __init__(self, fp, compression=COMPRESSION, parallele=THREADS_COMPRESSION > 1):
+        self.fp = fp
+        self.niveau = NIVEAUX_COMPRESSION[compression]
+        self.parallele = parallele
+        self.entrees = []
+        self.duree_compression = 0.0
+        self.compressees = 0
+        # Membres pas encore écrits, dans l'ordre : (nom, méthode, date, taille, résultat,
+        # octets gardés) ; résultat : Future de compresser() ou déjà (CRC, octets, secondes)
+        self._attente = deque()
+        self._octets_en_attente = 0
+
+    def copier_brut(self, info, comprime):
+        self._ajouter(info.filename, info.compress_type, info.date_time, info.file_size,
+                      (info.CRC, comprime, 0.0), len(comprime))
+
+    def ecrire(self, nom, donnees, date_time=None):
+        date_time = date_time or time.localtime()[:6]
+        if self.niveau is None or nom.lower().endswith(EXTENSIONS_COMPRESSEES):
+            self._ajouter(nom, zipfile.ZIP_STORED, date_time, len(donnees),
+                          (zlib.crc32(donnees), donnees, 0.0), len(donnees))
+            return
+        self.compressees += 1
+        if self.parallele and len(donnees) >= SEUIL_COMPRESSION_THREAD:
+            resultat = pool_compression().submit(compresser, donnees, self.niveau)
+        else:
+            resultat = compresser(donnees, self.niveau)
+        self._ajouter(nom, zipfile.ZIP_DEFLATED, date_time, len(donnees), resultat, len(donnees))
+
+    def rapporter(self, progression):
+        """Temps de compression (phase "compression") et parties compressées."""
+        progression.duree_phase("compression", self.duree_compression)
+        progression.compter("parties_compressees", self.compressees)
+
+    def _ajouter(self, nom, methode, date_time, taille, resultat, octets):
+        self._attente.append((nom, methode, date_time, taille, resultat, octets))
+        self._octets_en_attente += octets
+        self._vider(bloquer=False)
+
+    def _vider(self, bloquer):
+        """Écrit les membres prêts en tête de file ; avec `bloquer`, ou au-delà de
+        ATTENTE_MAX_OCTETS, attend la fin des compressions en cours."""
+        while self._attente:
+            nom, methode, date_time, taille, resultat, octets = self._attente[0]
+            if isinstance(resultat, Future):
+                if not (bloquer or self._octets_en_attente > ATTENTE_MAX_OCTETS
+                        or resultat.done()):
+                    return
+                resultat = resultat.result()
+            self._attente.popleft()
+            crc, comprime, duree = resultat
+            self.duree_compression += duree
+            self._octets_en_attente -= octets
+            self._ecrire(nom, methode, date_time, crc, comprime, taille)
+
+    def _ecrire(self, nom, methode, date_time, crc, comprime, taille):
+        offset = self.fp.tell()
+        if max(offset, len(comprime), taille) >= 0xFFFFFFFF or len(self.entrees) >= 0xFFFF:
+            raise ValueError("Paquet trop volumineux pour le moteur zip (zip64)")
+        try:
+            nom_octets, flags = nom.encode("ascii"), 0
+        except UnicodeEncodeError:
+            nom_octets, flags = nom.encode("utf-8"), 0x800
+        annee, mois, jour, heure, minute, seconde = date_time
+        dosdate = (max(annee, 1980) - 1980) << 9 | mois << 5 | jour
+        dostime = heure << 11 | minute << 5 | seconde // 2
+        champs = (20, flags, methode, dostime, dosdate, crc, len(comprime), taille)
+        self.fp.write(struct.pack("<4s2H3H3L2H", b"PK\x03\x04", *champs, len(nom_octets), 0))
+        self.fp.write(nom_octets)
+        self.fp.write(comprime)
+        self.entrees.append((nom_octets, champs, offset))
+
+    def fermer(self):
+        self._vider(bloquer=True)
+        debut = self.fp.tell()
+        for nom_octets, champs, offset in self.entrees:
+            self.fp.write(struct.pack("<4sH2H3H3L5H2L", b"PK\x01\x02", 20, *champs,
+                                      len(nom_octets), 0, 0, 0, 0, 0, offset))
+            self.fp.write(nom_octets)
+        taille = self.fp.tell() - debut
+        n = len(self.entrees)
+        self.fp.write(struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, n, n, taille, debut, 0))
+
+class MembresOpc:
+    """Écrivain physique des PackageWriter de python-pptx / python-docx (moteur
+    python) : chaque membre passe par `ecrivain`, un EcrivainZip."""
+
+    def __init__(self, ecrivain):
+        self.ecrivain = ecrivain
+
+    def write(self, pack_uri, blob):
+        self.ecrivain.ecrire(pack_uri.membername, blob)
+
+class PartieZip:
+    """Partie d'un PaquetZip, utilisable comme `part` par les proxys python-pptx / python-docx.
+
+    Seules les méthodes de partie réellement appelées par brander_presentation
+    et brander_document sont fournies.
+    """
+
+    def __init__(self, paquet, nom):
+        self.paquet = paquet
+        self.nom = nom
+        self.modifiee = False
+        self._element = None
+        self._octets = None
+        self._proxys = {}
+        # Parties image : description (pptx) et Image python-docx
+        self.desc = None
+        self.image = None
+
+    @property
+    def package(self):
+        return self.paquet
+
+    @property
+    def part(self):
+        return self
+
+    @property
+    def element(self):
+        if self._element is None:
+            self._element = self.paquet.analyser(self.nom, self._octets)
+        return self._element
+
+    def remplacer(self, octets):
+        """Nouveau contenu XML déjà sérialisé (slide transformée par un processus de travail)."""
+        self.modifiee = True
+        self._octets = octets
+        self._element = None
+        self._proxys = {}
+
+    def octets(self):
+        """Contenu actuel de la partie, sans resérialiser ce qui n'a pas été analysé."""
+        if self._element is not None:
+            return serialiser(self._element)
+        if self._octets is not None:
+            return self._octets
+        return self.paquet.lire(self.nom)
+
+    @property
+    def blob(self):
+        """Octets de la partie dans le paquet (parties image), comme Part.blob."""
+        return self.paquet.lire(self.nom)
+
+    @property
+    def taille(self):
+        """Taille décompressée, lue dans le répertoire du zip sans décompresser."""
+        info = self.paquet.infos.get(self.nom)
+        return info.file_size if info is not None else len(self.blob)
+
+    def images_liees(self):
+        """rId → partie image, pour les relations image de cette partie."""
+        return {rId: self.paquet.partie(nom)
+                for rId, type_, nom in self.paquet._relations(self.nom) if type_ == RT_IMAGE}
+
+    def proxy(self, classe):
+        """Proxy python-pptx / python-docx (Slide, SlideLayout...) unique pour cette partie."""
+        if classe not in self._proxys:
+            self._proxys[classe] = classe(self.element, self)
+        return self._proxys[classe]
+
+    def related_part(self, rId):
+        return self.paquet.partie(self.paquet.cible(self.nom, rId))
+
+    def relate_to(self, cible, reltype):
+        self.modifiee = True
+        return self.paquet.relier(self.nom, cible.nom, reltype)
+
+    # --- python-pptx ---
+
+    def part_related_by(self, reltype):
+        return self.paquet.partie_liee(self.nom, reltype)
+
+    def related_slide_layout(self, rId):
+        from pptx.slide import SlideLayout
+        return self.related_part(rId).proxy(SlideLayout)
+
+    @property
+    def slide_layout(self):
+        from pptx.slide import SlideLayout
+        return self.paquet.partie_liee(self.nom, RT_SLIDE_LAYOUT).proxy(SlideLayout)
+
+    @property
+    def slide_master(self):
+        from pptx.slide import SlideMaster
+        return self.paquet.partie_liee(self.nom, RT_SLIDE_MASTER).proxy(SlideMaster)
+
+    # --- python-docx ---
+
+    def header_part(self, rId):
+        partie = self.related_part(rId)
+        partie.modifiee = True
+        return partie
+
+    footer_part = header_part
+
+    @property
+    def styles(self):
+        return self.paquet.styles_word()
+
+    @property
+    def _styles_part(self):
+        self.paquet.styles_word()
+        return self.paquet.partie_styles
+
+    def get_style(self, style_id, style_type):
+        return self.paquet.styles_word().get_by_id(style_id, style_type)
+
+    def new_pic_inline(self, image_descriptor, width=None, height=None):
+        """Même élément w:inline que StoryPart.new_pic_inline de python-docx."""
+        from docx.oxml.shape import CT_Inline
+        image_part = self.paquet.get_or_add_image_part(image_descriptor)
+        rId = self.relate_to(image_part, RT_IMAGE)
+        cx, cy = image_part.image.scaled_dimensions(width, height)
+        return CT_Inline.new_pic_inline(self.next_id, rId, image_part.image.filename, cx, cy)
+
+    @property
+    def next_id(self):
+        used_ids = [int(i) for i in self.element.xpath("//@id") if i.isdigit()]
+        return max(used_ids) + 1 if used_ids else 1
+
+class PaquetZip:
+    """Paquet OOXML (pptx / docx) lu et réécrit au niveau du zip."""
+
+    def __init__(self, fichier, format_fichier):
+        self.format = format_fichier
+        self._a_fermer = None
+        if isinstance(fichier, (str, os.PathLike)):
+            fichier = self._a_fermer = open(fichier, "rb")
+        self.fp = fichier
+        self.zip = zipfile.ZipFile(fichier)
+        self.infos = {info.filename: info for info in self.zip.infolist()}
+        self._parties = {}
+        self._rels = {}
+        self._cibles = {}
+        self._rels_modifies = set()
+        self._content_types = None
+        self._nouvelles = {}
+        self._images = None
+        self._styles = None
+        self.partie_styles = None
+        self.inchange = None  # Après enregistrer() : True si les octets d'origine ont été rendus
+
+    def fermer(self):
+        self.zip.close()
+        if self._a_fermer:
+            self._a_fermer.close()
+
+    # --- Lecture ---
+
+    def lire(self, nom):
+        if nom in self._nouvelles:
+            return self._nouvelles[nom]
+        return self.zip.read(nom)
+
+    def analyser(self, nom, donnees=None):
+        """Élément racine d'une partie XML, avec les classes oxml de la bibliothèque du format."""
+        if donnees is None:
+            donnees = self.lire(nom)
+        if self.format == "pptx":
+            from pptx.oxml import parse_xml
+        else:
+            from docx.oxml import parse_xml
+        return parse_xml(donnees)
+
+    def partie(self, nom):
+        if nom not in self._parties:
+            self._parties[nom] = PartieZip(self, nom)
+        return self._parties[nom]
+
+    def rels(self, nom_partie):
+        nom_rels = chemin_rels(nom_partie)
+        if nom_rels not in self._rels:
+            if nom_rels in self.infos:
+                self._rels[nom_rels] = etree.fromstring(self.zip.read(nom_rels))
+            else:
+                self._rels[nom_rels] = etree.Element(f"{{{NS_RELATIONS}}}Relationships",
+                                                     nsmap={None: NS_RELATIONS})
+        return self._rels[nom_rels]
+
+    def _relations(self, nom_partie):
+        for rel in self.rels(nom_partie):
+            if rel.get("TargetMode") != "External":
+                yield rel.get("Id"), rel.get("Type"), self._resoudre(nom_partie, rel.get("Target"))
+
+    @staticmethod
+    def _resoudre(nom_partie, cible):
+        if cible.startswith("/"):
+            return cible[1:]
+        return posixpath.normpath(posixpath.join(posixpath.dirname(nom_partie), cible))
+
+    def cible(self, nom_partie, rId):
+        # Index rId → partie : presentation.xml porte une relation par slide
+        if nom_partie not in self._cibles:
+            self._cibles[nom_partie] = {id_: nom for id_, _, nom in self._relations(nom_partie)}
+        if rId not in self._cibles[nom_partie]:
+            raise KeyError(f"Relation {rId} absente de {nom_partie}")
+        return self._cibles[nom_partie][rId]
+
+    def partie_liee(self, nom_partie, reltype):
+        for _, type_, nom in self._relations(nom_partie):
+            if type_ == reltype:
+                return self.partie(nom)
+        raise KeyError(f"Aucune relation {reltype} depuis {nom_partie}")
+
+    # --- Écriture ---
+
+    def relier(self, source, cible, reltype):
+        """rId de la relation source → cible, créée si besoin (mêmes rId que python-pptx)."""
+        for id_, type_, nom in self._relations(source):
+            if type_ == reltype and nom == cible:
+                return id_
+        rels = self.rels(source)
+        utilises = {rel.get("Id") for rel in rels}
+        rId = next(f"rId{n}" for n in range(len(utilises) + 1, 0, -1)
+                   if f"rId{n}" not in utilises)
+        cible_relative = posixpath.relpath(cible, posixpath.dirname(source) or ".")
+        etree.SubElement(rels, f"{{{NS_RELATIONS}}}Relationship",
+                         Id=rId, Type=reltype, Target=cible_relative)
+        self._rels_modifies.add(chemin_rels(source))
+        self._cibles.pop(source, None)
+        return rId
+
+    def content_types(self):
+        if self._content_types is None:
+            self._content_types = etree.fromstring(self.zip.read("[Content_Types].xml"))
+        return self._content_types
+
+    def ajouter_partie(self, nom, donnees, content_type):
+        """Ajoute une nouvelle partie (image...) et déclare son type de contenu."""
+        self._nouvelles[nom] = donnees
+        types = self.content_types()
+        ext = posixpath.splitext(nom)[1][1:].lower()
+        defaults = {d.get("Extension", "").lower(): d.get("ContentType")
+                    for d in types.iter(f"{{{NS_CONTENT_TYPES}}}Default")}
+        if defaults.get(ext) == content_type:
+            return self.partie(nom)
+        if ext in defaults or not content_type.startswith("image/"):
+            etree.SubElement(types, f"{{{NS_CONTENT_TYPES}}}Override",
+                             PartName=f"/{nom}", ContentType=content_type)
+        else:
+            default = etree.Element(f"{{{NS_CONTENT_TYPES}}}Default",
+                                    Extension=ext, ContentType=content_type)
+            overrides = types.findall(f"{{{NS_CONTENT_TYPES}}}Override")
+            if overrides:
+                overrides[0].addprevious(default)
+            else:
+                types.append(default)
+        return self.partie(nom)
+
+    # --- Images ---
+
+    def _parties_images(self):
+        """Cibles des relations image du paquet (comme les collections d'images des bibliothèques)."""
+        if self._images is None:
+            self._images = []
+            for nom_rels in self.infos:
+                if not nom_rels.endswith(".rels"):
+                    continue
+                dossier = posixpath.dirname(posixpath.dirname(nom_rels))
+                source = posixpath.join(dossier, posixpath.basename(nom_rels)[:-5])
+                for _, type_, nom in self._relations(source):
+                    if type_ == RT_IMAGE and nom not in self._images:
+                        self._images.append(nom)
+        return self._images
+
+    def _trouver_image(self, blob):
+        """Partie image existante de même contenu ; la CRC du zip évite de tout décompresser."""
+        crc, sha1 = zlib.crc32(blob), hashlib.sha1(blob).digest()
+        for nom in self._parties_images():
+            if nom in self._nouvelles:
+                if self._nouvelles[nom] == blob:
+                    return nom
+                continue
+            info = self.infos.get(nom)
+            if (info is not None and info.file_size == len(blob) and info.CRC == crc
+                    and hashlib.sha1(self.zip.read(nom)).digest() == sha1):
+                return nom
+        return None
+
+    def _nom_image(self, ext):
+        if self.format == "pptx":
+            # Premier numéro libre parmi /ppt/media/imageN (Package.next_image_partname)
+            numeros = sorted(idx for idx in (numero_partie(nom, "pptx")
+                                             for nom in list(self.infos) + list(self._nouvelles)
+                                             if nom.startswith("ppt/media/image"))
+                             if idx is not None)
+            n = next((i for i, idx in enumerate(numeros, start=1) if i < idx), len(numeros) + 1)
+            return f"ppt/media/image{n}.{ext}"
+        # Premier numéro libre parmi les parties image (ImageParts._next_image_partname)
+        numeros = [numero_partie(nom, "docx") for nom in self._parties_images()]
+        n = next((i for i in range(1, len(numeros) + 1) if i not in numeros), len(numeros) + 1)
+        return f"word/media/image{n}.{ext}"
+
+    def get_or_add_image_part(self, image_file):
+        blob = lire_image(image_file)
+        nom = self._trouver_image(blob)
+        if nom is not None:
+            partie = self.partie(nom)
+            ext = posixpath.splitext(nom)[1][1:]
+        else:
+            if self.format == "pptx":
+                from pptx.parts.image import Image
+            else:
+                from docx.image.image import Image
+            image = Image.from_blob(blob)
+            ext, content_type = image.ext, image.content_type
+            partie = self.ajouter_partie(self._nom_image(ext), blob, content_type)
+            self._parties_images().append(partie.nom)
+        if self.format == "pptx":
+            partie.desc = f"image.{ext}"
+        else:
+            from docx.image.image import Image
+            partie.image = Image.from_blob(blob)
+        return partie
+
+    # --- Word ---
+
+    def styles_word(self):
+        """Styles du document ; si la partie manque, python-docx l'ajoute : même chose ici."""
+        if self._styles is None:
+            from docx.opc.constants import CONTENT_TYPE as CT
+            from docx.parts.styles import StylesPart
+            from docx.styles.styles import Styles
+            document = self.partie_liee("", RT_OFFICE_DOCUMENT)
+            try:
+                self.partie_styles = self.partie_liee(document.nom, RT_STYLES)
+            except KeyError:
+                nom = "word/styles.xml"
+                self.partie_styles = self.ajouter_partie(
+                    nom, serialiser(StylesPart.default(None).element), CT.WML_STYLES)
+                self.relier(document.nom, nom, RT_STYLES)
+            self._styles = Styles(self.partie_styles.element)
+        return self._styles
+
+    # --- Sauvegarde ---
+
+    def octets_origine(self, nom):
+        """Octets du membre dans le paquet reçu (b"" s'il n'existe pas)."""
+        return self.zip.read(nom) if nom in self.infos else b""
+
+    def octets_finaux(self, nom):
+        """Octets du membre tels qu'ils seront enregistrés (b"" s'il n'existe pas).
+
+        Une partie modifiée est sérialisée ici une fois pour toutes : ses
+        proxys ne doivent plus servir, le traitement doit être terminé.
+        """
+        partie = self._parties.get(nom)
+        if partie is not None and partie.modifiee and partie._element is not None:
+            partie.remplacer(serialiser(partie._element))
+        donnees = self._donnees_modifiees(nom)
+        if donnees is not None:
+            return donnees
+        if nom in self.infos or nom in self._nouvelles:
+            return self.lire(nom)
+        return b""
+
+    def _identique(self, info, donnees):
+        """Membre réécrit à l'identique (CRC et taille d'abord, sans décompresser)."""
+        return (info.file_size == len(donnees) and info.CRC == zlib.crc32(donnees)
+                and self.zip.read(info.filename) == donnees)
+
+    def _donnees_modifiees(self, nom):
+        partie = self._parties.get(nom)
+        if partie is not None and partie.modifiee:
+            return partie.octets()
+        if nom in self._rels_modifies:
+            return serialiser(self._rels[nom])
+        if nom == "[Content_Types].xml" and self._content_types is not None:
+            return serialiser(self._content_types)
+        return None
+
+    def enregistrer(self, sortie, compression=COMPRESSION):
+        """Écrit le paquet : membres inchangés recopiés bruts, parties modifiées recompressées
+        au profil `compression` ; retourne l'EcrivainZip utilisé.
+
+        Une partie réécrite à l'identique compte comme inchangée ; si rien n'a
+        réellement changé (document déjà traité), les octets d'origine sont
+        rendus tels quels (retourne None). Les nouveaux membres reprennent la
+        date de [Content_Types].xml : deux traitements du même fichier
+        produisent la même archive.
+        """
+        modifies = {}
+        for info in self.zip.infolist():
+            donnees = self._donnees_modifiees(info.filename)
+            if donnees is not None and not self._identique(info, donnees):
+                modifies[info.filename] = donnees
+        nouveaux_rels = sorted(nom for nom in self._rels_modifies if nom not in self.infos)
+        self.inchange = not (modifies or nouveaux_rels or self._nouvelles)
+        if self.inchange:
+            self.fp.seek(0)
+            shutil.copyfileobj(self.fp, sortie)
+            return None
+
+        ecrivain = EcrivainZip(sortie, compression)
+        horodatage = self.infos["[Content_Types].xml"].date_time
+        for info in self.zip.infolist():
+            donnees = modifies.get(info.filename)
+            if donnees is None:
+                ecrivain.copier_brut(info, lire_membre_brut(self.fp, info))
+            else:
+                ecrivain.ecrire(info.filename, donnees, info.date_time)
+        for nom in nouveaux_rels:
+            ecrivain.ecrire(nom, serialiser(self._rels[nom]), horodatage)
+        for nom, donnees in self._nouvelles.items():
+            ecrivain.ecrire(nom, self._donnees_modifiees(nom) or donnees, horodatage)
+        ecrivain.fermer()
+        return ecrivain
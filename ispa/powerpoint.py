@@ -0,0 +1,1036 @@
+"""Charte ISPA appliquée aux présentations PowerPoint (python-pptx), moteurs python et zip.
+
+Importé à la première présentation traitée (voir ispa.conversion).
+"""
+
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from lxml import etree
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
+from pptx.enum.text import MSO_AUTO_SIZE
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.serialized import PackageWriter
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.oxml.xmlchemy import OxmlElement
+from pptx.slide import Slide, SlideMaster
+
+from .charte import (COMPRESSION, DETECTION_LOGOS, DETECTIONS_LOGOS, DOUBLE_FAVICON_HEIGHT,
+                     DOUBLE_FAVICON_WIDTH, DOUBLE_LOGO_HEIGHT, DOUBLE_LOGO_WIDTH,
+                     EMPREINTES_ANCIENS_LOGOS, FAVICON_HEIGHT, FAVICON_WIDTH, FAVICON_X,
+                     FAVICON_Y, LOGO_HEIGHT, LOGO_WIDTH, LOGO_X, LOGO_Y, MANIFESTE_SLIDES,
+                     MAX_LEFT_LOGO, MAX_RIGHT_FAVICON, MAX_TOP_FAVICON, MAX_TOP_LOGO,
+                     MIN_RIGHT_FAVICON, MIN_TOP_FAVICON, OPTIMISER_MEDIAS, PLACEMENT_LOGO,
+                     PLACEMENTS_LOGO, PROCESSUS_SLIDES, SEUIL_SLIDES_PARALLELE, STYLE_PPTX,
+                     STYLES_PPTX, version_charte)
+from .images import ImagesDuTraitement
+from .medias import enregistrer_sortie
+from .paquet import (RT_CUSTOM_XML, EcrivainZip, MembresOpc, PaquetZip, PartieZip, chemin_rels,
+                     serialiser)
+from .profils import charger_profil
+from .progression import ProgressionEnregistree, ProgressionMuette, rejouer_mesures
+
+# ---------------------------------------------------------------------------
+# OUTILS PPTX
+# ---------------------------------------------------------------------------
+
+def est_cadre_ancien_logo(x, y, cx, cy):
+    """Petite image dans le coin haut-gauche : emplacement de l'ancien logo."""
+    return (x < MAX_LEFT_LOGO and y < MAX_TOP_LOGO
+            and cx <= DOUBLE_LOGO_WIDTH and cy <= DOUBLE_LOGO_HEIGHT)
+
+def est_cadre_ancien_favicon(x, y, cx, cy):
+    """Petite image dans le coin haut-droit : emplacement de l'ancien favicon."""
+    return (MIN_RIGHT_FAVICON < x < MAX_RIGHT_FAVICON
+            and MIN_TOP_FAVICON < y < MAX_TOP_FAVICON
+            and cx <= DOUBLE_FAVICON_WIDTH and cy <= DOUBLE_FAVICON_HEIGHT)
+
+def remove_old_logo_if_small_in_corner(shape, progression, en_place=None):
+    """Détecte et supprime l'ancien logo principal (coin haut-gauche)."""
+    try:
+        if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+            if (est_cadre_ancien_logo(shape.left, shape.top, shape.width, shape.height)
+                    and not est_en_place(shape._element, en_place)):
+                shape._element.getparent().remove(shape._element)
+                progression.evenement("logo_supprime")
+                return True
+    except Exception as e:
+        progression.evenement("erreur", f"Erreur suppression logo: {str(e)}")
+    return False
+
+def remove_old_favicon_if_in_corner(shape, progression, en_place=None):
+    """Détecte et supprime l'ancien favicon (coin haut-droit)."""
+    try:
+        if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+            if (est_cadre_ancien_favicon(shape.left, shape.top, shape.width, shape.height)
+                    and not est_en_place(shape._element, en_place)):
+                shape._element.getparent().remove(shape._element)
+                progression.evenement("favicon_supprime")
+                return True
+    except Exception as e:
+        progression.evenement("erreur", f"Erreur suppression favicon: {str(e)}")
+    return False
+
+def styler_paragraphe(p, modele):
+    """Pose le modèle du rôle (profils.ModeleRPr) sur un paragraphe a:p et ses runs.
+
+    Retourne le nombre de runs stylés. Le paragraphe reçoit les mêmes
+    propriétés par défaut (a:pPr/a:defRPr) que ses runs.
+    """
+    modele.appliquer(p.get_or_add_pPr().get_or_add_defRPr())
+    runs = p.r_lst
+    for r in runs:
+        modele.appliquer(r.get_or_add_rPr())
+    return len(runs)
+
+def appliquer_style_texte_pptx(text_frame, shape, profil, progression=None):
+    """Applique les styles du profil aux textes."""
+    if not text_frame:
+        return
+
+    try:
+        text_frame.auto_size = MSO_AUTO_SIZE.NONE
+    except:
+        pass
+
+    force_title = getattr(shape, "_force_title", False) if shape else False
+    modeles = profil.pptx
+
+    for p in text_frame._txBody.p_lst:
+        try:
+            niveau = p.get_or_add_pPr().lvl
+            if niveau >= 1:
+                # Bullet (2ème niveau et plus), modèle propre à chaque niveau
+                runs = styler_paragraphe(p, modeles["niveaux"][niveau])
+                if progression:
+                    progression.evenement("bullet")
+            elif force_title:
+                runs = styler_paragraphe(p, modeles["titre"])
+                if progression:
+                    progression.evenement("titre")
+            else:
+                runs = styler_paragraphe(p, modeles["corps"])
+                if progression:
+                    progression.evenement("corps")
+            if progression:
+                progression.compter("runs", runs)
+        except Exception:
+            pass
+
+# Paragraphes des cellules d'un tableau (a:tbl)
+XPATH_PARAGRAPHES_CELLULES = etree.XPath(
+    "./a:tr/a:tc/a:txBody/a:p",
+    namespaces={"a": "http://schemas.openxmlformats.org/drawingml/2006/main"},
+)
+
+def style_table(table, profil, progression=None):
+    runs = 0
+    modele = profil.pptx["tableau"]
+    try:
+        for p in XPATH_PARAGRAPHES_CELLULES(table._tbl):
+            runs += styler_paragraphe(p, modele)
+    except:
+        pass
+    if progression:
+        progression.compter("runs", runs)
+
+def inserer_image(conteneur, image_part, x, y, cx, cy, nom_fichier=None):
+    """Ajoute une image déjà présente dans le paquet sur une slide, un layout ou un master.
+
+    nom_fichier : description de l'image (défaut : "image.png", comme python-pptx
+    pour une image reçue en flux).
+    """
+    rId = conteneur.part.relate_to(image_part, RT.IMAGE)
+    spTree = conteneur.shapes._spTree
+    id_ = spTree.max_shape_id + 1
+    spTree.add_pic(id_, f"Picture {id_ - 1}", nom_fichier or image_part.desc, rId,
+                   x, y, cx, cy)
+
+def affiche_formes_master(conteneur):
+    """False si la slide / le layout masque les formes héritées (showMasterSp="0")."""
+    return conteneur._element.get("showMasterSp") not in ("0", "false")
+
+def get_text_content(shape):
+    """Retourne le texte d'un shape (strip) ou ""."""
+    try:
+        if hasattr(shape, "text_frame") and shape.text_frame:
+            return shape.text_frame.text.strip()
+    except:
+        pass
+    return ""
+
+# ---------------------------------------------------------------------------
+# STYLES PPTX AU NIVEAU MASTER / THÈME (STYLE_PPTX = "theme")
+# ---------------------------------------------------------------------------
+
+NIVEAUX_PPTX = [f"a:lvl{n}pPr" for n in range(1, 10)]
+REMPLISSAGES = ("a:noFill", "a:solidFill", "a:gradFill", "a:blipFill", "a:pattFill", "a:grpFill")
+
+# Propriétés de caractères locales (runs, fins de paragraphe, paragraphes et
+# listes de styles des formes) ; les tableaux (a:tbl) ne sont pas concernés
+XPATH_SURCHARGES = etree.XPath(
+    "./p:cSld/p:spTree//p:txBody//*[self::a:rPr or self::a:endParaRPr or self::a:defRPr]",
+    namespaces={"a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+                "p": "http://schemas.openxmlformats.org/presentationml/2006/main"},
+)
+
+def enfant(parent, tag, avant=()):
+    """Enfant `tag` de parent, créé au bon rang (avant le premier des `avant` présents)."""
+    trouve = parent.find(qn(tag))
+    if trouve is None:
+        trouve = OxmlElement(tag)
+        suivants = [e for e in (parent.find(qn(t)) for t in avant) if e is not None]
+        if suivants:
+            suivants[0].addprevious(trouve)
+        else:
+            parent.append(trouve)
+    return trouve
+
+def definir_niveau(liste_styles, niveau, modele):
+    """Pose le modèle d'un rôle sur a:lvlNpPr/a:defRPr d'une liste de styles."""
+    lvl = enfant(liste_styles, NIVEAUX_PPTX[niveau], NIVEAUX_PPTX[niveau + 1:] + ["a:extLst"])
+    modele.appliquer(enfant(lvl, "a:defRPr", ("a:extLst",)))
+
+def definir_liste_styles(liste_styles, profil, titre=False):
+    """Niveau 1 : titre ou corps ; niveaux 2 à 9 : bullets (comme appliquer_style_texte_pptx)."""
+    modeles = profil.pptx
+    definir_niveau(liste_styles, 0, modeles["titre"] if titre else modeles["corps"])
+    for niveau in range(1, 9):
+        definir_niveau(liste_styles, niveau, modeles["niveaux"][niveau])
+
+def retirer_surcharges(conteneur):
+    """Retire taille, police latine et couleur locales d'un master, layout ou slide."""
+    for rpr in XPATH_SURCHARGES(conteneur._element):
+        rpr.attrib.pop("sz", None)
+        for enfant_rpr in list(rpr):
+            if enfant_rpr.tag in (qn("a:latin"),) + tuple(qn(t) for t in REMPLISSAGES):
+                rpr.remove(enfant_rpr)
+        if not len(rpr) and not rpr.attrib:
+            rpr.getparent().remove(rpr)
+    # Moteur zip : la partie sera réécrite (python-pptx réécrit toujours tout)
+    conteneur.part.modifiee = True
+
+def modifier_partie_xml(part, fonction):
+    """Applique `fonction` à l'élément racine d'une partie (thème).
+
+    python-pptx ne charge le thème que comme blob : il est analysé puis réécrit.
+    """
+    if isinstance(part, PartieZip):
+        part.modifiee = True
+        fonction(part.element)
+    else:
+        element = parse_xml(part.blob)
+        fonction(element)
+        part._blob = serialiser(element)
+
+def definir_polices_theme(theme, profil):
+    """Polices du thème : titres (majorFont) et corps (minorFont)."""
+    schema = theme.find(f"{qn('a:themeElements')}/{qn('a:fontScheme')}")
+    if schema is None:
+        return
+    roles = profil.donnees["pptx"]
+    for tag, police in (("a:majorFont", roles["titre"]["police"]),
+                        ("a:minorFont", roles["corps"]["police"])):
+        polices = schema.find(qn(tag))
+        if polices is not None:
+            enfant(polices, "a:latin").set("typeface", police)
+
+def definir_styles_master(master, profil):
+    """p:txStyles : titres, corps et autres textes du master aux couleurs du profil."""
+    tx_styles = enfant(master._element, "p:txStyles", ("p:extLst",))
+    for tag, titre in (("p:titleStyle", True), ("p:bodyStyle", False), ("p:otherStyle", False)):
+        definir_liste_styles(enfant(tx_styles, tag, ("p:bodyStyle", "p:otherStyle", "p:extLst")),
+                             profil, titre)
+    modifier_partie_xml(master.part.part_related_by(RT.THEME),
+                        partial(definir_polices_theme, profil=profil))
+
+def definir_styles_presentation(pres, profil):
+    """Styles par défaut de la présentation, dont héritent les zones de texte libres."""
+    defaut = enfant(pres._element, "p:defaultTextStyle", ("p:modifyVerifier", "p:extLst"))
+    definir_liste_styles(defaut, profil)
+    pres.part.modifiee = True
+
+def est_titre_herite(shape):
+    """True si la forme hérite du style de titre (placeholder titre / titre centré)."""
+    return (shape.is_placeholder
+            and shape.placeholder_format.type in (PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE))
+
+def appliquer_style_herite_pptx(text_frame, shape, profil, progression=None):
+    """Mode "theme" : le texte hérite des styles du master ; le style n'est écrit
+    sur la forme que si son rôle diffère de celui de son placeholder."""
+    try:
+        text_frame.auto_size = MSO_AUTO_SIZE.NONE
+    except:
+        pass
+
+    force_title = getattr(shape, "_force_title", False)
+    if force_title != est_titre_herite(shape):
+        definir_liste_styles(enfant(text_frame._txBody, "a:lstStyle", ("a:p",)), profil,
+                             titre=force_title)
+
+    if progression:
+        for paragraph in text_frame.paragraphs:
+            if paragraph.level >= 1:
+                progression.evenement("bullet")
+            else:
+                progression.evenement("titre" if force_title else "corps")
+
+def styler_formes(shapes, progression, profil, style=STYLE_PPTX, tables=False):
+    """Textes (et tableaux) d'un master ou d'une slide ; le premier texte (par position) devient le titre."""
+    text_shapes = []
+    table_shapes = []
+    formes = 0
+    for sh in shapes:
+        formes += 1
+        if hasattr(sh, "text_frame"):
+            text_shapes.append(sh)
+        if tables and sh.shape_type == MSO_SHAPE_TYPE.TABLE:
+            table_shapes.append(sh)
+    progression.compter("formes", formes)
+
+    if table_shapes:
+        with progression.phase("tableaux"):
+            for sh in table_shapes:
+                style_table(sh.table, profil, progression)
+
+    with progression.phase("textes"):
+        text_shapes.sort(key=lambda s: s.top)
+        filtered = []
+        for sh in text_shapes:
+            txt = get_text_content(sh)
+            if len(txt) > 3:
+                filtered.append(sh)
+
+        if filtered:
+            filtered[0]._force_title = True
+
+        for sh in text_shapes:
+            if style == "theme":
+                appliquer_style_herite_pptx(sh.text_frame, sh, profil, progression)
+            else:
+                appliquer_style_texte_pptx(sh.text_frame, sh, profil, progression)
+
+# ---------------------------------------------------------------------------
+# DÉTECTION DES ANCIENS LOGOS PAR EMPREINTE (DETECTION_LOGOS = "empreintes")
+# ---------------------------------------------------------------------------
+#
+# Les images des masters et layouts placées dans le coin d'un ancien logo ou
+# favicon sont hachées une fois ; chaque master, layout et slide est ensuite
+# confronté à l'index par ses seules relations image : le XML n'est parcouru
+# que si l'une d'elles pointe vers une image indexée.
+
+# Images d'un master, d'un layout ou d'une slide, groupes compris
+XPATH_IMAGES_PPTX = etree.XPath(
+    "./p:cSld/p:spTree//p:pic",
+    namespaces={"p": "http://schemas.openxmlformats.org/presentationml/2006/main"},
+)
+# Enfants d'un p:grpSp qui ne sont pas des formes
+ENTETES_GROUPE = (qn("p:nvGrpSpPr"), qn("p:grpSpPr"), qn("p:extLst"))
+
+def relation_image(pic):
+    """rId de l'image affichée par un p:pic, ou None."""
+    blip = pic.find(f"{qn('p:blipFill')}/{qn('a:blip')}")
+    return blip.get(qn("r:embed")) if blip is not None else None
+
+def cadre_absolu(pic):
+    """(x, y, cx, cy) d'un p:pic sur sa slide, groupes imbriqués compris ; None sans a:xfrm."""
+    off = pic.find(f"{qn('p:spPr')}/{qn('a:xfrm')}/{qn('a:off')}")
+    ext = pic.find(f"{qn('p:spPr')}/{qn('a:xfrm')}/{qn('a:ext')}")
+    if off is None or ext is None:
+        return None
+    x, y = int(off.get("x", 0)), int(off.get("y", 0))
+    cx, cy = int(ext.get("cx", 0)), int(ext.get("cy", 0))
+    # Du groupe le plus proche au plus lointain : repère enfant → repère parent
+    for groupe in pic.iterancestors(qn("p:grpSp")):
+        xfrm = groupe.find(f"{qn('p:grpSpPr')}/{qn('a:xfrm')}")
+        if xfrm is None:
+            continue
+        off, ext, ch_off, ch_ext = (xfrm.find(qn(tag)) for tag in
+                                    ("a:off", "a:ext", "a:chOff", "a:chExt"))
+        if off is None or ext is None or ch_off is None or ch_ext is None:
+            continue
+        ch_cx, ch_cy = int(ch_ext.get("cx", 0)), int(ch_ext.get("cy", 0))
+        echelle_x = int(ext.get("cx", 0)) / ch_cx if ch_cx else 1.0
+        echelle_y = int(ext.get("cy", 0)) / ch_cy if ch_cy else 1.0
+        x = int(off.get("x", 0)) + (x - int(ch_off.get("x", 0))) * echelle_x
+        y = int(off.get("y", 0)) + (y - int(ch_off.get("y", 0))) * echelle_y
+        cx, cy = cx * echelle_x, cy * echelle_y
+    return x, y, cx, cy
+
+def images_liees(part):
+    """rId → partie image, pour les relations image d'une partie (deux moteurs)."""
+    if isinstance(part, PartieZip):
+        return part.images_liees()
+    return {rId: rel.target_part for rId, rel in part.rels.items()
+            if rel.reltype == RT.IMAGE and not rel.is_external}
+
+class IndexAnciensLogos:
+    """Empreintes des anciens logo / favicon, et images du paquet qui y correspondent.
+
+    Chaque partie image n'est lue et hachée qu'une fois par traitement ; sans
+    empreinte fournie (EMPREINTES_ANCIENS_LOGOS), seules les images de même
+    taille qu'une image apprise sont hachées.
+    """
+
+    def __init__(self, empreintes=None):
+        self.empreintes = dict(EMPREINTES_ANCIENS_LOGOS if empreintes is None else empreintes)
+        self._fournies = bool(self.empreintes)
+        self._tailles = set()
+        self._images = {}  # partie image → "logo", "favicon" ou None
+
+    def apprendre(self, conteneur):
+        """Indexe les images d'un master ou d'un layout placées dans un coin de logo / favicon."""
+        liees = None
+        for pic in XPATH_IMAGES_PPTX(conteneur._element):
+            cadre = cadre_absolu(pic)
+            if cadre is None:
+                continue
+            if est_cadre_ancien_logo(*cadre):
+                nom = "logo"
+            elif est_cadre_ancien_favicon(*cadre):
+                nom = "favicon"
+            else:
+                continue
+            if liees is None:
+                liees = images_liees(conteneur.part)
+            partie = liees.get(relation_image(pic))
+            if partie is None:
+                continue
+            octets = partie.blob
+            self.empreintes.setdefault(hashlib.sha256(octets).hexdigest(), nom)
+            self._tailles.add(len(octets))
+            self._images.clear()
+
+    def cibles(self, part):
+        """rId → "logo" / "favicon" des relations de `part` vers une image indexée."""
+        cibles = {}
+        if not self.empreintes:
+            return cibles
+        for rId, partie in images_liees(part).items():
+            if partie not in self._images:
+                self._images[partie] = self._classer(partie)
+            if self._images[partie] is not None:
+                cibles[rId] = self._images[partie]
+        return cibles
+
+    def _classer(self, partie):
+        try:
+            taille = partie.taille if isinstance(partie, PartieZip) else len(partie.blob)
+            if not self._fournies and taille not in self._tailles:
+                return None
+            return self.empreintes.get(hashlib.sha256(partie.blob).hexdigest())
+        except KeyError:
+            return None  # Relation vers un membre absent du paquet
+
+def index_anciens_logos(pres, detection=DETECTION_LOGOS):
+    """IndexAnciensLogos appris sur les masters et layouts ; None en détection "position".
+
+    Sans aucune empreinte (ni logo sur les masters et layouts, ni
+    EMPREINTES_ANCIENS_LOGOS), retourne aussi None : un ancien logo collé sur
+    chaque slide reste reconnu à sa position, comme en détection "position".
+    """
+    if detection not in DETECTIONS_LOGOS:
+        raise ValueError(f"Détection inconnue : {detection}")
+    if detection == "position":
+        return None
+    index = IndexAnciensLogos()
+    for master in pres.slide_masters:
+        index.apprendre(master)
+        for layout in master.slide_layouts:
+            index.apprendre(layout)
+    return index if index.empreintes else None
+
+def retirer_anciennes_images(conteneur, cibles, progression, en_place=None):
+    """Retire d'un master, layout ou slide les images dont la relation est dans `cibles`.
+
+    Les groupes vidés par le retrait disparaissent aussi ; le logo et le
+    favicon déjà en place (voir est_en_place) sont gardés. Retourne ce qui a
+    été retiré.
+    """
+    retires = {"logo": False, "favicon": False}
+    if not cibles:
+        return retires
+    for pic in XPATH_IMAGES_PPTX(conteneur._element):
+        nom = cibles.get(relation_image(pic))
+        if nom is None or est_en_place(pic, en_place):
+            continue
+        parent = pic.getparent()
+        parent.remove(pic)
+        while parent.tag == qn("p:grpSp") and all(e.tag in ENTETES_GROUPE for e in parent):
+            grand_parent = parent.getparent()
+            grand_parent.remove(parent)
+            parent = grand_parent
+        progression.evenement(f"{nom}_supprime")
+        retires[nom] = True
+    if any(retires.values()):
+        # Moteur zip : la partie sera réécrite
+        conteneur.part.modifiee = True
+    return retires
+
+# ---------------------------------------------------------------------------
+# BRANDING PPTX
+# ---------------------------------------------------------------------------
+
+# Nouveau logo / favicon : (nom, x, y, cx, cy)
+NOUVELLES_IMAGES = [
+    ("logo", LOGO_X, LOGO_Y, LOGO_WIDTH, LOGO_HEIGHT),
+    ("favicon", FAVICON_X, FAVICON_Y, FAVICON_WIDTH, FAVICON_HEIGHT),
+]
+CADRES_NOUVELLES_IMAGES = {nom: tuple(cadre) for nom, *cadre in NOUVELLES_IMAGES}
+
+def images_en_place(part, images):
+    """rId → "logo" / "favicon" des relations de `part` vers le logo ou le favicon du
+    traitement (posés par un traitement précédent), sans analyser le XML."""
+    return {rId: nom for rId, nom in ((rId, images.reconnaitre(partie))
+                                      for rId, partie in images_liees(part).items())
+            if nom is not None}
+
+def est_en_place(pic, en_place):
+    """Logo ou favicon du traitement, déjà dans son cadre : rien à retirer ni à reposer.
+
+    en_place : images_en_place de la partie qui porte `pic`.
+    """
+    if not en_place:
+        return False
+    nom = en_place.get(relation_image(pic))
+    return nom is not None and cadre_absolu(pic) == CADRES_NOUVELLES_IMAGES[nom]
+
+def brander_masters(pres, images, progression, profil, placement=PLACEMENT_LOGO, style=STYLE_PPTX,
+                    index=None):
+    """Masters : anciens logos retirés, textes stylés, nouveaux logos posés si placement="master".
+
+    En style "theme", les styles du master, du thème et de la présentation sont
+    définis ici et les surcharges des layouts retirées.
+    index : IndexAnciensLogos (détection "empreintes", layouts compris), ou
+    None pour la détection "position".
+    Retourne (retires_du_master, places_sur_master) : images retirées d'au
+    moins un master (ou layout), et images désormais portées par les masters.
+    """
+    if placement not in PLACEMENTS_LOGO:
+        raise ValueError(f"Placement inconnu : {placement}")
+    if style not in STYLES_PPTX:
+        raise ValueError(f"Style inconnu : {style}")
+
+    with progression.phase("masters"):
+        retires_du_master = nettoyer_et_styler_masters(pres, progression, profil, style, index,
+                                                       images)
+        places_sur_master = set()
+        if placement == "master":
+            with progression.phase("nouveaux_logos"):
+                places_sur_master = placer_images_masters(pres, images, progression,
+                                                          retires_du_master)
+    return retires_du_master, places_sur_master
+
+def nettoyer_et_styler_masters(pres, progression, profil, style, index=None, images=None):
+    """Anciens logos retirés et textes stylés sur chaque master ; retourne retires_du_master.
+
+    images : ImagesDuTraitement, dont le logo et le favicon déjà en place sont gardés.
+    """
+    if style == "theme":
+        definir_styles_presentation(pres, profil)
+
+    retires_du_master = {"logo": False, "favicon": False}
+
+    # MASTER
+    for master_idx, master in enumerate(pres.slide_masters, start=1):
+        progression.etape(f"Master {master_idx}")
+        
+        with progression.phase("anciens_logos"):
+            if index is None:
+                en_place = images_en_place(master.part, images) if images else None
+                for shape in list(master.shapes):
+                    if remove_old_logo_if_small_in_corner(shape, progression, en_place):
+                        retires_du_master["logo"] = True
+                    elif remove_old_favicon_if_in_corner(shape, progression, en_place):
+                        retires_du_master["favicon"] = True
+            else:
+                for conteneur in [master, *master.slide_layouts]:
+                    en_place = images_en_place(conteneur.part, images) if images else None
+                    retires = retirer_anciennes_images(conteneur, index.cibles(conteneur.part),
+                                                       progression, en_place)
+                    for nom, retire in retires.items():
+                        retires_du_master[nom] |= retire
+
+        if style == "theme":
+            with progression.phase("styles_theme"):
+                definir_styles_master(master, profil)
+                retirer_surcharges(master)
+                for layout in master.slide_layouts:
+                    retirer_surcharges(layout)
+
+        # Styles texte sur master
+        styler_formes(master.shapes, progression, profil, style)
+    return retires_du_master
+
+def placer_images_masters(pres, images, progression, retires_du_master):
+    """Nouveau logo / favicon posés une seule fois au niveau master ; retourne les images posées."""
+    places_sur_master = set()
+    for nom, x, y, cx, cy in NOUVELLES_IMAGES:
+        if not retires_du_master[nom] or nom not in images:
+            continue
+        try:
+            image_part = images.partie(pres.part.package, nom)
+            for master in pres.slide_masters:
+                inserer_image(master, image_part, x, y, cx, cy, images.noms[nom])
+                # Les layouts qui masquent le master reçoivent leur propre copie
+                for layout in master.slide_layouts:
+                    if not affiche_formes_master(layout):
+                        inserer_image(layout, image_part, x, y, cx, cy, images.noms[nom])
+                progression.evenement(f"{nom}_insere")
+            places_sur_master.add(nom)
+        except Exception as e:
+            progression.evenement("erreur", f"Erreur insertion {nom} (master): {str(e)}")
+    return places_sur_master
+
+def nettoyer_slide(slide, progression, cibles=None, en_place=None):
+    """Retire les anciens logo / favicon d'une slide ; retourne ce qui a été retiré.
+
+    cibles : relations image à retirer (IndexAnciensLogos.cibles), ou None
+    pour la détection "position" ; en_place : voir images_en_place.
+    """
+    if cibles is not None:
+        with progression.phase("anciens_logos"):
+            return retirer_anciennes_images(slide, cibles, progression, en_place)
+    retires = {"logo": False, "favicon": False}
+    with progression.phase("anciens_logos"):
+        for shape in list(slide.shapes):
+            if remove_old_logo_if_small_in_corner(shape, progression, en_place):
+                retires["logo"] = True
+            elif remove_old_favicon_if_in_corner(shape, progression, en_place):
+                retires["favicon"] = True
+    return retires
+
+def styler_slide(slide, progression, profil, style=STYLE_PPTX):
+    """Tableaux et textes d'une slide."""
+    if style == "theme":
+        retirer_surcharges(slide)
+    styler_formes(slide.shapes, progression, profil, style, tables=True)
+
+def images_a_inserer(retires, retires_du_master, places_sur_master, herite_du_master, images):
+    """Nouvelles images à poser sur une slide (celles héritées du master sont exclues)."""
+    a_inserer = []
+    for nom, x, y, cx, cy in NOUVELLES_IMAGES:
+        if not (retires[nom] or retires_du_master[nom]) or nom not in images:
+            continue  # Favicon : seulement si un favicon a été fourni
+        if nom in places_sur_master and herite_du_master:
+            continue
+        a_inserer.append((nom, x, y, cx, cy))
+    return a_inserer
+
+def inserer_images_slide(slide, package, images, a_inserer, progression):
+    if not a_inserer:
+        return
+    with progression.phase("nouveaux_logos"):
+        for nom, x, y, cx, cy in a_inserer:
+            try:
+                inserer_image(slide, images.partie(package, nom), x, y, cx, cy,
+                              images.noms[nom])
+                progression.evenement(f"{nom}_insere")
+            except Exception as e:
+                progression.evenement("erreur", f"Erreur insertion {nom}: {str(e)}")
+
+def brander_presentation(pres, images, progression, placement=PLACEMENT_LOGO, style=STYLE_PPTX,
+                         detection=DETECTION_LOGOS, profil=None):
+    """Applique la charte ISPA (logos, favicon, styles) à une présentation ouverte.
+
+    Partagé par les deux moteurs : `pres` est une Presentation python-pptx ou
+    une PresentationZip (moteur zip), qui exposent les mêmes proxys.
+    detection : "empreintes" ou "position", voir DETECTION_LOGOS.
+    profil : profil de marque des textes (voir charger_profil ; défaut : la charte).
+    """
+    profil = charger_profil(profil)
+    with progression.phase("empreintes"):
+        index = index_anciens_logos(pres, detection)
+    retires_du_master, places_sur_master = brander_masters(pres, images, progression, profil,
+                                                           placement, style, index)
+
+    # SLIDES
+    slides_list = list(pres.slides)
+    total_slides = len(slides_list)
+    for idx, slide in enumerate(slides_list, start=1):
+        progression.slide(idx, total_slides)
+
+        with progression.phase("slide"):
+            retires = nettoyer_slide(slide, progression,
+                                     index.cibles(slide.part) if index else None,
+                                     images_en_place(slide.part, images))
+
+            # Insérer nouveau logo / favicon si nécessaire (et s'il n'est pas hérité du master)
+            a_inserer = images_a_inserer(retires, retires_du_master, places_sur_master,
+                                         affiche_formes_master(slide), images)
+            inserer_images_slide(slide, pres.part.package, images, a_inserer, progression)
+
+            # Traitement des textes
+            styler_slide(slide, progression, profil, style)
+
+def convertir_pptx(fichier_entree, logo_path, favicon_path, progression=None,
+                   placement=PLACEMENT_LOGO, style=STYLE_PPTX, sortie=None,
+                   medias=OPTIMISER_MEDIAS, detection=DETECTION_LOGOS, profil=None,
+                   compression=COMPRESSION):
+    """Traite un fichier PowerPoint avec logo et favicon (moteur python-pptx).
+
+    Lève l'exception d'origine en cas d'échec. Sans puits de progression,
+    le traitement est silencieux (utilisation en ligne de commande).
+    placement : "master" ou "slide", voir PLACEMENT_LOGO.
+    style : "runs" ou "theme", voir STYLE_PPTX.
+    sortie : flux où écrire le résultat (défaut : tampon_sortie()), retourné
+    repositionné au début.
+    medias : passe le résultat par optimiser_medias, voir OPTIMISER_MEDIAS.
+    detection : "empreintes" ou "position", voir DETECTION_LOGOS.
+    profil : profil de marque (nom, chemin, dict ou Profil), voir charger_profil.
+    compression : "rapide", "standard", "maximale" ou "stockage", voir COMPRESSION.
+    """
+    if progression is None:
+        progression = ProgressionMuette()
+
+    progression.etape("Ouverture du fichier PowerPoint...")
+    with progression.phase("ouverture"):
+        pres = Presentation(fichier_entree)
+    with progression.phase("images"):
+        images = ImagesDuTraitement(logo_path, favicon_path)
+    brander_presentation(pres, images, progression, placement, style, detection, profil)
+
+    # Sauvegarder
+    progression.etape("Sauvegarde...")
+    output = enregistrer_sortie(partial(enregistrer_presentation, pres), sortie, medias,
+                                progression, compression)
+    
+    progression.terminer("✅ PowerPoint traité avec succès!")
+    
+    return output
+
+def enregistrer_presentation(pres, sortie, compression=COMPRESSION):
+    """Comme pres.save(sortie), chaque partie passant par un EcrivainZip ; retourne ce dernier."""
+    paquet = pres.part.package
+    ecrivain = EcrivainZip(sortie, compression)
+    membres = MembresOpc(ecrivain)
+    opc = PackageWriter(sortie, paquet._rels, tuple(paquet.iter_parts()))
+    opc._write_content_types_stream(membres)
+    opc._write_pkg_rels(membres)
+    opc._write_parts(membres)
+    ecrivain.fermer()
+    return ecrivain
+
+class PresentationZip:
+    """Équivalent minimal de pptx.Presentation au-dessus d'un PaquetZip."""
+
+    def __init__(self, paquet):
+        self.part = paquet.partie_liee("", RT.OFFICE_DOCUMENT)
+        prs = self.part.element
+        self.slide_masters = [self._proxy(rId, SlideMaster)
+                              for rId in prs.xpath("./p:sldMasterIdLst/p:sldMasterId/@r:id")]
+        self._rIds_slides = prs.xpath("./p:sldIdLst/p:sldId/@r:id")
+        self._slides = None
+        self._ignorees = frozenset()
+
+    def _proxy(self, rId, classe):
+        partie = self.part.related_part(rId)
+        partie.modifiee = True
+        return partie.proxy(classe)
+
+    @property
+    def _element(self):
+        return self.part.element
+
+    @property
+    def slides(self):
+        if self._slides is None:
+            self._slides = [self._proxy(rId, Slide) for rId in self._rIds_slides
+                            if self.part.related_part(rId).nom not in self._ignorees]
+        return self._slides
+
+    def parties_slides(self, toutes=False):
+        """Parties des slides, dans l'ordre de la présentation, sans les analyser.
+
+        Les slides ignorées (voir ignorer) sont omises, sauf avec `toutes`.
+        """
+        parties = [self.part.related_part(rId) for rId in self._rIds_slides]
+        if toutes:
+            return parties
+        return [partie for partie in parties if partie.nom not in self._ignorees]
+
+    def ignorer(self, noms):
+        """Slides laissées telles quelles : ni analysées, ni nettoyées, ni stylées."""
+        self._ignorees = frozenset(noms)
+        self._slides = None
+
+# ---------------------------------------------------------------------------
+# Traitement incrémental (MANIFESTE_SLIDES)
+# ---------------------------------------------------------------------------
+#
+# Le manifeste, partie customXml reliée à presentation.xml, garde l'empreinte
+# des réglages du traitement (charte, profil, options, logo et favicon) et de
+# chaque slide, master et layout tels qu'écrits (XML et relations). Au
+# traitement suivant, si réglages, masters et layouts n'ont pas bougé, les
+# slides dont l'empreinte est inchangée sont laissées telles quelles : seules
+# les slides modifiées depuis sont retraitées.
+
+NS_MANIFESTE = "urn:ispa:manifeste-slides"
+VERSION_MANIFESTE = "1"
+
+def reglages_traitement(images, profil, placement, style, detection):
+    """Empreinte de tout ce qui décide du résultat d'une slide."""
+    elements = [VERSION_MANIFESTE, version_charte(), profil.empreinte, placement, style,
+                detection, *sorted(f"{nom}:{empreinte}"
+                                   for empreinte, nom in images.empreintes.items())]
+    return hashlib.sha256("|".join(elements).encode()).hexdigest()[:16]
+
+def empreinte_membre(paquet, nom, origine=False):
+    """Empreinte d'une partie telle qu'enregistrée (ou, avec `origine`, telle que reçue) :
+    XML et relations.
+
+    Les relations image n'en font pas partie : l'optimisation des images
+    (medias) les fusionne ou les retire après l'écriture du manifeste. Une
+    image ajoutée ou retirée change de toute façon le XML de la partie.
+    """
+    lire = paquet.octets_origine if origine else paquet.octets_finaux
+    empreinte = hashlib.sha256(lire(nom))
+    rels = lire(chemin_rels(nom))
+    for rel in (etree.fromstring(rels) if rels else ()):
+        if rel.get("Type") != RT.IMAGE:
+            empreinte.update(f"\0{rel.get('Id')} {rel.get('Type')} {rel.get('Target')}".encode())
+    return empreinte.hexdigest()[:16]
+
+def noms_gabarits(paquet, pres):
+    """Masters et layouts de la présentation, sans les analyser."""
+    noms = []
+    for _, type_master, master in paquet._relations(pres.part.nom):
+        if type_master != RT.SLIDE_MASTER:
+            continue
+        noms.append(master)
+        noms.extend(layout for _, type_layout, layout in paquet._relations(master)
+                    if type_layout == RT.SLIDE_LAYOUT)
+    return noms
+
+class ManifesteSlides:
+    """Manifeste d'une présentation (moteur zip) : celui du traitement précédent, puis le nouveau."""
+
+    def __init__(self, paquet, pres):
+        self.paquet = paquet
+        self.pres = pres
+        self.nom = None
+        self.reglages = None
+        self.empreintes = {}
+        for _, type_, nom in paquet._relations(pres.part.nom):
+            if type_ != RT_CUSTOM_XML or nom not in paquet.infos:
+                continue
+            try:
+                racine = etree.fromstring(paquet.lire(nom))
+            except etree.XMLSyntaxError:
+                continue
+            if racine.tag == f"{{{NS_MANIFESTE}}}manifeste":
+                self.nom = nom
+                if racine.get("version") == VERSION_MANIFESTE:
+                    self.reglages = racine.get("reglages")
+                    self.empreintes = {e.get("nom"): e.get("empreinte") for e in racine}
+                break
+
+    def slides_a_jour(self, reglages, gabarits):
+        """Slides inchangées depuis le traitement précédent, aux mêmes réglages."""
+        if not self.empreintes or self.reglages != reglages:
+            return set()
+        if any(self.empreintes.get(nom) != empreinte_membre(self.paquet, nom, origine=True)
+               for nom in gabarits):
+            return set()
+        return {partie.nom for partie in self.pres.parties_slides(toutes=True)
+                if self.empreintes.get(partie.nom) == empreinte_membre(self.paquet, partie.nom,
+                                                                       origine=True)}
+
+    def ecrire(self, reglages, gabarits):
+        """Manifeste du résultat, à appeler une fois la présentation entièrement traitée
+        (les parties sont alors sérialisées pour de bon, voir PaquetZip.octets_finaux)."""
+        racine = etree.Element(f"{{{NS_MANIFESTE}}}manifeste", nsmap={None: NS_MANIFESTE},
+                               version=VERSION_MANIFESTE, reglages=reglages)
+        for nom in [*gabarits, *(partie.nom for partie in self.pres.parties_slides(toutes=True))]:
+            etree.SubElement(racine, f"{{{NS_MANIFESTE}}}partie", nom=nom,
+                             empreinte=empreinte_membre(self.paquet, nom))
+        octets = serialiser(racine)
+        if self.nom is not None:
+            self.paquet.partie(self.nom).remplacer(octets)
+            return
+        existants = set(self.paquet.infos) | set(self.paquet._nouvelles)
+        n = next(n for n in range(1, len(existants) + 2)
+                 if f"customXml/item{n}.xml" not in existants)
+        self.nom = f"customXml/item{n}.xml"
+        self.paquet.ajouter_partie(self.nom, octets, "application/xml")
+        self.paquet.relier(self.pres.part.nom, self.nom, RT_CUSTOM_XML)
+
+# ---------------------------------------------------------------------------
+# Slides en parallèle
+# ---------------------------------------------------------------------------
+#
+# Les masters sont traités d'abord dans le processus principal. Chaque slide
+# est ensuite nettoyée et stylée dans un processus de travail, qui ne reçoit
+# que son XML (layouts et masters, nécessaires à l'héritage des placeholders,
+# sont transmis une fois par processus). Les slides reviennent sérialisées et
+# dans l'ordre ; les insertions de logo, qui allouent rId et parties image au
+# niveau du paquet, restent dans le processus principal. Une insertion ne
+# touche ni aux textes ni aux tableaux : le XML produit est identique, octet
+# pour octet, à celui du traitement séquentiel.
+
+class PaquetIsole:
+    """Layouts, masters et slide en cours, reconstruits dans un processus de travail.
+
+    Fournit à PartieZip ce dont les proxys python-pptx ont besoin : lecture
+    des parties et relations slide → layout → master.
+    """
+
+    format = "pptx"
+
+    def __init__(self, donnees, liens):
+        self.donnees = dict(donnees)
+        self.liens = liens
+        self._parties = {}
+
+    def lire(self, nom):
+        return self.donnees[nom]
+
+    def analyser(self, nom, donnees=None):
+        return parse_xml(self.lire(nom) if donnees is None else donnees)
+
+    def partie(self, nom):
+        if nom not in self._parties:
+            self._parties[nom] = PartieZip(self, nom)
+        return self._parties[nom]
+
+    def partie_liee(self, nom_partie, reltype):
+        if (nom_partie, reltype) not in self.liens:
+            raise KeyError(f"Aucune relation {reltype} depuis {nom_partie}")
+        return self.partie(self.liens[(nom_partie, reltype)])
+
+_PAQUET_ISOLE = None
+
+# Processus de travail démarrés par un serveur "forkserver" ("spawn" à défaut) :
+# jamais fork() depuis l'interface ou l'API, dont les autres threads peuvent
+# tenir des verrous (journalisation, imports, compression) au moment du fork
+DEMARRAGE_PROCESSUS_SLIDES = ("forkserver"
+                              if "forkserver" in multiprocessing.get_all_start_methods()
+                              else "spawn")
+
+def _initialiser_processus_slides(donnees, liens):
+    global _PAQUET_ISOLE
+    _PAQUET_ISOLE = PaquetIsole(donnees, liens)
+
+def _transformer_slide(tache):
+    """Nettoie et style une slide ; retourne son XML, ce qui a été retiré, les
+    événements et, si `mesures`, les durées des phases et les compteurs."""
+    nom, donnees, style, profil, cibles, en_place, mesures = tache
+    progression = ProgressionEnregistree(mesures)
+    _PAQUET_ISOLE.donnees[nom] = donnees
+    try:
+        with progression.phase("slide"):
+            slide = _PAQUET_ISOLE.partie(nom).proxy(Slide)
+            retires = nettoyer_slide(slide, progression, cibles, en_place)
+            styler_slide(slide, progression, profil, style)
+            octets = serialiser(slide._element)
+        return (octets, retires, affiche_formes_master(slide), progression.evenements,
+                progression.phases, progression.compteurs)
+    finally:
+        del _PAQUET_ISOLE.donnees[nom]
+        del _PAQUET_ISOLE._parties[nom]
+
+def brander_presentation_parallele(pres, images, progression, placement=PLACEMENT_LOGO,
+                                   style=STYLE_PPTX, processus=PROCESSUS_SLIDES,
+                                   detection=DETECTION_LOGOS, profil=None):
+    """Comme brander_presentation, slides réparties sur `processus` processus (moteur zip).
+
+    Les relations image de chaque slide sont confrontées à l'index des anciens
+    logos ici ; le processus de travail ne reçoit que les rId à retirer. Le
+    profil voyage sous sa forme de données et n'est compilé qu'une fois par
+    processus (voir Profil.__reduce__).
+    """
+    profil = charger_profil(profil)
+    paquet = pres.part.package
+    with progression.phase("empreintes"):
+        index = index_anciens_logos(pres, detection)
+    retires_du_master, places_sur_master = brander_masters(pres, images, progression, profil,
+                                                           placement, style, index)
+
+    parties = pres.parties_slides()
+    total_slides = len(parties)
+    donnees, liens, taches = {}, {}, []
+    for partie in parties:
+        layout = paquet.partie_liee(partie.nom, RT.SLIDE_LAYOUT)
+        master = paquet.partie_liee(layout.nom, RT.SLIDE_MASTER)
+        liens[(partie.nom, RT.SLIDE_LAYOUT)] = layout.nom
+        liens[(layout.nom, RT.SLIDE_MASTER)] = master.nom
+        for gabarit in (layout, master):
+            if gabarit.nom not in donnees:
+                donnees[gabarit.nom] = gabarit.octets()
+        cibles = index.cibles(partie) if index else None
+        taches.append((partie.nom, paquet.lire(partie.nom), style, profil, cibles,
+                       images_en_place(partie, images), progression.mesures))
+
+    progression.etape("Slides...")
+    with ProcessPoolExecutor(max_workers=processus,
+                             mp_context=multiprocessing.get_context(DEMARRAGE_PROCESSUS_SLIDES),
+                             initializer=_initialiser_processus_slides,
+                             initargs=(donnees, liens)) as pool:
+        resultats = pool.map(_transformer_slide, taches,
+                             chunksize=max(1, total_slides // (processus * 4)))
+        for idx, (partie, resultat) in enumerate(zip(parties, resultats), start=1):
+            octets, retires, herite_du_master, evenements, phases, compteurs = resultat
+            progression.slide(idx, total_slides)
+            for type_evt, detail in evenements:
+                progression.evenement(type_evt, detail)
+            rejouer_mesures(progression, phases, compteurs)
+
+            partie.remplacer(octets)
+            a_inserer = images_a_inserer(retires, retires_du_master, places_sur_master,
+                                         herite_du_master, images)
+            if a_inserer:
+                inserer_images_slide(partie.proxy(Slide), paquet, images, a_inserer, progression)
+
+def convertir_pptx_zip(fichier_entree, logo_path, favicon_path, progression=None,
+                       placement=PLACEMENT_LOGO, style=STYLE_PPTX, processus=PROCESSUS_SLIDES,
+                       sortie=None, medias=OPTIMISER_MEDIAS, detection=DETECTION_LOGOS,
+                       profil=None, manifeste=MANIFESTE_SLIDES, compression=COMPRESSION):
+    """Comme convertir_pptx, sans décompresser ni recompresser les médias.
+
+    processus : nombre de processus pour les slides (1 : traitement séquentiel),
+    utilisé à partir de SEUIL_SLIDES_PARALLELE slides.
+    manifeste : seules les slides modifiées depuis le traitement précédent
+    sont retraitées, voir MANIFESTE_SLIDES. Un document déjà à jour est
+    rendu octet pour octet.
+    """
+    if progression is None:
+        progression = ProgressionMuette()
+
+    progression.etape("Ouverture du fichier PowerPoint...")
+    with progression.phase("ouverture"):
+        paquet = PaquetZip(fichier_entree, "pptx")
+    try:
+        with progression.phase("images"):
+            images = ImagesDuTraitement(logo_path, favicon_path)
+        pres = PresentationZip(paquet)
+        profil = charger_profil(profil)
+        if manifeste:
+            with progression.phase("manifeste"):
+                manifeste = ManifesteSlides(paquet, pres)
+                reglages = reglages_traitement(images, profil, placement, style, detection)
+                gabarits = noms_gabarits(paquet, pres)
+                a_jour = manifeste.slides_a_jour(reglages, gabarits)
+            pres.ignorer(a_jour)
+            for _ in a_jour:
+                progression.evenement("slide_inchangee")
+        if processus > 1 and len(pres.parties_slides()) >= SEUIL_SLIDES_PARALLELE:
+            brander_presentation_parallele(pres, images, progression, placement, style, processus,
+                                           detection, profil)
+        else:
+            brander_presentation(pres, images, progression, placement, style, detection, profil)
+        if manifeste:
+            with progression.phase("manifeste"):
+                manifeste.ecrire(reglages, gabarits)
+
+        progression.etape("Sauvegarde...")
+        output = enregistrer_sortie(paquet.enregistrer, sortie, medias, progression,
+                                    compression)
+    finally:
+        paquet.fermer()
+
+    progression.terminer("✅ PowerPoint traité avec succès!")
+    return output
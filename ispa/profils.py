@@ -0,0 +1,378 @@
+"""Profils de marque (JSON / TOML) compilés en modèles de propriétés de caractères.
+
+Un profil décrit police, taille et couleur de chaque rôle de texte ; tout ce
+qu'il ne précise pas est repris de la charte ISPA (ispa.charte) :
+
+    nom = "Marque"
+
+    [pptx.titre]            # aussi : corps, bullet (niveaux 2 à 9), tableau
+    police = "Lexend Bold"
+    taille = 40             # points
+    couleur = "6F9CEB"
+
+    [pptx.niveaux.3]        # un niveau de bullet en particulier
+    taille = 16
+
+    [word.titre]            # aussi : sous_titre, texte
+    couleur = "#6F9CEB"
+
+Le tableau reprend le corps, et chaque niveau de bullet le rôle bullet, pour
+ce qu'ils ne précisent pas. Chaque rôle est compilé une fois en modèle
+a:rPr / w:rPr (ModeleRPr), posé sur les runs par clonage de ses éléments,
+sans passer par les proxys Font de python-pptx / python-docx. Les profils
+compilés sont gardés d'un traitement à l'autre (MAX_PROFILS).
+"""
+
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 : profils JSON uniquement
+    tomllib = None
+
+from .charte import (BULLET_COULEUR, BULLET_POLICE, BULLET_TAILLE, CORPS_COULEUR, CORPS_POLICE,
+                     CORPS_TAILLE, TITRE_COULEUR, TITRE_POLICE, TITRE_TAILLE,
+                     WORD_SOUS_TITRE_POLICE, WORD_SOUS_TITRE_TAILLE, WORD_TEXTE_POLICE,
+                     WORD_TEXTE_TAILLE, WORD_TITRE_COULEUR, WORD_TITRE_POLICE,
+                     WORD_TITRE_TAILLE, pt)
+
+# Dossier des profils désignés par leur nom (interface, API, --profil nom)
+PROFILS_DOSSIER = os.environ.get("ISPA_PROFILS_DIR")
+# Profil par défaut (nom ou chemin) ; sans lui, la charte ISPA
+PROFIL_DEFAUT = os.environ.get("ISPA_PROFIL")
+MAX_PROFILS = 32
+
+EXTENSIONS_PROFILS = (".toml", ".json")
+ROLES_PPTX = ("titre", "corps", "bullet", "tableau")
+ROLES_WORD = ("titre", "sous_titre", "texte")
+# Niveaux de bullet (2 à 9), comme dans l'interface : paragraph.level 1 à 8
+NIVEAUX_BULLETS = tuple(str(n) for n in range(2, 10))
+CLES_ROLE = ("police", "taille", "couleur")
+TAILLE_MAX_POINTS = 400
+NOM_PROFIL = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+COULEUR = re.compile(r"^#?([0-9A-Fa-f]{6})$")
+
+class ProfilInvalide(ValueError):
+    """Profil introuvable, illisible ou mal formé."""
+
+def _role(police, taille, couleur):
+    return {"police": police, "taille": taille / pt(1), "couleur": couleur}
+
+def donnees_charte():
+    """Profil complet de la charte ISPA (constantes de ispa.charte)."""
+    return {
+        "nom": "ISPA",
+        "pptx": {
+            "titre": _role(TITRE_POLICE, TITRE_TAILLE, TITRE_COULEUR),
+            "corps": _role(CORPS_POLICE, CORPS_TAILLE, CORPS_COULEUR),
+            "bullet": _role(BULLET_POLICE, BULLET_TAILLE, BULLET_COULEUR),
+        },
+        "word": {
+            "titre": _role(WORD_TITRE_POLICE, WORD_TITRE_TAILLE, WORD_TITRE_COULEUR),
+            # Sans couleur dans la charte : noir (les runs stylés reçoivent toujours une couleur)
+            "sous_titre": _role(WORD_SOUS_TITRE_POLICE, WORD_SOUS_TITRE_TAILLE, "000000"),
+            "texte": _role(WORD_TEXTE_POLICE, WORD_TEXTE_TAILLE, "000000"),
+        },
+    }
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+def _table(valeur, ou, cles):
+    if valeur is None:
+        return {}
+    if not isinstance(valeur, dict):
+        raise ProfilInvalide(f"{ou} : table attendue")
+    inconnues = sorted(set(valeur) - set(cles))
+    if inconnues:
+        raise ProfilInvalide(f"{ou} : clé(s) inconnue(s) {', '.join(inconnues)} "
+                             f"(attendues : {', '.join(cles)})")
+    return valeur
+
+def _completer_role(role, base, ou):
+    """Rôle du profil complété par `base` ; valeurs vérifiées et normalisées."""
+    role = _table(role, ou, CLES_ROLE)
+    complet = dict(base)
+    if "police" in role:
+        if not isinstance(role["police"], str) or not role["police"].strip():
+            raise ProfilInvalide(f"{ou}.police : nom de police attendu")
+        complet["police"] = role["police"].strip()
+    if "taille" in role:
+        taille = role["taille"]
+        if (isinstance(taille, bool) or not isinstance(taille, (int, float))
+                or not 0 < taille <= TAILLE_MAX_POINTS):
+            raise ProfilInvalide(f"{ou}.taille : points entre 0 et {TAILLE_MAX_POINTS} attendus")
+        complet["taille"] = float(taille)
+    if "couleur" in role:
+        trouve = COULEUR.match(str(role["couleur"]))
+        if trouve is None:
+            raise ProfilInvalide(f"{ou}.couleur : couleur hexadécimale attendue (\"6F9CEB\")")
+        complet["couleur"] = trouve.group(1).upper()
+    return complet
+
+def normaliser_profil(donnees, defaut=None):
+    """Profil complet : chaque rôle de `donnees` complété par `defaut` (charte ISPA)."""
+    defaut = defaut or donnees_charte()
+    donnees = _table(donnees, "profil", ("nom", "pptx", "word"))
+    pptx = _table(donnees.get("pptx"), "pptx", ROLES_PPTX + ("niveaux",))
+    word = _table(donnees.get("word"), "word", ROLES_WORD)
+
+    roles_pptx = {role: _completer_role(pptx.get(role), defaut["pptx"][role], f"pptx.{role}")
+                  for role in ("titre", "corps", "bullet")}
+    roles_pptx["tableau"] = _completer_role(pptx.get("tableau"), roles_pptx["corps"],
+                                            "pptx.tableau")
+    niveaux = _table(pptx.get("niveaux"), "pptx.niveaux", NIVEAUX_BULLETS)
+    roles_pptx["niveaux"] = {
+        niveau: _completer_role(niveaux.get(niveau), roles_pptx["bullet"],
+                                f"pptx.niveaux.{niveau}")
+        for niveau in NIVEAUX_BULLETS
+    }
+    return {
+        "nom": str(donnees.get("nom") or defaut["nom"]),
+        "pptx": roles_pptx,
+        "word": {role: _completer_role(word.get(role), defaut["word"][role], f"word.{role}")
+                 for role in ROLES_WORD},
+    }
+
+# ============================================================================
+# MODÈLES DE PROPRIÉTÉS DE CARACTÈRES
+# ============================================================================
+
+NAMESPACES = {"a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+              "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+
+def qn(tag):
+    prefixe, nom = tag.split(":")
+    return f"{{{NAMESPACES[prefixe]}}}{nom}"
+
+# Ordre des enfants de a:rPr / a:defRPr (CT_TextCharacterProperties) et de
+# w:rPr (CT_RPr), comme dans python-pptx / python-docx
+SEQUENCE_RPR_PPTX = ("a:ln", "a:noFill", "a:solidFill", "a:gradFill", "a:blipFill", "a:pattFill",
+                     "a:grpFill", "a:effectLst", "a:effectDag", "a:highlight", "a:uLnTx", "a:uLn",
+                     "a:uFillTx", "a:uFill", "a:latin", "a:ea", "a:cs", "a:sym", "a:hlinkClick",
+                     "a:hlinkMouseOver", "a:rtl", "a:extLst")
+REMPLISSAGES_PPTX = ("a:noFill", "a:solidFill", "a:gradFill", "a:blipFill", "a:pattFill",
+                     "a:grpFill")
+SEQUENCE_RPR_WORD = ("w:rStyle", "w:rFonts", "w:b", "w:bCs", "w:i", "w:iCs", "w:caps",
+                     "w:smallCaps", "w:strike", "w:dstrike", "w:outline", "w:shadow", "w:emboss",
+                     "w:imprint", "w:noProof", "w:snapToGrid", "w:vanish", "w:webHidden",
+                     "w:color", "w:spacing", "w:w", "w:kern", "w:position", "w:sz", "w:szCs",
+                     "w:highlight", "w:u", "w:effect", "w:bdr", "w:shd", "w:fitText",
+                     "w:vertAlign", "w:rtl", "w:cs", "w:em", "w:lang", "w:eastAsianLayout",
+                     "w:specVanish", "w:oMath")
+
+class ModeleRPr:
+    """Propriétés de caractères d'un rôle, compilées une fois, posées par clonage.
+
+    `attributs` sont posés sur l'élément (a:rPr, a:defRPr, w:rPr). Chaque
+    enfant du modèle remplace les enfants existants qu'il exclut (un seul
+    remplissage dans a:rPr...) par une copie de lui-même, insérée à son rang ;
+    un enfant « fusionné » (a:latin, w:rFonts, w:sz) reçoit seulement les
+    attributs du modèle et garde les autres, comme avec les proxys Font.
+    Rien n'est écrit sur un élément déjà conforme (document déjà traité).
+    """
+
+    def __init__(self, modele, sequence, remplaces=None, fusionnes=()):
+        self.attributs = list(modele.attrib.items())
+        remplaces = remplaces or {}
+        self.enfants = []
+        for enfant in modele:
+            tag = enfant.tag
+            rang = next(i for i, t in enumerate(sequence) if qn(t) == tag)
+            suivants = frozenset(qn(t) for t in sequence[rang + 1:])
+            exclus = frozenset(qn(t) for t in remplaces.get(tag, ())) | {tag}
+            self.enfants.append((enfant, exclus, tag in fusionnes, suivants))
+
+    def appliquer(self, rpr):
+        """Pose le modèle sur `rpr` ; retourne False s'il y était déjà conforme."""
+        modifie = poser_attributs(rpr, self.attributs)
+        for modele, exclus, fusionne, suivants in self.enfants:
+            existants = [e for e in rpr if e.tag in exclus]
+            if fusionne and existants:
+                modifie |= poser_attributs(existants[0], modele.attrib.items())
+                continue
+            if len(existants) == 1 and identiques(existants[0], modele):
+                continue
+            modifie = True
+            for existant in existants:
+                rpr.remove(existant)
+            copie = copy.deepcopy(modele)
+            suivant = next((e for e in rpr if e.tag in suivants), None)
+            if suivant is None:
+                rpr.append(copie)
+            else:
+                suivant.addprevious(copie)
+        return modifie
+
+def poser_attributs(element, attributs):
+    """Pose les attributs qui diffèrent ; True si l'un d'eux a été écrit."""
+    modifie = False
+    for nom, valeur in attributs:
+        if element.get(nom) != valeur:
+            element.set(nom, valeur)
+            modifie = True
+    return modifie
+
+def identiques(a, b):
+    """Même balise, mêmes attributs et mêmes enfants (éléments de propriétés, sans texte)."""
+    return (a.tag == b.tag and dict(a.attrib) == dict(b.attrib) and len(a) == len(b)
+            and all(identiques(x, y) for x, y in zip(a, b)))
+
+def modele_pptx(role):
+    """a:rPr du rôle : taille (centièmes de point), couleur unie et police latine."""
+    from lxml import etree
+
+    rpr = etree.Element(qn("a:rPr"), nsmap={"a": NAMESPACES["a"]},
+                        sz=str(pt(role["taille"]) // 127))
+    etree.SubElement(etree.SubElement(rpr, qn("a:solidFill")), qn("a:srgbClr"),
+                     val=role["couleur"])
+    etree.SubElement(rpr, qn("a:latin"), typeface=role["police"])
+    return ModeleRPr(rpr, SEQUENCE_RPR_PPTX,
+                     remplaces={qn("a:solidFill"): REMPLISSAGES_PPTX},
+                     fusionnes={qn("a:latin")})
+
+def modele_word(role):
+    """w:rPr du rôle : police (ascii, hAnsi), couleur et taille (demi-points)."""
+    from lxml import etree
+
+    rpr = etree.Element(qn("w:rPr"), nsmap={"w": NAMESPACES["w"]})
+    etree.SubElement(rpr, qn("w:rFonts"),
+                     {qn("w:ascii"): role["police"], qn("w:hAnsi"): role["police"]})
+    etree.SubElement(rpr, qn("w:color"), {qn("w:val"): role["couleur"]})
+    etree.SubElement(rpr, qn("w:sz"), {qn("w:val"): str(int(pt(role["taille"]) / pt(1) * 2))})
+    return ModeleRPr(rpr, SEQUENCE_RPR_WORD, fusionnes={qn("w:rFonts"), qn("w:sz")})
+
+# ============================================================================
+# PROFILS COMPILÉS
+# ============================================================================
+
+class Profil:
+    """Profil de marque complet ; ses modèles sont compilés au premier usage de chaque format.
+
+    empreinte : change dès qu'un rôle change (clé du cache des résultats).
+    Un Profil se transmet aux processus de travail par ses seules données.
+    """
+
+    def __init__(self, donnees):
+        self.donnees = donnees
+        self.nom = donnees["nom"]
+        self.empreinte = hashlib.sha256(
+            json.dumps(donnees, sort_keys=True).encode()).hexdigest()[:16]
+        self._verrou = threading.Lock()
+        self._pptx = None
+        self._word = None
+
+    def __reduce__(self):
+        return compiler_profil, (self.donnees,)
+
+    @property
+    def pptx(self):
+        """Modèles PowerPoint : "titre", "corps", "tableau" et "niveaux" (niveaux 1 à 8)."""
+        with self._verrou:
+            if self._pptx is None:
+                roles = self.donnees["pptx"]
+                self._pptx = {role: modele_pptx(roles[role])
+                              for role in ("titre", "corps", "tableau")}
+                self._pptx["niveaux"] = (None,) + tuple(modele_pptx(roles["niveaux"][niveau])
+                                                        for niveau in NIVEAUX_BULLETS)
+            return self._pptx
+
+    @property
+    def word(self):
+        """Modèles Word : "titre", "sous_titre" et "texte"."""
+        with self._verrou:
+            if self._word is None:
+                self._word = {role: modele_word(self.donnees["word"][role])
+                              for role in ROLES_WORD}
+            return self._word
+
+_profils = OrderedDict()
+_verrou_profils = threading.Lock()
+
+def _en_cache(cle, creer):
+    with _verrou_profils:
+        if cle in _profils:
+            _profils.move_to_end(cle)
+            return _profils[cle]
+    profil = creer()
+    with _verrou_profils:
+        _profils[cle] = profil
+        while len(_profils) > MAX_PROFILS:
+            _profils.popitem(last=False)
+    return profil
+
+def compiler_profil(donnees):
+    """Profil des données (complètes ou partielles), compilé une fois par processus."""
+    complet = normaliser_profil(donnees)
+    cle = json.dumps(complet, sort_keys=True)
+    return _en_cache(cle, lambda: Profil(complet))
+
+def lire_fichier_profil(chemin):
+    """Données d'un fichier de profil .toml ou .json."""
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension not in EXTENSIONS_PROFILS:
+        raise ProfilInvalide(f"{chemin} : extension .toml ou .json attendue")
+    try:
+        with open(chemin, "rb") as f:
+            if extension == ".json":
+                return json.load(f)
+            if tomllib is None:
+                raise ProfilInvalide(f"{chemin} : profils TOML non pris en charge (Python 3.11+)")
+            return tomllib.load(f)
+    except OSError as e:
+        raise ProfilInvalide(f"Profil illisible : {chemin} ({e.strerror})")
+    except ValueError as e:  # JSONDecodeError, TOMLDecodeError
+        raise ProfilInvalide(f"{chemin} : {e}")
+
+def chemin_profil(nom, dossier=None):
+    """Fichier du profil `nom` dans `dossier` (défaut : PROFILS_DOSSIER)."""
+    dossier = dossier or PROFILS_DOSSIER
+    if not dossier or not NOM_PROFIL.match(nom):
+        raise ProfilInvalide(f"Profil inconnu : {nom!r}")
+    for extension in EXTENSIONS_PROFILS:
+        chemin = os.path.join(dossier, nom + extension)
+        if os.path.isfile(chemin):
+            return chemin
+    raise ProfilInvalide(f"Profil inconnu : {nom!r}")
+
+def lister_profils(dossier=None):
+    """Noms des profils de `dossier` (défaut : PROFILS_DOSSIER), triés."""
+    dossier = dossier or PROFILS_DOSSIER
+    if not dossier or not os.path.isdir(dossier):
+        return []
+    return sorted({os.path.splitext(nom)[0] for nom in os.listdir(dossier)
+                   if nom.lower().endswith(EXTENSIONS_PROFILS)
+                   and NOM_PROFIL.match(os.path.splitext(nom)[0])})
+
+def charger_profil(source=None, dossier=None):
+    """Profil compilé : None (PROFIL_DEFAUT, sinon la charte), Profil, données, nom ou chemin.
+
+    Un nom désigne un fichier de `dossier` (PROFILS_DOSSIER) ; un fichier
+    n'est relu et recompilé que s'il a changé depuis le dernier chargement.
+    """
+    if source is None:
+        if not PROFIL_DEFAUT:
+            return compiler_profil({})
+        source = PROFIL_DEFAUT
+    if isinstance(source, Profil):
+        return source
+    if isinstance(source, dict):
+        return compiler_profil(source)
+    source = os.fspath(source)
+    chemin = source if os.path.isfile(source) else chemin_profil(source, dossier)
+    etat = os.stat(chemin)
+
+    def compiler():
+        donnees = lire_fichier_profil(chemin)
+        if isinstance(donnees, dict) and "nom" not in donnees:
+            donnees = {**donnees, "nom": os.path.splitext(os.path.basename(chemin))[0]}
+        return compiler_profil(donnees)
+    return _en_cache(("fichier", os.path.abspath(chemin), etat.st_mtime_ns, etat.st_size),
+                     compiler)
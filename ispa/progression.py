@@ -0,0 +1,325 @@
+"""Puits de progression des traitements : silencieux, enregistré, résumé, mesuré."""
+
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+# Nombre maximal de mises à jour de l'affichage par seconde
+MAX_MAJ_PROGRESSION_PAR_SECONDE = 4
+
+LIBELLES_EVENEMENTS = {
+    "titre": "titres",
+    "corps": "paragraphes",
+    "bullet": "bullets",
+    "logo_supprime": "anciens logos supprimés",
+    "favicon_supprime": "anciens favicons supprimés",
+    "logo_insere": "logos insérés",
+    "favicon_insere": "favicons insérés",
+    "slide_inchangee": "slides inchangées depuis le dernier traitement",
+    "document_inchange": "document déjà à jour",
+    "erreur": "avertissements",
+}
+
+# Contexte réutilisable des phases quand rien n'est mesuré
+SANS_MESURE = nullcontext()
+
+class ProgressionMuette:
+    """Puits d'événements de progression qui ne fait rien (mode sans interface).
+
+    Définit l'interface utilisée par les traitements :
+    - etape(message, fraction) : nouvelle phase (ouverture, masters, sauvegarde...)
+    - slide(idx, total) : début du traitement d'une slide
+    - evenement(type_evt, detail) : paragraphe stylé, logo supprimé, erreur...
+    - terminer(message) : fin du traitement
+    et celle des mesures, sans effet ici (voir ProgressionMesuree) :
+    - phase(nom) : bloc `with` chronométré (ouverture, slide, textes...)
+    - duree_phase(nom, secondes) : phase chronométrée ailleurs (processus de travail)
+    - compter(nom, n) : compteur (formes parcourues, runs stylés...)
+    """
+
+    # True si phase() et compter() sont réellement mesurés
+    mesures = False
+
+    def etape(self, message, fraction=None):
+        pass
+
+    def slide(self, idx, total):
+        pass
+
+    def evenement(self, type_evt, detail=None):
+        pass
+
+    def terminer(self, message):
+        pass
+
+    def phase(self, nom):
+        return SANS_MESURE
+
+    def duree_phase(self, nom, secondes):
+        pass
+
+    def compter(self, nom, n=1):
+        pass
+
+class PhasesChronometrees:
+    """phase(nom) chronométrée ; les phases imbriquées sont nommées par leur
+    chemin ("slide/textes"). Chaque durée est passée à _ajouter_phase()."""
+
+    def phase(self, nom):
+        if not self.mesures:
+            return SANS_MESURE
+        return self._chronometrer(nom)
+
+    @contextmanager
+    def _chronometrer(self, nom):
+        self._pile.append(nom)
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = time.perf_counter() - debut
+            chemin = "/".join(self._pile)
+            self._pile.pop()
+            self._ajouter_phase(chemin, duree)
+
+class ProgressionEnregistree(PhasesChronometrees, ProgressionMuette):
+    """Mémorise les événements pour les rejouer dans un autre puits.
+
+    Utilisé par les processus de travail, dont les événements sont renvoyés
+    au processus principal avec le résultat de chaque slide. Avec `mesures`,
+    les phases et compteurs sont aussi mémorisés (voir rejouer_mesures).
+    """
+
+    def __init__(self, mesures=False):
+        self.evenements = []
+        self.mesures = mesures
+        self.phases = []
+        self.compteurs = Counter()
+        self._pile = []
+
+    def evenement(self, type_evt, detail=None):
+        self.evenements.append((type_evt, detail))
+
+    def compter(self, nom, n=1):
+        if self.mesures:
+            self.compteurs[nom] += n
+
+    def _ajouter_phase(self, chemin, duree):
+        self.phases.append((chemin, duree))
+
+def rejouer_mesures(progression, phases, compteurs):
+    """Transmet à `progression` les mesures d'une ProgressionEnregistree."""
+    for chemin, duree in phases:
+        progression.duree_phase(chemin, duree)
+    for nom, n in compteurs.items():
+        progression.compter(nom, n)
+
+class ProgressionResumee(ProgressionMuette):
+    """Regroupe les événements en un résumé et limite les rafraîchissements de l'affichage.
+
+    Les compteurs sont tenus par slide (ou par étape) ; _afficher(fraction,
+    texte), à fournir par les sous-classes, n'est appelé qu'au plus
+    max_maj_par_seconde fois par seconde, quel que soit le nombre de
+    paragraphes traités.
+    """
+
+    def __init__(self, max_maj_par_seconde=MAX_MAJ_PROGRESSION_PAR_SECONDE):
+        self.intervalle = 1.0 / max_maj_par_seconde
+        self.compteurs = {}
+        self.erreurs = []
+        self.contexte = ""
+        self.fraction = 0.0
+        self._derniere_maj = None
+        self.rapport_medias = None
+
+    def _compteur(self):
+        if self.contexte not in self.compteurs:
+            self.compteurs[self.contexte] = Counter()
+        return self.compteurs[self.contexte]
+
+    def _resume(self):
+        compteur = self.compteurs.get(self.contexte)
+        if not compteur:
+            return self.contexte
+        details = ", ".join(f"{n} {LIBELLES_EVENEMENTS.get(t, t)}"
+                            for t, n in compteur.items())
+        return f"{self.contexte} — {details}"
+
+    def _rafraichir(self, forcer=False):
+        maintenant = time.monotonic()
+        if (not forcer and self._derniere_maj is not None
+                and maintenant - self._derniere_maj < self.intervalle):
+            return
+        self._derniere_maj = maintenant
+        self._afficher(min(max(self.fraction, 0.0), 1.0), self._resume())
+
+    def _afficher(self, fraction, texte):
+        raise NotImplementedError
+
+    def etape(self, message, fraction=None):
+        self.contexte = message
+        if fraction is not None:
+            self.fraction = fraction
+        self._rafraichir()
+
+    def slide(self, idx, total):
+        self.contexte = f"Slide {idx}/{total}"
+        self.fraction = idx / total
+        self._rafraichir()
+
+    def evenement(self, type_evt, detail=None):
+        if type_evt == "medias":
+            # Rapport d'optimisation des images, affiché à la fin
+            self.rapport_medias = detail
+            return
+        self._compteur()[type_evt] += 1
+        if type_evt == "erreur":
+            self.erreurs.append(f"{self.contexte} : {detail}")
+        self._rafraichir()
+
+    def totaux(self):
+        total = Counter()
+        for compteur in self.compteurs.values():
+            total.update(compteur)
+        return total
+
+    def terminer(self, message):
+        if self.rapport_medias:
+            message = (f"{message} Images : "
+                       f"{self.rapport_medias['octets_economises'] / 2**20:.1f} Mo économisés.")
+        self.contexte = message
+        self.fraction = 1.0
+        if self.erreurs:
+            self.contexte = f"{message} ({len(self.erreurs)} avertissement(s))"
+        self._rafraichir(forcer=True)
+
+class ProgressionTravail(ProgressionResumee):
+    """Résumé publié dans un Travail de la file.
+
+    Le traitement s'exécute hors de la page : la page lit travail.fraction et
+    travail.message à chaque sondage.
+    """
+
+    def __init__(self, travail, max_maj_par_seconde=MAX_MAJ_PROGRESSION_PAR_SECONDE):
+        super().__init__(max_maj_par_seconde)
+        self.travail = travail
+
+    def _afficher(self, fraction, texte):
+        self.travail.fraction = fraction
+        self.travail.message = texte
+
+# ---------------------------------------------------------------------------
+# MESURES DES PHASES
+# ---------------------------------------------------------------------------
+
+class ProgressionMesuree(PhasesChronometrees, ProgressionMuette):
+    """Chronomètre les phases et compte les événements, puis relaie tout à `cible`.
+
+    Chaque phase "slide" est aussi gardée individuellement (durées par
+    slide). Créée avant que le traitement ne démarre (travail en file),
+    demarrer() remet le chronomètre à zéro : l'attente est gardée à part
+    (attente_file). Exports : rapport() (dict), exporter_json() et
+    exporter_prometheus().
+    Sans ProgressionMesuree, phase() et compter() ne coûtent qu'un appel vide.
+    """
+
+    mesures = True
+
+    def __init__(self, cible=None):
+        self.cible = cible if cible is not None else ProgressionMuette()
+        self.phases = {}  # chemin → [secondes, appels]
+        self.durees_slides = []
+        self.compteurs = Counter()
+        self.duree_totale = None
+        self.attente_file = 0.0
+        self._pile = []
+        self._debut = time.perf_counter()
+
+    def demarrer(self):
+        """Début effectif du traitement : le temps écoulé depuis la création est de l'attente."""
+        maintenant = time.perf_counter()
+        self.attente_file = maintenant - self._debut
+        self._debut = maintenant
+
+    def etape(self, message, fraction=None):
+        self.cible.etape(message, fraction)
+
+    def slide(self, idx, total):
+        self.cible.slide(idx, total)
+
+    def evenement(self, type_evt, detail=None):
+        if type_evt != "medias":
+            self.compteurs[type_evt] += 1
+        self.cible.evenement(type_evt, detail)
+
+    def terminer(self, message):
+        self.duree_totale = time.perf_counter() - self._debut
+        self.cible.terminer(message)
+
+    def duree_phase(self, nom, secondes):
+        self._ajouter_phase("/".join(self._pile + [nom]), secondes)
+
+    def compter(self, nom, n=1):
+        self.compteurs[nom] += n
+
+    def _ajouter_phase(self, chemin, duree):
+        total = self.phases.setdefault(chemin, [0.0, 0])
+        total[0] += duree
+        total[1] += 1
+        if chemin == "slide":
+            self.durees_slides.append(duree)
+
+    def rapport(self):
+        duree_totale = self.duree_totale
+        if duree_totale is None:
+            duree_totale = time.perf_counter() - self._debut
+        return {
+            "duree_totale": round(duree_totale, 6),
+            "attente_file": round(self.attente_file, 6),
+            "phases": {chemin: {"secondes": round(secondes, 6), "appels": appels}
+                       for chemin, (secondes, appels) in sorted(self.phases.items())},
+            "compteurs": dict(sorted(self.compteurs.items())),
+            "slides": [round(d, 6) for d in self.durees_slides],
+        }
+
+    def exporter_json(self):
+        return json.dumps(self.rapport(), indent=2, ensure_ascii=False)
+
+    def exporter_prometheus(self, prefixe="ispa"):
+        """Rapport au format texte d'exposition Prometheus."""
+        rapport = self.rapport()
+        lignes = [
+            f"# HELP {prefixe}_traitement_secondes Durée totale du traitement",
+            f"# TYPE {prefixe}_traitement_secondes gauge",
+            f"{prefixe}_traitement_secondes {rapport['duree_totale']}",
+            f"# HELP {prefixe}_attente_file_secondes Attente dans la file avant le traitement",
+            f"# TYPE {prefixe}_attente_file_secondes gauge",
+            f"{prefixe}_attente_file_secondes {rapport['attente_file']}",
+            f"# HELP {prefixe}_phase_secondes_total Durée cumulée par phase (chemin des phases imbriquées)",
+            f"# TYPE {prefixe}_phase_secondes_total counter",
+        ]
+        lignes += [f'{prefixe}_phase_secondes_total{{phase="{etiquette_prometheus(chemin)}"}} '
+                   f'{phase["secondes"]}' for chemin, phase in rapport["phases"].items()]
+        lignes += [f"# HELP {prefixe}_phase_appels_total Nombre d'exécutions par phase",
+                   f"# TYPE {prefixe}_phase_appels_total counter"]
+        lignes += [f'{prefixe}_phase_appels_total{{phase="{etiquette_prometheus(chemin)}"}} '
+                   f'{phase["appels"]}' for chemin, phase in rapport["phases"].items()]
+        lignes += [f"# HELP {prefixe}_evenements_total Formes parcourues, runs stylés, logos...",
+                   f"# TYPE {prefixe}_evenements_total counter"]
+        lignes += [f'{prefixe}_evenements_total{{type="{etiquette_prometheus(nom)}"}} {n}'
+                   for nom, n in rapport["compteurs"].items()]
+        slides = rapport["slides"]
+        if slides:
+            lignes += [f"# HELP {prefixe}_slide_secondes Durée de traitement par slide",
+                       f"# TYPE {prefixe}_slide_secondes summary"]
+            tries = sorted(slides)
+            for quantile in (0.5, 0.9, 0.99):
+                valeur = tries[min(len(tries) - 1, int(quantile * len(tries)))]
+                lignes.append(f'{prefixe}_slide_secondes{{quantile="{quantile}"}} {valeur}')
+            lignes += [f"{prefixe}_slide_secondes_sum {round(sum(slides), 6)}",
+                       f"{prefixe}_slide_secondes_count {len(slides)}"]
+        return "\n".join(lignes) + "\n"
+
+def etiquette_prometheus(valeur):
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,189 @@
+"""Budget mémoire des traitements simultanés et tampons de sortie."""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+
+from .charte import MOTEUR
+
+# Les traitements simultanés réservent leur mémoire de pointe estimée dans un
+# budget commun ; au-delà, ils attendent une place puis sont refusés. Les
+# sorties dépassant SEUIL_SPOOL_OCTETS basculent sur disque et sont servies
+# depuis un fichier au moment du téléchargement.
+
+BUDGET_MEMOIRE_OCTETS = int(os.environ.get("ISPA_BUDGET_MEMOIRE_MO", 1536)) * 1024 * 1024
+SEUIL_SPOOL_OCTETS = 32 * 1024 * 1024
+ATTENTE_BUDGET_SECONDES = 60
+
+# Mémoire occupée par octet de XML décompressé (arbre lxml et proxys)
+FACTEUR_MEMOIRE_XML = 12
+# Processus de travail des slides (moteur zip, processus > 1) : interpréteur,
+# lxml et python-pptx chargés, plus une copie des masters et layouts chacun
+MEMOIRE_PROCESSUS_OCTETS = 96 * 1024 * 1024
+
+DOSSIER_TELECHARGEMENTS = (os.environ.get("ISPA_TELECHARGEMENTS_DIR")
+                           or os.path.join(tempfile.gettempdir(), "ispa_telechargements"))
+DUREE_TELECHARGEMENTS_SECONDES = 3600
+# Streamlit ne sert un téléchargement que depuis la mémoire : un résultat sur
+# disque est relu en entier au clic, hors budget. Au-delà de cette taille
+# (ISPA_TELECHARGEMENT_MAX_MO), l'interface ne le propose pas
+TELECHARGEMENT_MAX_OCTETS = int(os.environ.get("ISPA_TELECHARGEMENT_MAX_MO", 256)) * 1024 * 1024
+
+class BudgetMemoireDepasse(Exception):
+    """Le traitement ne tient pas dans le budget mémoire (tout de suite ou après attente)."""
+
+def tampon_sortie():
+    """Flux de sortie en mémoire, basculé sur disque au-delà de SEUIL_SPOOL_OCTETS."""
+    return tempfile.SpooledTemporaryFile(max_size=SEUIL_SPOOL_OCTETS)
+
+def estimer_memoire(fichier, moteur=MOTEUR, processus=1):
+    """Mémoire de pointe estimée d'un traitement, d'après le répertoire du zip.
+
+    Moteur zip : parties XML analysées et tampon de sortie ; moteur python :
+    en plus, toutes les parties chargées et la sortie complète. processus :
+    processus de travail des slides (voir convertir_pptx_zip), comptés chacun
+    avec ses masters et layouts.
+    """
+    try:
+        with zipfile.ZipFile(fichier) as archive:
+            infos = archive.infolist()
+    except zipfile.BadZipFile:
+        return SEUIL_SPOOL_OCTETS  # Refusé plus loin par le traitement lui-même
+    finally:
+        fichier.seek(0)
+    taille_xml = sum(info.file_size for info in infos
+                     if info.filename.endswith((".xml", ".rels")))
+    estimation = FACTEUR_MEMOIRE_XML * taille_xml + SEUIL_SPOOL_OCTETS
+    if moteur != "zip":
+        estimation += sum(info.file_size + info.compress_size for info in infos)
+    elif processus > 1:
+        taille_gabarits = sum(info.file_size for info in infos
+                              if info.filename.startswith(("ppt/slideMasters/",
+                                                           "ppt/slideLayouts/")))
+        estimation += processus * (MEMOIRE_PROCESSUS_OCTETS
+                                   + FACTEUR_MEMOIRE_XML * taille_gabarits)
+    return estimation
+
+class BudgetMemoire:
+    """Réservations de mémoire des traitements en cours, partagées entre sessions."""
+
+    def __init__(self, max_octets=BUDGET_MEMOIRE_OCTETS):
+        self.max_octets = max_octets
+        self.reserve = 0
+        self.en_cours = 0
+        self.en_attente = 0
+        self.refus = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserver(self, octets, attente=ATTENTE_BUDGET_SECONDES):
+        """Réserve `octets` le temps du bloc ; attend au plus `attente` secondes une place."""
+        with self._condition:
+            if octets > self.max_octets:
+                self.refus += 1
+                raise BudgetMemoireDepasse(
+                    f"Document trop volumineux pour ce serveur "
+                    f"({octets / 2**20:.0f} Mo estimés, budget {self.max_octets / 2**20:.0f} Mo)")
+            self.en_attente += 1
+            try:
+                place = self._condition.wait_for(
+                    lambda: self.reserve + octets <= self.max_octets, timeout=attente)
+            finally:
+                self.en_attente -= 1
+            if not place:
+                self.refus += 1
+                raise BudgetMemoireDepasse("Serveur occupé : réessayez dans quelques instants")
+            self.reserve += octets
+            self.en_cours += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.reserve -= octets
+                self.en_cours -= 1
+                self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {"reserve_octets": self.reserve, "budget_octets": self.max_octets,
+                    "en_cours": self.en_cours, "en_attente": self.en_attente,
+                    "refus": self.refus}
+
+def telechargeable(chemin):
+    """True si le résultat sur disque existe encore et tient dans TELECHARGEMENT_MAX_OCTETS."""
+    try:
+        return os.path.getsize(chemin) <= TELECHARGEMENT_MAX_OCTETS
+    except OSError:
+        return False
+
+def lire_fichier(chemin, max_octets=TELECHARGEMENT_MAX_OCTETS):
+    """Contenu complet d'un résultat sur disque, pour un bouton de téléchargement.
+
+    Le fichier entier passe en mémoire : lève ValueError au-delà de
+    `max_octets`. Les plus gros résultats passent par l'API (réponse envoyée
+    par blocs) ou la ligne de commande (écriture directe).
+    """
+    with open(chemin, "rb") as f:
+        if os.fstat(f.fileno()).st_size > max_octets:
+            raise ValueError(f"Résultat trop volumineux pour un téléchargement depuis l'interface "
+                             f"(plus de {max_octets / 2**20:.0f} Mo)")
+        return f.read()
+
+def purger_telechargements():
+    """Supprime les fichiers à télécharger plus anciens que DUREE_TELECHARGEMENTS_SECONDES."""
+    limite = time.time() - DUREE_TELECHARGEMENTS_SECONDES
+    for entree in os.scandir(DOSSIER_TELECHARGEMENTS):
+        try:
+            if entree.stat().st_mtime < limite:
+                os.unlink(entree.path)
+        except OSError:
+            pass
+
+def epingler_fichier(cle, chemin):
+    """Chemin d'une copie de `chemin` à télécharger, ou None si le fichier a disparu.
+
+    Lien physique quand c'est possible (copie sinon) dans DOSSIER_TELECHARGEMENTS,
+    conservé DUREE_TELECHARGEMENTS_SECONDES quel que soit le sort de l'original
+    (éviction du cache disque).
+    """
+    os.makedirs(DOSSIER_TELECHARGEMENTS, exist_ok=True)
+    purger_telechargements()
+    epingle = os.path.join(DOSSIER_TELECHARGEMENTS, cle)
+    temporaire = f"{epingle}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            os.link(chemin, temporaire)
+        except OSError:
+            if not os.path.exists(chemin):
+                return None
+            shutil.copyfile(chemin, temporaire)
+        os.replace(temporaire, epingle)
+    except OSError:
+        try:
+            os.unlink(temporaire)
+        except OSError:
+            pass
+        return None
+    return epingle
+
+def conserver_resultat(cle, flux, seuil=None):
+    """Octets du résultat, ou chemin d'une copie sur disque s'il dépasse `seuil`
+    (défaut : SEUIL_SPOOL_OCTETS ; 0 : toujours sur disque)."""
+    if seuil is None:
+        seuil = SEUIL_SPOOL_OCTETS
+    flux.seek(0, os.SEEK_END)
+    taille = flux.tell()
+    flux.seek(0)
+    if taille <= seuil:
+        return flux.read()
+    os.makedirs(DOSSIER_TELECHARGEMENTS, exist_ok=True)
+    purger_telechargements()
+    chemin = os.path.join(DOSSIER_TELECHARGEMENTS, cle)
+    with tempfile.NamedTemporaryFile(dir=DOSSIER_TELECHARGEMENTS, delete=False) as tmp:
+        shutil.copyfileobj(flux, tmp)
+    os.replace(tmp.name, chemin)
+    return chemin
@@ -0,0 +1,201 @@
+"""File de traitements partagée : travaux exécutés en arrière-plan, équitablement par utilisateur."""
+
+import os
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from .charte import COMPRESSION_INTERFACE, MOTEUR
+from .conversion import convertisseur
+from .progression import ProgressionTravail
+from .ressources import (BudgetMemoireDepasse, DUREE_TELECHARGEMENTS_SECONDES,
+                         conserver_resultat, estimer_memoire)
+
+# soumettre() dépose un travail et rend la main aussitôt ; l'appelant (la
+# page Streamlit) suit son avancement par sondage, d'après son identifiant.
+# Au plus TRAVAUX_SIMULTANES travaux s'exécutent à la fois dans le serveur,
+# dont TRAVAUX_PAR_UTILISATEUR par utilisateur ; les autres attendent et sont
+# démarrés à tour de rôle entre utilisateurs. Les résultats restent
+# téléchargeables DUREE_TELECHARGEMENTS_SECONDES.
+
+TRAVAUX_SIMULTANES = int(os.environ.get("ISPA_TRAVAUX_SIMULTANES", 0)) or os.cpu_count() or 1
+TRAVAUX_PAR_UTILISATEUR = int(os.environ.get("ISPA_TRAVAUX_PAR_UTILISATEUR", 1))
+# Les travaux simultanés occupent déjà les cœurs : chacun traite ses slides
+# sur un seul processus, quel que soit PROCESSUS_SLIDES
+PROCESSUS_PAR_TRAVAIL = 1
+# Travaux en attente acceptés par utilisateur, en plus de ceux en cours
+ATTENTE_MAX_PAR_UTILISATEUR = 5
+
+STATUTS_TERMINES = ("termine", "refuse", "echec")
+
+class TravailRefuse(Exception):
+    """L'utilisateur a déjà trop de travaux dans la file."""
+
+class Travail:
+    """Traitement déposé dans la file : état, progression et résultat.
+
+    statut : "en_attente", "en_cours", puis "termine", "refuse" (budget
+    mémoire) ou "echec".
+    """
+
+    def __init__(self, utilisateur, nom, executer, mesures=None):
+        self.id = uuid.uuid4().hex
+        self.utilisateur = utilisateur
+        self.nom = nom
+        self.executer = executer  # executer(progression) → résultat (octets ou chemin)
+        self.mesures = mesures
+        self.statut = "en_attente"
+        self.fraction = 0.0
+        self.message = "En attente d'une place..."
+        self.resultat = None
+        self.erreur = None
+        self.cree = time.time()
+        self.fin = None
+
+    @property
+    def termine(self):
+        return self.statut in STATUTS_TERMINES
+
+class FileTraitements:
+    """Travaux de tout le serveur, exécutés par un pool de threads borné (thread-safe)."""
+
+    def __init__(self, simultanes=TRAVAUX_SIMULTANES, par_utilisateur=TRAVAUX_PAR_UTILISATEUR,
+                 attente_max=ATTENTE_MAX_PAR_UTILISATEUR,
+                 duree_conservation=DUREE_TELECHARGEMENTS_SECONDES):
+        self.simultanes = simultanes
+        self.par_utilisateur = par_utilisateur
+        self.attente_max = attente_max
+        self.duree_conservation = duree_conservation
+        self._pool = ThreadPoolExecutor(max_workers=simultanes, thread_name_prefix="ispa-travail")
+        self._verrou = threading.Lock()
+        self._travaux = {}
+        self._attente = {}  # utilisateur → travaux en attente
+        self._en_cours = Counter()
+        # Utilisateur → numéro de son dernier démarrage : le moins récemment servi passe d'abord
+        self._derniers_services = {}
+        self._services = 0
+        self.soumis = 0
+        self.refus = 0
+
+    def soumettre(self, utilisateur, nom, executer, mesures=None):
+        """Dépose un travail et le démarre s'il y a une place ; lève TravailRefuse si la file
+        de l'utilisateur est pleine."""
+        with self._verrou:
+            self._purger()
+            en_attente = len(self._attente.get(utilisateur, ()))
+            if en_attente >= self.attente_max:
+                self.refus += 1
+                raise TravailRefuse(f"{en_attente} traitements déjà en attente : "
+                                    "patientez jusqu'à la fin de l'un d'eux")
+            travail = Travail(utilisateur, nom, executer, mesures)
+            self._travaux[travail.id] = travail
+            self._attente.setdefault(utilisateur, deque()).append(travail)
+            self.soumis += 1
+            self._distribuer()
+        return travail
+
+    def obtenir(self, id_travail):
+        with self._verrou:
+            self._purger()
+            return self._travaux.get(id_travail)
+
+    def position(self, travail):
+        """Rang du travail parmi ceux de son utilisateur en attente (0 : le prochain)."""
+        with self._verrou:
+            file = self._attente.get(travail.utilisateur, ())
+            return next((rang for rang, t in enumerate(file) if t is travail), None)
+
+    def _distribuer(self):
+        """Démarre des travaux tant qu'il reste des places, un par utilisateur à tour de rôle."""
+        while sum(self._en_cours.values()) < self.simultanes:
+            eligibles = [u for u in self._attente if self._en_cours[u] < self.par_utilisateur]
+            if not eligibles:
+                return
+            utilisateur = min(eligibles, key=lambda u: self._derniers_services.get(u, -1))
+            file = self._attente[utilisateur]
+            travail = file.popleft()
+            if not file:
+                del self._attente[utilisateur]
+            self._services += 1
+            self._derniers_services[utilisateur] = self._services
+            self._en_cours[utilisateur] += 1
+            travail.statut = "en_cours"
+            travail.message = "Démarrage..."
+            self._pool.submit(self._executer, travail)
+
+    def _executer(self, travail):
+        progression = ProgressionTravail(travail)
+        if travail.mesures is not None:
+            travail.mesures.cible = progression
+            travail.mesures.demarrer()
+            progression = travail.mesures
+        try:
+            travail.resultat = travail.executer(progression)
+            travail.statut = "termine"
+        except BudgetMemoireDepasse as e:
+            travail.erreur = str(e)
+            travail.statut = "refuse"
+        except Exception as e:
+            travail.erreur = str(e)
+            travail.statut = "echec"
+        finally:
+            travail.executer = None  # Libère les fichiers reçus
+            with self._verrou:
+                travail.fin = time.time()
+                self._en_cours[travail.utilisateur] -= 1
+                if not self._en_cours[travail.utilisateur]:
+                    del self._en_cours[travail.utilisateur]
+                    if travail.utilisateur not in self._attente:
+                        self._derniers_services.pop(travail.utilisateur, None)
+                self._distribuer()
+
+    def _purger(self):
+        limite = time.time() - self.duree_conservation
+        for id_travail in [i for i, t in self._travaux.items() if t.fin and t.fin < limite]:
+            del self._travaux[id_travail]
+
+    def stats(self):
+        with self._verrou:
+            statuts = Counter(t.statut for t in self._travaux.values())
+            return {"en_cours": statuts["en_cours"], "en_attente": statuts["en_attente"],
+                    "termines": statuts["termine"], "echecs": statuts["echec"] + statuts["refuse"],
+                    "soumis": self.soumis, "refus": self.refus,
+                    "simultanes": self.simultanes, "par_utilisateur": self.par_utilisateur}
+
+def travail_de_traitement(document, logo, favicon, est_pptx, medias, cle, cache, budget,
+                          profil=None, compression=COMPRESSION_INTERFACE):
+    """Fonction d'un travail : conversion sous budget mémoire, résultat conservé et mis en cache.
+
+    document, logo, favicon : flux déjà copiés (les fichiers reçus par la
+    page ne survivent pas forcément à la session). profil : profil de marque
+    déjà compilé (voir charger_profil), None pour celui par défaut.
+    compression : profil de compression du résultat, "rapide" par défaut pour
+    un téléchargement immédiat (voir COMPRESSION).
+    Le travail rend le chemin du résultat sur disque (DOSSIER_TELECHARGEMENTS) ;
+    seul le cache, borné, en garde les octets.
+    """
+    options = {"processus": PROCESSUS_PAR_TRAVAIL} if est_pptx and MOTEUR == "zip" else {}
+
+    def executer(progression):
+        try:
+            with ExitStack() as reservation:
+                # Attente d'une place dans le budget, mesurée à part du traitement
+                with progression.phase("attente_budget"):
+                    reservation.enter_context(
+                        budget.reserver(estimer_memoire(document, MOTEUR, PROCESSUS_PAR_TRAVAIL)))
+                with convertisseur(est_pptx)(document, logo, favicon, progression,
+                                             medias=medias, profil=profil,
+                                             compression=compression, **options) as output:
+                    resultat = conserver_resultat(cle, output)
+                    cache.put(cle, resultat)
+                    if not isinstance(resultat, str):
+                        # Le travail, gardé DUREE_TELECHARGEMENTS_SECONDES, ne retient
+                        # qu'un chemin : les octets en mémoire restent bornés par le cache
+                        resultat = conserver_resultat(cle, output, seuil=0)
+        finally:
+            document.close()
+        return resultat
+    return executer
@@ -0,0 +1,408 @@
+"""Charte ISPA appliquée aux documents Word (python-docx), moteurs python et zip.
+
+Importé au premier document Word traité (voir ispa.conversion).
+"""
+
+from functools import partial
+
+from docx import Document
+from docx.document import Document as DocumentWord
+from docx.enum.style import WD_STYLE_TYPE
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.pkgwriter import PackageWriter
+from docx.oxml.ns import qn
+from docx.oxml.parser import OxmlElement
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+from .charte import (COMPRESSION, LOGO_HEIGHT, LOGO_WIDTH, OPTIMISER_MEDIAS, STYLE_WORD,
+                     STYLES_WORD, WORD_SUBTIT_STYLE_NAMES, WORD_TITLE_STYLE_NAMES)
+from .images import ImagesDuTraitement
+from .medias import enregistrer_sortie
+from .paquet import EcrivainZip, MembresOpc, PaquetZip, PartieZip
+from .profils import charger_profil
+from .progression import ProgressionMuette
+
+# ============================================================================
+# TRAITEMENT WORD
+# ============================================================================
+
+def styler_runs_word(p, modele):
+    """Pose le modèle du rôle (profils.ModeleRPr) sur chaque run d'un paragraphe w:p."""
+    for r in p.r_lst:
+        modele.appliquer(r.get_or_add_rPr())
+
+NS_WORD = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+
+# Tous les paragraphes d'une partie, dans l'ordre du document : corps, tableaux,
+# zones de texte (w:txbxContent)
+XPATH_PARAGRAPHES_WORD = etree.XPath(".//w:p", namespaces=NS_WORD)
+XPATH_DESSINS_WORD = etree.XPath(".//w:drawing", namespaces=NS_WORD)
+XPATH_IMAGES_DESSINS_WORD = etree.XPath(
+    ".//w:drawing//a:blip/@r:embed",
+    namespaces={**NS_WORD,
+                "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+                "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships"},
+)
+
+def est_logo_actuel(element, part, images):
+    """Tous les dessins de `element` affichent déjà le logo du traitement (document traité
+    auparavant) : rien à remplacer."""
+    rIds = XPATH_IMAGES_DESSINS_WORD(element)
+    if not rIds:
+        return False
+    for rId in rIds:
+        try:
+            image = (part.related_part(rId) if isinstance(part, PartieZip)
+                     else part.related_parts[rId])
+        except KeyError:
+            return False
+        if images.reconnaitre(image) != "logo":
+            return False
+    return True
+
+def categorie_style_word(nom):
+    """"TITLE", "SUB" ou None d'après le nom du style (sous-chaîne, sans casse)."""
+    if not nom:
+        return None
+    nom = nom.lower()
+    if any(s.lower() in nom for s in WORD_TITLE_STYLE_NAMES):
+        return "TITLE"
+    if any(s.lower() in nom for s in WORD_SUBTIT_STYLE_NAMES):
+        return "SUB"
+    return None
+
+def classer_styles_word(styles):
+    """Table styleId → catégorie des styles de paragraphe, calculée une fois par document.
+
+    Un style dont le nom ne correspond à rien prend la catégorie de son style
+    parent (chaîne w:basedOn). La clé None porte la catégorie du style de
+    paragraphe par défaut, utilisé par les paragraphes sans style ou dont le
+    style est inconnu (comme python-docx).
+    """
+    noms, parents, defaut = {}, {}, None
+    for style in styles.style_lst:
+        if style.type != WD_STYLE_TYPE.PARAGRAPH or style.styleId is None:
+            continue
+        noms[style.styleId] = style.name_val
+        parents[style.styleId] = style.basedOn_val
+        if style.default:
+            defaut = style.styleId
+
+    categories = {}
+    for style_id in noms:
+        chaine = []
+        courant = style_id
+        while courant in noms and courant not in categories and courant not in chaine:
+            chaine.append(courant)
+            if categorie_style_word(noms[courant]):
+                break
+            courant = parents[courant]
+        # Catégorie du premier style reconnu de la chaîne (ou déjà classé)
+        categorie = categories.get(courant, categorie_style_word(noms.get(courant)))
+        for vu in chaine:
+            categories[vu] = categorie
+    categories[None] = categories.get(defaut)
+    return categories
+
+def categorie_paragraphe(p, categories):
+    style_id = p.style
+    return categories.get(style_id if style_id in categories else None)
+
+def appliquer_style_texte_word(p, categories, profil, is_title_fallback=False, progression=None):
+    """Style un paragraphe (élément w:p) ; retourne False s'il est vide."""
+    txt = p.text.strip()
+    if not txt:
+        return False
+
+    modeles = profil.word
+    categorie = categorie_paragraphe(p, categories)
+    if progression:
+        progression.compter("runs", len(p.r_lst))
+    if categorie == "TITLE":
+        styler_runs_word(p, modeles["titre"])
+        return True
+    if categorie == "SUB":
+        styler_runs_word(p, modeles["sous_titre"])
+        return True
+
+    is_bullet = (txt.startswith("- ") or txt.startswith("* "))
+    if is_bullet:
+        styler_runs_word(p, modeles["sous_titre"])
+    elif is_title_fallback:
+        styler_runs_word(p, modeles["titre"])
+    else:
+        styler_runs_word(p, modeles["texte"])
+    return True
+
+# ---------------------------------------------------------------------------
+# STYLES WORD AU NIVEAU DES DÉFINITIONS (STYLE_WORD = "styles")
+# ---------------------------------------------------------------------------
+
+# Propriétés des runs portés directement par un paragraphe (ceux que le mode
+# "runs" met en forme)
+XPATH_RPR_RUNS_WORD = etree.XPath(".//w:p/w:r/w:rPr", namespaces=NS_WORD)
+ATTRIBUTS_POLICE_WORD = [qn(a) for a in ("w:ascii", "w:hAnsi", "w:asciiTheme", "w:hAnsiTheme")]
+
+def definir_rpr_word(rPr, modele):
+    """Comme styler_runs_word, sur le w:rPr d'un style ou des valeurs par défaut."""
+    modele.appliquer(rPr)
+    # Une police de thème (w:asciiTheme) l'emporterait sur w:ascii
+    for attribut in ATTRIBUTS_POLICE_WORD[2:]:
+        rPr.rFonts.attrib.pop(attribut, None)
+
+def retirer_surcharges_rpr_word(rPr):
+    """Retire police, taille et couleur d'un w:rPr ; le supprime s'il devient vide."""
+    for enfant_rpr in (rPr.sz, rPr.color):
+        if enfant_rpr is not None:
+            rPr.remove(enfant_rpr)
+    if rPr.rFonts is not None:
+        for attribut in ATTRIBUTS_POLICE_WORD:
+            rPr.rFonts.attrib.pop(attribut, None)
+        if not rPr.rFonts.attrib:
+            rPr.remove(rPr.rFonts)
+    if not len(rPr) and not rPr.attrib:
+        rPr.getparent().remove(rPr)
+
+def retirer_surcharges_word(element):
+    for rPr in XPATH_RPR_RUNS_WORD(element):
+        retirer_surcharges_rpr_word(rPr)
+
+def rpr_par_defaut_word(styles):
+    """w:docDefaults/w:rPrDefault/w:rPr, créé si besoin."""
+    parent = styles
+    for tag in ("w:docDefaults", "w:rPrDefault", "w:rPr"):
+        element = parent.find(qn(tag))
+        if element is None:
+            element = OxmlElement(tag)
+            if tag == "w:rPr":
+                parent.append(element)
+            else:
+                parent.insert(0, element)
+        parent = element
+    return parent
+
+def definir_styles_word(styles, profil):
+    """Met les définitions de styles de paragraphe aux couleurs du profil.
+
+    Titres et sous-titres (par leur nom) et le style par défaut sont
+    redéfinis ; les autres styles de paragraphe perdent leurs police, taille
+    et couleur propres et en héritent (w:basedOn, valeurs par défaut).
+    """
+    modeles = profil.word
+    definir_rpr_word(rpr_par_defaut_word(styles), modeles["texte"])
+    for style in styles.style_lst:
+        if style.type != WD_STYLE_TYPE.PARAGRAPH:
+            continue
+        categorie = categorie_style_word(style.name_val)
+        if categorie == "TITLE":
+            definir_rpr_word(style.get_or_add_rPr(), modeles["titre"])
+        elif categorie == "SUB":
+            definir_rpr_word(style.get_or_add_rPr(), modeles["sous_titre"])
+        elif style.default:
+            definir_rpr_word(style.get_or_add_rPr(), modeles["texte"])
+        elif style.rPr is not None:
+            retirer_surcharges_rpr_word(style.rPr)
+
+def appliquer_style_herite_word(p, categories, profil, is_title_fallback=False,
+                                progression=None):
+    """Mode "styles" : seuls les paragraphes que leur style ne décrit pas
+    (titre par défaut, puces saisies) reçoivent une mise en forme propre."""
+    categorie = categorie_paragraphe(p, categories)
+    if categorie is not None and not is_title_fallback:
+        return True  # Rien à écrire : le texte n'est pas nécessaire
+
+    txt = p.text.strip()
+    if not txt:
+        return False
+
+    if categorie is None:
+        if txt.startswith("- ") or txt.startswith("* "):
+            styler_runs_word(p, profil.word["sous_titre"])
+        elif is_title_fallback:
+            styler_runs_word(p, profil.word["titre"])
+        else:
+            return True
+        if progression:
+            progression.compter("runs", len(p.r_lst))
+    return True
+
+def ajouter_logo(run, images):
+    """Logo en fin de `run`, nommé comme le fichier fourni (python-docx : "image.png"
+    pour une image reçue en flux)."""
+    forme = run.add_picture(images.flux("logo"), width=LOGO_WIDTH, height=LOGO_HEIGHT)
+    if images.noms["logo"]:
+        forme._inline.graphic.graphicData.pic.nvPicPr.cNvPr.name = images.noms["logo"]
+
+def remplacer_image_paragraphe(paragraph, images, progression):
+    """Remplace la première image d'un paragraphe par le logo ; True si remplacée."""
+    for run in paragraph.runs:
+        if XPATH_DESSINS_WORD(run._element):
+            if est_logo_actuel(run._element, paragraph.part, images):
+                return True
+            run._element.clear()
+            progression.evenement("logo_supprime")
+            ajouter_logo(paragraph.add_run(), images)
+            progression.evenement("logo_insere")
+            return True
+    return False
+
+def en_tetes_et_pieds(doc):
+    """Définitions d'en-têtes / pieds de page propres (non liées à la section précédente)."""
+    for section in doc.sections:
+        for entete in (section.header, section.first_page_header, section.even_page_header,
+                       section.footer, section.first_page_footer, section.even_page_footer):
+            if not entete.is_linked_to_previous:
+                yield entete
+
+def brander_document(doc, images, progression, style=STYLE_WORD, profil=None):
+    """Applique la charte ISPA (logo, styles) à un document Word ouvert.
+
+    Partagé par les deux moteurs, comme brander_presentation.
+    style : "runs" ou "styles", voir STYLE_WORD.
+    profil : profil de marque des textes (voir charger_profil ; défaut : la charte).
+    """
+    if style not in STYLES_WORD:
+        raise ValueError(f"Style inconnu : {style}")
+    profil = charger_profil(profil)
+
+    with progression.phase("classement_styles"):
+        categories = classer_styles_word(doc.styles.element)
+    if style == "styles":
+        progression.etape("Définitions de styles...", 0.2)
+        with progression.phase("definitions_styles"):
+            definir_styles_word(doc.styles.element, profil)
+        # Moteur zip : la partie sera réécrite (python-docx réécrit toujours tout)
+        doc.part._styles_part.modifiee = True
+        appliquer = appliquer_style_herite_word
+    else:
+        appliquer = appliquer_style_texte_word
+    if progression.mesures:
+        appliquer = partial(appliquer, profil=profil, progression=progression)
+    else:
+        appliquer = partial(appliquer, profil=profil)
+
+    # En-têtes - on ne gère que le logo principal pour Word
+    progression.etape("Traitement des en-têtes...", 0.3)
+    with progression.phase("entetes"):
+        for section_idx, section in enumerate(doc.sections, start=1):
+            header = section.header
+            # Un en-tête lié au précédent partage sa définition : déjà traité
+            if header.is_linked_to_previous:
+                continue
+            # Logo déjà à jour (document traité auparavant) : l'en-tête reste tel quel
+            if est_logo_actuel(header._element, header.part, images):
+                continue
+            logo_found = False
+
+            for para in header.paragraphs:
+                for run in para.runs:
+                    if XPATH_DESSINS_WORD(run._element):
+                        logo_found = True
+                        run._element.clear()
+                        progression.evenement("logo_supprime")
+
+            if logo_found:
+                ajouter_logo(header.paragraphs[0].add_run(), images)
+                progression.evenement("logo_insere")
+
+        # Textes des en-têtes et pieds de page (jamais de titre)
+        for entete in en_tetes_et_pieds(doc):
+            if style == "styles":
+                retirer_surcharges_word(entete._element)
+            paragraphes = XPATH_PARAGRAPHES_WORD(entete._element)
+            progression.compter("paragraphes", len(paragraphes))
+            for p in paragraphes:
+                appliquer(p, categories)
+
+    # Corps en une passe : 1ère image remplacée par le logo, puis styles.
+    # Logo et titre par défaut ne concernent que les paragraphes de premier
+    # niveau ; tableaux et zones de texte sont stylés comme le corps.
+    progression.etape("Logo et styles du corps...", 0.5)
+    with progression.phase("corps"):
+        body = doc.element.body
+        if style == "styles":
+            retirer_surcharges_word(body)
+        found_first_image = False
+        found_title = False
+        paragraphes = XPATH_PARAGRAPHES_WORD(body)
+        progression.compter("paragraphes", len(paragraphes))
+        for p in paragraphes:
+            premier_niveau = p.getparent() is body
+            if premier_niveau and not found_first_image:
+                found_first_image = remplacer_image_paragraphe(Paragraph(p, doc._body),
+                                                               images, progression)
+            if premier_niveau and not found_title:
+                found_title = appliquer(p, categories, is_title_fallback=True)
+            else:
+                appliquer(p, categories)
+
+def convertir_docx(fichier_entree, logo_path, favicon_path, progression=None, style=STYLE_WORD,
+                   sortie=None, medias=OPTIMISER_MEDIAS, profil=None, compression=COMPRESSION):
+    """Traite un document Word, logo d'en-tête et styles (moteur python-docx).
+
+    Lève l'exception d'origine en cas d'échec, comme convertir_pptx.
+    """
+    if progression is None:
+        progression = ProgressionMuette()
+
+    progression.etape("Ouverture du fichier Word...")
+    with progression.phase("ouverture"):
+        doc = Document(fichier_entree)
+    with progression.phase("images"):
+        images = ImagesDuTraitement(logo_path)
+    brander_document(doc, images, progression, style, profil)
+
+    # Sauvegarder
+    progression.etape("Sauvegarde...")
+    output = enregistrer_sortie(partial(enregistrer_document, doc), sortie, medias,
+                                progression, compression)
+    
+    progression.terminer("✅ Document Word traité avec succès!")
+    
+    return output
+
+def enregistrer_document(doc, sortie, compression=COMPRESSION):
+    """Comme doc.save(sortie), chaque partie passant par un EcrivainZip ; retourne ce dernier."""
+    paquet = doc.part.package
+    parties = paquet.parts
+    for partie in parties:
+        partie.before_marshal()
+    ecrivain = EcrivainZip(sortie, compression)
+    membres = MembresOpc(ecrivain)
+    PackageWriter._write_content_types_stream(membres, parties)
+    PackageWriter._write_pkg_rels(membres, paquet.rels)
+    PackageWriter._write_parts(membres, parties)
+    ecrivain.fermer()
+    return ecrivain
+
+def convertir_docx_zip(fichier_entree, logo_path, favicon_path, progression=None,
+                       style=STYLE_WORD, sortie=None, medias=OPTIMISER_MEDIAS, profil=None,
+                       compression=COMPRESSION):
+    """Comme convertir_docx, sans décompresser ni recompresser les médias.
+
+    Un document déjà à jour (traité auparavant avec les mêmes réglages) est
+    rendu octet pour octet.
+    """
+    if progression is None:
+        progression = ProgressionMuette()
+
+    progression.etape("Ouverture du fichier Word...")
+    with progression.phase("ouverture"):
+        paquet = PaquetZip(fichier_entree, "docx")
+        partie = paquet.partie_liee("", RT.OFFICE_DOCUMENT)
+        partie.modifiee = True
+    try:
+        with progression.phase("images"):
+            images = ImagesDuTraitement(logo_path)
+        brander_document(DocumentWord(partie.element, partie), images, progression, style,
+                         profil)
+
+        progression.etape("Sauvegarde...")
+        output = enregistrer_sortie(paquet.enregistrer, sortie, medias, progression,
+                                    compression)
+    finally:
+        paquet.fermer()
+
+    progression.terminer("✅ Document Word traité avec succès!")
+    return output
@@ -0,0 +1,30 @@
+"""Documents synthétiques partagés par les tests (benchmarks/generateurs.py)."""
+
+import os
+import sys
+
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [RACINE, os.path.join(RACINE, "benchmarks")]
+
+import generateurs  # noqa: E402
+from ispa.charte import SEUIL_SLIDES_PARALLELE  # noqa: E402
+
+@pytest.fixture(scope="session")
+def documents(tmp_path_factory):
+    """Chemins d'une présentation (assez de slides pour le traitement
+    parallèle), d'un document Word, d'un logo et d'un favicon."""
+    dossier = tmp_path_factory.mktemp("documents")
+    chemins = {
+        "pptx": generateurs.generer_pptx(str(dossier / "deck.pptx"),
+                                         slides=SEUIL_SLIDES_PARALLELE + 5, media_ko=20),
+        "docx": generateurs.generer_docx(str(dossier / "rapport.docx"), pages=6, media_ko=20),
+        "logo": str(dossier / "logo.png"),
+        "favicon": str(dossier / "favicon.png"),
+    }
+    with open(chemins["logo"], "wb") as f:
+        f.write(generateurs.image_png((10, 120, 200, 255), (300, 300)))
+    with open(chemins["favicon"], "wb") as f:
+        f.write(generateurs.image_png((250, 200, 0, 255), (400, 200)))
+    return chemins
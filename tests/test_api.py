@@ -0,0 +1,154 @@
+"""API HTTP : serveur réel sur un port libre, requêtes par http.client."""
+
+import http.client
+import io
+import json
+import threading
+import uuid
+import zipfile
+
+import pytest
+
+import api
+
+JETON = "jeton-de-test"
+
+@pytest.fixture
+def serveur(tmp_path):
+    serveur = api.ServeurApi(("127.0.0.1", 0), str(tmp_path / "actifs"), simultanes=2,
+                             jeton=JETON)
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
+    thread.join()
+
+@pytest.fixture
+def connexion(serveur):
+    connexion = http.client.HTTPConnection("127.0.0.1", serveur.server_address[1], timeout=60)
+    yield connexion
+    connexion.close()
+
+def requete(connexion, methode, chemin, corps=None, entetes=None, jeton=JETON):
+    """(statut, en-têtes, octets) ; la réponse est lue en entière (connexion réutilisable)."""
+    entetes = dict(entetes or {})
+    if jeton:
+        entetes["Authorization"] = f"Bearer {jeton}"
+    connexion.request(methode, chemin, body=corps, headers=entetes)
+    reponse = connexion.getresponse()
+    return reponse.status, reponse.headers, reponse.read()
+
+def multipart(champs):
+    """Corps multipart/form-data et son Content-Type ; champs : {nom: texte ou (fichier, octets)}."""
+    frontiere = uuid.uuid4().hex
+    corps = io.BytesIO()
+    for nom, valeur in champs.items():
+        corps.write(f"--{frontiere}\r\n".encode())
+        if isinstance(valeur, tuple):
+            nom_fichier, octets = valeur
+            corps.write(f'Content-Disposition: form-data; name="{nom}"; '
+                        f'filename="{nom_fichier}"\r\n\r\n'.encode())
+            corps.write(octets)
+        else:
+            corps.write(f'Content-Disposition: form-data; name="{nom}"\r\n\r\n'.encode())
+            corps.write(valeur.encode())
+        corps.write(b"\r\n")
+    corps.write(f"--{frontiere}--\r\n".encode())
+    return corps.getvalue(), f"multipart/form-data; boundary={frontiere}"
+
+def lire(chemin):
+    with open(chemin, "rb") as f:
+        return f.read()
+
+def partie_principale(octets):
+    with zipfile.ZipFile(io.BytesIO(octets)) as archive:
+        noms = archive.namelist()
+    return next(nom for nom in ("ppt/presentation.xml", "word/document.xml") if nom in noms)
+
+def test_conversion_multipart(documents, connexion):
+    corps, type_contenu = multipart({
+        "document": ("deck.pptx", lire(documents["pptx"])),
+        "logo": ("logo.png", lire(documents["logo"])),
+        "favicon": ("favicon.png", lire(documents["favicon"])),
+        "compression": "rapide",
+    })
+    statut, entetes, octets = requete(connexion, "POST", "/convertir", corps,
+                                      {"Content-Type": type_contenu})
+    assert statut == 200, octets
+    assert "ISPA_deck.pptx" in entetes["Content-Disposition"]
+    assert partie_principale(octets) == "ppt/presentation.xml"
+
+def test_conversion_corps_brut_et_actifs(documents, connexion):
+    statut, _, octets = requete(connexion, "PUT", "/actifs/logo.png", lire(documents["logo"]))
+    assert statut == 201, octets
+    _, _, octets = requete(connexion, "GET", "/actifs")
+    assert [actif["nom"] for actif in json.loads(octets)["actifs"]] == ["logo.png"]
+
+    statut, entetes, octets = requete(connexion, "POST",
+                                      "/convertir?logo=logo.png&nom=rapport.docx",
+                                      lire(documents["docx"]))
+    assert statut == 200, octets
+    assert "ISPA_rapport.docx" in entetes["Content-Disposition"]
+    assert partie_principale(octets) == "word/document.xml"
+
+    assert requete(connexion, "DELETE", "/actifs/logo.png")[0] == 200
+    assert requete(connexion, "DELETE", "/actifs/logo.png")[0] == 404
+    statut, _, octets = requete(connexion, "POST", "/convertir?logo=logo.png",
+                                lire(documents["docx"]))
+    assert statut == 404, octets
+
+def test_jeton_exige(connexion):
+    statut, entetes, _ = requete(connexion, "GET", "/actifs", jeton=None)
+    assert statut == 401
+    assert entetes["WWW-Authenticate"] == "Bearer"
+    assert requete(connexion, "GET", "/actifs", jeton="autre")[0] == 401
+    assert requete(connexion, "GET", "/sante", jeton=None)[0] == 200
+
+def test_envoi_trop_volumineux(connexion):
+    # Refusé d'après Content-Length, avant toute lecture du corps
+    connexion.putrequest("POST", "/convertir")
+    connexion.putheader("Authorization", f"Bearer {JETON}")
+    connexion.putheader("Content-Length", str(api.MAX_ENVOI_OCTETS + 1))
+    connexion.endheaders()
+    reponse = connexion.getresponse()
+    assert reponse.status == 413
+    assert reponse.will_close
+    reponse.read()
+
+def test_logo_multipart_trop_volumineux(documents, connexion, monkeypatch):
+    monkeypatch.setattr(api, "MAX_IMAGE_OCTETS", 1024)
+    corps, type_contenu = multipart({
+        "document": ("deck.pptx", lire(documents["pptx"])),
+        "logo": ("logo.png", bytes(4096)),
+    })
+    statut, _, octets = requete(connexion, "POST", "/convertir", corps,
+                                {"Content-Type": type_contenu})
+    assert statut == 413, octets
+
+def test_types_refuses(documents, connexion):
+    assert requete(connexion, "PUT", "/actifs/logo.png", b"pas une image")[0] == 415
+    corps, type_contenu = multipart({
+        "document": ("notes.txt", b"pas un document"),
+        "logo": ("logo.png", lire(documents["logo"])),
+    })
+    statut, _, octets = requete(connexion, "POST", "/convertir", corps,
+                                {"Content-Type": type_contenu})
+    assert statut == 415, octets
+    corps, type_contenu = multipart({
+        "document": ("deck.pptx", lire(documents["pptx"])),
+        "logo": ("logo.png", b"pas une image"),
+    })
+    assert requete(connexion, "POST", "/convertir", corps,
+                   {"Content-Type": type_contenu})[0] == 415
+
+def test_connexion_gardee_entre_requetes(documents, connexion):
+    assert requete(connexion, "PUT", "/actifs/logo.png", lire(documents["logo"]))[0] == 201
+    socket = connexion.sock
+    for _ in range(2):
+        statut, entetes, _ = requete(connexion, "POST", "/convertir?logo=logo.png",
+                                     lire(documents["docx"]))
+        assert statut == 200
+        assert entetes.get("Connection", "").lower() != "close"
+    assert requete(connexion, "GET", "/sante")[0] == 200
+    assert connexion.sock is socket
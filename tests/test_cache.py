@@ -0,0 +1,123 @@
+"""Cache des résultats : LRU mémoire, tier disque, épinglage, compteurs et clés."""
+
+import os
+import time
+
+import pytest
+
+from ispa import MANIFESTE_SLIDES, ressources
+from ispa.cache import CacheResultats, cle_cache, options_cle
+
+@pytest.fixture
+def telechargements(tmp_path, monkeypatch):
+    dossier = str(tmp_path / "telechargements")
+    monkeypatch.setattr(ressources, "DOSSIER_TELECHARGEMENTS", dossier)
+    return dossier
+
+def vieillir(cache, cle, secondes):
+    """Recule la date de dernier accès d'une entrée du tier disque."""
+    date = time.time() - secondes
+    os.utime(cache._chemin(cle), (date, date))
+
+# ----------------------------------------------------------------------------
+# TIER MÉMOIRE
+# ----------------------------------------------------------------------------
+
+def test_eviction_lru_en_memoire():
+    cache = CacheResultats(max_octets_memoire=25)
+    cache.put("a", b"a" * 10)
+    cache.put("b", b"b" * 10)
+    assert cache.get("a") == b"a" * 10  # a devient le plus récent
+    cache.put("c", b"c" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"a" * 10
+    assert cache.get("c") == b"c" * 10
+    stats = cache.stats()
+    assert (stats["evictions_memoire"], stats["entrees_memoire"], stats["octets_memoire"]) == (
+        1, 2, 20)
+
+def test_entree_trop_grosse_pour_la_memoire():
+    cache = CacheResultats(max_octets_memoire=100, max_octets_entree_memoire=10)
+    cache.put("grand", b"x" * 11)
+    assert cache.get("grand") is None
+    assert cache.stats()["octets_memoire"] == 0
+
+def test_compteurs_et_taux_de_hits():
+    cache = CacheResultats()
+    assert cache.stats()["taux_hits"] == 0.0
+    cache.put("a", b"a")
+    cache.get("a")
+    cache.get("a")
+    cache.get("absent")
+    stats = cache.stats()
+    assert (stats["hits_memoire"], stats["misses"]) == (2, 1)
+    assert stats["taux_hits"] == pytest.approx(2 / 3)
+
+# ----------------------------------------------------------------------------
+# TIER DISQUE
+# ----------------------------------------------------------------------------
+
+def test_tier_disque_apres_redemarrage(tmp_path):
+    dossier = str(tmp_path / "cache")
+    CacheResultats(dossier=dossier).put("a", b"resultat")
+    cache = CacheResultats(dossier=dossier)  # Mémoire vide
+    assert cache.get("a") == b"resultat"
+    assert cache.get("a") == b"resultat"  # Remonté en mémoire
+    stats = cache.stats()
+    assert (stats["hits_disque"], stats["hits_memoire"]) == (1, 1)
+
+def test_eviction_du_tier_disque_par_date_d_acces(tmp_path):
+    # max_octets_memoire=0 : chaque get passe par le disque
+    cache = CacheResultats(max_octets_memoire=0, dossier=str(tmp_path / "cache"),
+                           max_octets_disque=25)
+    cache.put("a", b"a" * 10)
+    vieillir(cache, "a", 100)
+    cache.put("b", b"b" * 10)
+    vieillir(cache, "b", 50)
+    assert cache.get("a") == b"a" * 10  # Accès récent : a passe devant b
+    cache.put("c", b"c" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"a" * 10
+    assert cache.stats()["evictions_disque"] == 1
+
+def test_grand_resultat_epingle(tmp_path, telechargements):
+    cache = CacheResultats(dossier=str(tmp_path / "cache"), max_octets_entree_memoire=10)
+    source = tmp_path / "resultat"
+    source.write_bytes(b"x" * 100)
+    cache.put("grand", str(source))
+    assert cache.stats()["entrees_memoire"] == 0
+
+    epingle = cache.get("grand")
+    assert epingle == os.path.join(telechargements, "grand")
+    # L'éviction du tier disque ne retire pas la copie à télécharger
+    os.unlink(cache._chemin("grand"))
+    with open(epingle, "rb") as f:
+        assert f.read() == b"x" * 100
+    assert cache.get("grand") is None
+    assert cache.stats()["misses"] == 1
+
+# ----------------------------------------------------------------------------
+# CLÉS
+# ----------------------------------------------------------------------------
+
+def test_cle_cache_stable():
+    cle = cle_cache(b"document", b"logo", None, options="o")
+    assert cle == cle_cache(bytearray(b"document"), memoryview(b"logo"), options="o")
+    assert len({cle, cle_cache(b"document", b"logo", b"favicon", options="o"),
+                cle_cache(b"document", b"autre logo", options="o"),
+                cle_cache(b"document", b"logo", options="p")}) == 4
+
+def test_options_cle_couvrent_les_reglages():
+    base = options_cle(True)
+    assert base == options_cle(True, medias=False, profil=None, noms_images=(None, None))
+    variantes = [
+        options_cle(False),
+        options_cle(True, medias=True),
+        options_cle(True, compression="stockage"),
+        options_cle(True, moteur="autre"),
+        options_cle(True, manifeste=not MANIFESTE_SLIDES),
+        options_cle(True, placement="autre"),
+        options_cle(True, profil={"nom": "autre", "pptx": {"titre": {"taille": 40}}}),
+        options_cle(True, noms_images=("logo.png", None)),
+    ]
+    assert len({base, *variantes}) == len(variantes) + 1
@@ -0,0 +1,69 @@
+"""Ligne de commande : sélection des fichiers et traitement par lots."""
+
+import os
+import shutil
+
+import pytest
+
+import cli
+
+def creer(chemin, contenu=b""):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    with open(chemin, "wb") as f:
+        f.write(contenu)
+    return chemin
+
+def test_lister_fichiers(tmp_path, capsys):
+    racine = str(tmp_path)
+    dossier = os.path.join(racine, "dossier")
+    for relatif in ("a.pptx", "sous/b.DOCX", "sous/~$b.docx", "notes.txt"):
+        creer(os.path.join(dossier, relatif))
+    partage = os.path.join(racine, "partage")
+    creer(os.path.join(partage, "2024", "c.pptx"))
+    creer(os.path.join(partage, "2024", "d.docx"))
+    seul = creer(os.path.join(racine, "seul.docx"))
+
+    fichiers = cli.lister_fichiers([
+        dossier,
+        os.path.join(partage, "**", "*.pptx"),
+        seul,
+        os.path.join(dossier, "a.pptx"),  # Déjà listé : ignoré
+        os.path.join(racine, "absent.pptx"),
+    ])
+    relatifs = [relatif for _, relatif in fichiers]
+    assert relatifs == ["a.pptx", os.path.join("sous", "b.DOCX"),
+                        os.path.join("2024", "c.pptx"), "seul.docx"]
+    assert "absent.pptx" in capsys.readouterr().err
+    assert (cli.chemin_sortie("sortie", relatifs[1])
+            == os.path.join("sortie", "sous", "ISPA_b.DOCX"))
+
+def test_lot_poursuivi_apres_un_echec(documents, tmp_path, capsys):
+    entrees = str(tmp_path / "entrees")
+    shutil.copy(documents["docx"], creer(os.path.join(entrees, "rapport.docx")))
+    creer(os.path.join(entrees, "abime.pptx"), b"pas un zip")
+    sortie = str(tmp_path / "sortie")
+
+    code = cli.main([entrees, "--logo", documents["logo"], "-o", sortie, "-j", "1"])
+    assert code == 1
+    assert sorted(os.listdir(sortie)) == ["ISPA_rapport.docx"]
+    sortie_console = capsys.readouterr()
+    assert "Réussis : 1   Échecs : 1" in sortie_console.out
+    assert "abime.pptx" in sortie_console.err
+
+    # Fichiers déjà convertis ignorés sans --ecraser
+    assert cli.main([os.path.join(entrees, "rapport.docx"), "--logo", documents["logo"],
+                     "-o", sortie]) == 0
+    assert "Aucun document à traiter" in capsys.readouterr().out
+
+def test_erreur_d_ouverture_rapportee_telle_quelle(documents, tmp_path):
+    absent = str(tmp_path / "absent.pptx")
+    with pytest.raises(FileNotFoundError) as erreur:
+        cli.traiter_fichier(absent, str(tmp_path / "ISPA_absent.pptx"), documents["logo"], None)
+    assert erreur.value.filename == absent
+
+def test_defauts_de_la_charte():
+    args = cli.construire_parser().parse_args(["x", "--logo", "l", "-o", "o"])
+    assert (args.moteur, args.compression, args.processus_slides, args.medias) == (
+        cli.MOTEUR, cli.COMPRESSION, cli.PROCESSUS_SLIDES, cli.OPTIMISER_MEDIAS)
+    assert not cli.construire_parser().parse_args(
+        ["x", "--logo", "l", "-o", "o", "--no-medias"]).medias
@@ -0,0 +1,48 @@
+"""Profils de compression et compression parallèle des parties réécrites."""
+
+import io
+import zipfile
+
+import pytest
+
+import ispa
+from ispa import paquet
+from ispa.paquet import EcrivainZip
+
+from test_moteurs import convertir
+
+@pytest.mark.parametrize("compression", ispa.COMPRESSIONS)
+@pytest.mark.parametrize("moteur", ("zip", "python"))
+@pytest.mark.parametrize("format_", ("pptx", "docx"))
+def test_profil_de_compression_donne_un_zip_valide(documents, format_, moteur, compression):
+    octets = convertir(documents, format_, moteur, compression=compression)
+    with zipfile.ZipFile(documents[format_]) as archive:
+        origine = {info.filename: archive.read(info) for info in archive.infolist()}
+    with zipfile.ZipFile(io.BytesIO(octets)) as archive:
+        assert archive.testzip() is None
+        # Membres réécrits (le moteur zip recopie les autres bruts)
+        methodes = {info.compress_type for info in archive.infolist()
+                    if archive.read(info) != origine.get(info.filename)}
+    assert methodes
+    if compression == "stockage":
+        assert methodes == {zipfile.ZIP_STORED}
+
+def reecrire(chemin, parallele, compression="standard"):
+    """Tous les membres de `chemin` recompressés par un EcrivainZip."""
+    sortie = io.BytesIO()
+    with zipfile.ZipFile(chemin) as archive:
+        ecrivain = EcrivainZip(sortie, compression, parallele=parallele)
+        for info in archive.infolist():
+            ecrivain.ecrire(info.filename, archive.read(info), info.date_time)
+        ecrivain.fermer()
+    return sortie.getvalue()
+
+@pytest.mark.parametrize("attente_max", (paquet.ATTENTE_MAX_OCTETS, 1))
+def test_compression_parallele_identique_au_sequentiel(documents, monkeypatch, attente_max):
+    # Toutes les parties passent par le pool ; attente_max=1 : écriture au fil de l'eau
+    monkeypatch.setattr(paquet, "SEUIL_COMPRESSION_THREAD", 0)
+    monkeypatch.setattr(paquet, "ATTENTE_MAX_OCTETS", attente_max)
+    parallele = reecrire(documents["pptx"], parallele=True)
+    assert parallele == reecrire(documents["pptx"], parallele=False)
+    with zipfile.ZipFile(io.BytesIO(parallele)) as archive:
+        assert archive.testzip() is None
@@ -0,0 +1,69 @@
+"""Détection des anciens logos et pose du nouveau logo."""
+
+import io
+import zipfile
+
+import pytest
+from pptx import Presentation
+from pptx.util import Cm
+
+import generateurs
+import ispa
+
+MOTEURS = (ispa.MOTEUR, "python")
+
+@pytest.fixture(scope="module")
+def logo_sur_slides(tmp_path_factory):
+    """Présentation sans logo sur les masters, l'ancien logo collé sur chaque slide."""
+    chemin = str(tmp_path_factory.mktemp("logos") / "slides.pptx")
+    generateurs.generer_pptx(chemin, slides=3, logos_master=False, medias=0)
+    pres = Presentation(chemin)
+    ancien_logo = generateurs.image_png((200, 30, 30, 255))
+    for slide in pres.slides:
+        slide.shapes.add_picture(io.BytesIO(ancien_logo), Cm(0.5), Cm(0.5), Cm(2), Cm(2))
+    pres.save(chemin)
+    return chemin
+
+def evenements(chemin, documents, moteur, detection):
+    progression = ispa.ProgressionEnregistree()
+    with open(chemin, "rb") as f:
+        ispa.convertisseur(True, moteur)(f, documents["logo"], None, progression,
+                                         detection=detection).close()
+    return [type_evt for type_evt, _ in progression.evenements]
+
+@pytest.mark.parametrize("detection", ispa.DETECTIONS_LOGOS)
+@pytest.mark.parametrize("moteur", MOTEURS)
+def test_logo_propre_a_chaque_slide_remplace(documents, logo_sur_slides, moteur, detection):
+    # Aucun logo sur les masters : les empreintes retombent sur la position
+    types = evenements(logo_sur_slides, documents, moteur, detection)
+    assert types.count("logo_supprime") == 3
+    assert types.count("logo_insere") == 3
+
+@pytest.mark.parametrize("moteur", MOTEURS)
+def test_logo_des_masters_pose_une_fois(documents, moteur):
+    types = evenements(documents["pptx"], documents, moteur, "empreintes")
+    assert types.count("logo_insere") == 1  # Sur le master, les slides en héritent
+
+def descriptions_images(octets, format_):
+    """Noms (docx) ou descriptions (pptx) des images du document, par partie."""
+    from lxml import etree
+    with zipfile.ZipFile(io.BytesIO(octets)) as archive:
+        parties = [nom for nom in archive.namelist() if nom.endswith(".xml")
+                   and nom.startswith(("ppt/slideMasters/", "word/header", "word/document"))]
+        xpath = "//p:cNvPr/@descr" if format_ == "pptx" else "//pic:cNvPr/@name"
+        espaces = {"p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+                   "pic": "http://schemas.openxmlformats.org/drawingml/2006/picture"}
+        return {valeur for nom in parties
+                for valeur in etree.fromstring(archive.read(nom)).xpath(xpath, namespaces=espaces)}
+
+@pytest.mark.parametrize("moteur", MOTEURS)
+@pytest.mark.parametrize("format_", ("pptx", "docx"))
+def test_logo_insere_decrit_par_son_nom_de_fichier(documents, format_, moteur):
+    est_pptx = format_ == "pptx"
+    with open(documents["logo"], "rb") as f:
+        logo = f.read()
+    sans_nom = io.BytesIO(logo)
+    for source, attendu in ((documents["logo"], "logo.png"), (sans_nom, "image.png")):
+        with open(documents[format_], "rb") as f:
+            with ispa.convertisseur(est_pptx, moteur)(f, source, None) as sortie:
+                assert attendu in descriptions_images(sortie.read(), format_)
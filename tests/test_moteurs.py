@@ -0,0 +1,58 @@
+"""Moteurs zip et python : mêmes documents, résultats reproductibles."""
+
+import io
+import zipfile
+
+import pytest
+from lxml import etree
+
+import ispa
+
+FORMATS = ("pptx", "docx")
+
+def convertir(documents, format_, moteur="zip", entree=None, progression=None, **options):
+    """Octets du document converti (favicon pour PowerPoint seulement)."""
+    est_pptx = format_ == "pptx"
+    favicon = documents["favicon"] if est_pptx else None
+    if entree is None:
+        with open(documents[format_], "rb") as f:
+            entree = f.read()
+    with ispa.convertisseur(est_pptx, moteur)(io.BytesIO(entree), documents["logo"], favicon,
+                                              progression, **options) as sortie:
+        return sortie.read()
+
+def membres(octets):
+    """Contenu de chaque membre de l'archive, XML sous forme canonique."""
+    with zipfile.ZipFile(io.BytesIO(octets)) as archive:
+        return {nom: (etree.tostring(etree.fromstring(archive.read(nom)), method="c14n")
+                      if nom.endswith((".xml", ".rels")) else archive.read(nom))
+                for nom in archive.namelist()}
+
+@pytest.mark.parametrize("format_", FORMATS)
+def test_moteur_zip_equivalent_au_moteur_python(documents, format_):
+    # Le manifeste des slides n'est écrit que par le moteur zip
+    options = {"manifeste": False} if format_ == "pptx" else {}
+    zip_ = membres(convertir(documents, format_, "zip", **options))
+    python = membres(convertir(documents, format_, "python"))
+    assert sorted(zip_) == sorted(python)
+    assert [nom for nom in zip_ if zip_[nom] != python[nom]] == []
+
+@pytest.mark.parametrize("medias", (False, True))
+def test_slides_paralleles_identiques_au_sequentiel(documents, medias):
+    sequentiel = convertir(documents, "pptx", processus=1, medias=medias)
+    parallele = convertir(documents, "pptx", processus=2, medias=medias)
+    assert parallele == sequentiel
+
+@pytest.mark.parametrize("format_", FORMATS)
+def test_conversion_reproductible(documents, format_):
+    assert convertir(documents, format_) == convertir(documents, format_)
+
+@pytest.mark.parametrize("medias", (False, True))
+@pytest.mark.parametrize("format_", FORMATS)
+def test_document_deja_traite_rendu_tel_quel(documents, format_, medias):
+    premier = convertir(documents, format_, medias=medias)
+    progression = ispa.ProgressionEnregistree()
+    second = convertir(documents, format_, entree=premier, progression=progression,
+                       medias=medias)
+    assert second == premier
+    assert "document_inchange" in [type_evt for type_evt, _ in progression.evenements]
@@ -0,0 +1,88 @@
+"""Profils de marque : validation et modèles de propriétés de caractères."""
+
+import re
+
+import pytest
+from lxml import etree
+
+from ispa.profils import (ProfilInvalide, charger_profil, donnees_charte, modele_pptx,
+                          modele_word, normaliser_profil, qn)
+
+ROLE = {"police": "Lexend", "taille": 10.5, "couleur": "6F9CEB"}
+A = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+# ----------------------------------------------------------------------------
+# VALIDATION
+# ----------------------------------------------------------------------------
+
+def test_profil_complete_par_la_charte():
+    charte = donnees_charte()
+    profil = normaliser_profil({"nom": "Marque", "pptx": {"titre": {"taille": 36},
+                                                          "niveaux": {"3": {"couleur": "#ff0000"}}},
+                                "word": {"texte": {"police": " Arial "}}})
+    assert profil["nom"] == "Marque"
+    assert profil["pptx"]["titre"] == {**charte["pptx"]["titre"], "taille": 36.0}
+    assert profil["pptx"]["tableau"] == profil["pptx"]["corps"] == charte["pptx"]["corps"]
+    assert profil["pptx"]["niveaux"]["3"] == {**charte["pptx"]["bullet"], "couleur": "FF0000"}
+    assert profil["pptx"]["niveaux"]["2"] == charte["pptx"]["bullet"]
+    assert profil["word"]["texte"]["police"] == "Arial"
+    assert normaliser_profil({})["word"] == charte["word"]
+
+@pytest.mark.parametrize("donnees, message", [
+    ([], "profil : table attendue"),
+    ({"pptx": {"sous_titre": {}}}, "clé(s) inconnue(s) sous_titre"),
+    ({"pptx": {"titre": {"gras": True}}}, "pptx.titre : clé(s) inconnue(s) gras"),
+    ({"pptx": {"niveaux": {"1": {}}}}, "pptx.niveaux : clé(s) inconnue(s) 1"),
+    ({"pptx": {"corps": {"taille": 0}}}, "pptx.corps.taille"),
+    ({"pptx": {"corps": {"taille": 401}}}, "pptx.corps.taille"),
+    ({"pptx": {"corps": {"taille": True}}}, "pptx.corps.taille"),
+    ({"word": {"titre": {"taille": "12"}}}, "word.titre.taille"),
+    ({"word": {"titre": {"couleur": "bleu"}}}, "word.titre.couleur"),
+    ({"word": {"texte": {"police": " "}}}, "word.texte.police"),
+])
+def test_profil_invalide(donnees, message):
+    with pytest.raises(ProfilInvalide, match=re.escape(message)):
+        normaliser_profil(donnees)
+
+def test_profil_inconnu(tmp_path):
+    with pytest.raises(ProfilInvalide, match="Profil inconnu"):
+        charger_profil("absent", dossier=str(tmp_path))
+    with pytest.raises(ProfilInvalide, match="Profil inconnu"):
+        charger_profil("../secret", dossier=str(tmp_path))
+
+# ----------------------------------------------------------------------------
+# MODÈLES
+# ----------------------------------------------------------------------------
+
+def test_modele_pptx_en_centiemes_de_point():
+    element = etree.fromstring(f'<a:rPr {A} lang="fr-FR" sz="1800"><a:noFill/>'
+                               '<a:latin typeface="Arial" panose="020B0604020202020204"/></a:rPr>')
+    modele = modele_pptx(ROLE)
+    assert modele.appliquer(element)
+    assert element.get("sz") == "1050"
+    assert element.get("lang") == "fr-FR"
+    # Remplissage remplacé ; police latine fusionnée (panose gardé) et laissée après lui
+    assert [enfant.tag for enfant in element] == [qn("a:solidFill"), qn("a:latin")]
+    assert element.find(f"{qn('a:solidFill')}/{qn('a:srgbClr')}").get("val") == "6F9CEB"
+    latin = element.find(qn("a:latin"))
+    assert (latin.get("typeface"), latin.get("panose")) == ("Lexend", "020B0604020202020204")
+
+def test_modele_word_en_demi_points():
+    element = etree.fromstring(f'<w:rPr {W}><w:b/><w:sz w:val="48"/></w:rPr>')
+    assert modele_word(ROLE).appliquer(element)
+    assert element.find(qn("w:sz")).get(qn("w:val")) == "21"
+    assert [enfant.tag for enfant in element] == [qn("w:rFonts"), qn("w:b"), qn("w:color"),
+                                                   qn("w:sz")]
+    assert element.find(qn("w:rFonts")).get(qn("w:ascii")) == "Lexend"
+
+@pytest.mark.parametrize("modele, vide", [
+    (modele_pptx(ROLE), f"<a:rPr {A}/>"),
+    (modele_word(ROLE), f"<w:rPr {W}/>"),
+])
+def test_modele_idempotent(modele, vide):
+    element = etree.fromstring(vide)
+    assert modele.appliquer(element)
+    avant = etree.tostring(element)
+    assert not modele.appliquer(element)
+    assert etree.tostring(element) == avant
@@ -0,0 +1,170 @@
+"""Puits de progression : rafraîchissements de l'affichage et mesures des phases."""
+
+import json
+
+import pytest
+
+from ispa import progression
+from ispa.progression import (ProgressionEnregistree, ProgressionMesuree, ProgressionResumee,
+                              ProgressionTravail, rejouer_mesures)
+
+class Horloge:
+    """time.monotonic / time.perf_counter de test, avancée à la main."""
+
+    def __init__(self, maintenant=0.0):
+        self.maintenant = maintenant
+
+    def __call__(self):
+        return self.maintenant
+
+@pytest.fixture
+def horloge(monkeypatch):
+    horloge = Horloge()
+    monkeypatch.setattr(progression.time, "monotonic", horloge)
+    return horloge
+
+@pytest.fixture
+def chronometre(monkeypatch):
+    chronometre = Horloge(100.0)
+    monkeypatch.setattr(progression.time, "perf_counter", chronometre)
+    return chronometre
+
+# ----------------------------------------------------------------------------
+# AFFICHAGE
+# ----------------------------------------------------------------------------
+
+class Affichage(ProgressionResumee):
+    """Note chaque rafraîchissement : (instant, fraction, texte)."""
+
+    def __init__(self, horloge, max_maj_par_seconde):
+        super().__init__(max_maj_par_seconde)
+        self.horloge = horloge
+        self.affichages = []
+
+    def _afficher(self, fraction, texte):
+        self.affichages.append((self.horloge(), fraction, texte))
+
+def test_rafraichissements_limites(horloge):
+    affichage = Affichage(horloge, max_maj_par_seconde=4)
+    for centieme in range(200):  # 2 s, un événement tous les centièmes
+        horloge.maintenant = centieme / 100
+        affichage.slide(centieme // 10 + 1, 20)
+        affichage.evenement("titre")
+    instants = [instant for instant, _, _ in affichage.affichages]
+    assert instants == [0.0, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 1.75]
+    _, fraction, texte = affichage.affichages[-1]
+    # Compteurs de la slide affichée, cumulés entre deux rafraîchissements
+    assert (fraction, texte) == (0.9, "Slide 18/20 — 5 titres")
+
+def test_terminer_force_le_dernier_affichage(horloge):
+    affichage = Affichage(horloge, max_maj_par_seconde=1)
+    affichage.etape("Ouverture", 0.0)
+    horloge.maintenant = 0.1
+    affichage.evenement("erreur", "image illisible")
+    affichage.terminer("✅ Terminé.")  # Dans l'intervalle : affiché quand même
+    assert affichage.affichages == [
+        (0.0, 0.0, "Ouverture"),
+        (0.1, 1.0, "✅ Terminé. (1 avertissement(s))"),
+    ]
+    assert affichage.erreurs == ["Ouverture : image illisible"]
+
+def test_fraction_bornee_et_publiee_dans_le_travail(horloge):
+    class Travail:
+        fraction, message = 0.0, ""
+
+    travail = Travail()
+    suivi = ProgressionTravail(travail)
+    suivi.etape("Sauvegarde", 1.5)
+    assert (travail.fraction, travail.message) == (1.0, "Sauvegarde")
+
+# ----------------------------------------------------------------------------
+# MESURES
+# ----------------------------------------------------------------------------
+
+def test_phases_imbriquees(chronometre):
+    mesures = ProgressionMesuree()
+    for _ in range(2):
+        with mesures.phase("slide"):
+            chronometre.maintenant += 1
+            with mesures.phase("textes"):
+                chronometre.maintenant += 0.5
+            mesures.duree_phase("medias", 0.25)  # Mesurée dans un autre processus
+    with mesures.phase("sauvegarde"):
+        chronometre.maintenant += 2
+    assert mesures.rapport()["phases"] == {
+        "sauvegarde": {"secondes": 2.0, "appels": 1},
+        "slide": {"secondes": 3.0, "appels": 2},
+        "slide/medias": {"secondes": 0.5, "appels": 2},
+        "slide/textes": {"secondes": 1.0, "appels": 2},
+    }
+    assert mesures.durees_slides == [1.5, 1.5]
+
+def test_attente_de_la_file_gardee_a_part(chronometre):
+    mesures = ProgressionMesuree()
+    chronometre.maintenant += 3  # En file
+    mesures.demarrer()
+    chronometre.maintenant += 5
+    mesures.terminer("Terminé")
+    rapport = mesures.rapport()
+    assert (rapport["attente_file"], rapport["duree_totale"]) == (3.0, 5.0)
+
+def test_rejouer_mesures_d_un_processus_de_travail(chronometre):
+    travail = ProgressionEnregistree(mesures=True)
+    with travail.phase("textes"):
+        chronometre.maintenant += 0.5
+        with travail.phase("runs"):
+            chronometre.maintenant += 0.25
+    travail.compter("runs_styles", 3)
+    travail.evenement("titre")
+
+    mesures = ProgressionMesuree()
+    with mesures.phase("slide"):
+        rejouer_mesures(mesures, travail.phases, travail.compteurs)
+    assert mesures.phases == {"slide": [0.0, 1], "slide/textes/runs": [0.25, 1],
+                              "slide/textes": [0.75, 1]}
+    assert mesures.compteurs == {"runs_styles": 3}
+
+    # Sans mesures, le processus de travail ne garde que les événements
+    muet = ProgressionEnregistree()
+    with muet.phase("textes"):
+        muet.compter("runs_styles")
+    assert (muet.phases, muet.compteurs) == ([], {})
+
+def mesures_de_test():
+    mesures = ProgressionMesuree()
+    for duree in (0.1, 0.3, 0.2):
+        mesures.duree_phase("slide", duree)
+    mesures.duree_phase("slide/textes", 0.4)
+    mesures.compter("formes", 12)
+    mesures.evenement("logo_insere")
+    mesures.compter('type "cité"')
+    mesures.duree_totale = 1.5
+    return mesures
+
+def test_export_json():
+    rapport = json.loads(mesures_de_test().exporter_json())
+    assert rapport == {
+        "duree_totale": 1.5,
+        "attente_file": 0.0,
+        "phases": {"slide": {"secondes": 0.6, "appels": 3},
+                   "slide/textes": {"secondes": 0.4, "appels": 1}},
+        "compteurs": {"formes": 12, "logo_insere": 1, 'type "cité"': 1},
+        "slides": [0.1, 0.3, 0.2],
+    }
+
+def test_export_prometheus():
+    texte = mesures_de_test().exporter_prometheus(prefixe="test")
+    assert texte.endswith("\n")
+    lignes = texte.splitlines()
+    for ligne in ("test_traitement_secondes 1.5",
+                  'test_phase_secondes_total{phase="slide/textes"} 0.4',
+                  'test_phase_appels_total{phase="slide"} 3',
+                  'test_evenements_total{type="formes"} 12',
+                  'test_evenements_total{type="type \\"cité\\""} 1',
+                  'test_slide_secondes{quantile="0.5"} 0.2',
+                  "test_slide_secondes_count 3"):
+        assert ligne in lignes
+    # Chaque série précédée de ses lignes HELP et TYPE
+    series = {ligne.split("{")[0].split(" ")[0] for ligne in lignes if not ligne.startswith("#")}
+    types = {ligne.split(" ")[2] for ligne in lignes if ligne.startswith("# TYPE")}
+    assert {serie.removesuffix("_sum").removesuffix("_count") for serie in series} == types
@@ -0,0 +1,121 @@
+"""Budget mémoire, estimation de la mémoire d'un traitement et résultats conservés."""
+
+import io
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+
+import ispa
+from ispa import ressources
+from ispa.ressources import (FACTEUR_MEMOIRE_XML, MEMOIRE_PROCESSUS_OCTETS, BudgetMemoire,
+                             BudgetMemoireDepasse, conserver_resultat, estimer_memoire)
+
+@pytest.fixture
+def telechargements(tmp_path, monkeypatch):
+    dossier = str(tmp_path / "telechargements")
+    monkeypatch.setattr(ressources, "DOSSIER_TELECHARGEMENTS", dossier)
+    return dossier
+
+# ----------------------------------------------------------------------------
+# BUDGET MÉMOIRE
+# ----------------------------------------------------------------------------
+
+def test_budget_refuse_un_document_trop_gros():
+    budget = BudgetMemoire(100)
+    with pytest.raises(BudgetMemoireDepasse, match="trop volumineux"):
+        with budget.reserver(101):
+            pass
+    assert budget.stats()["refus"] == 1
+
+def test_budget_attend_une_place_liberee():
+    budget = BudgetMemoire(100)
+    liberer = threading.Event()
+    reserve = threading.Event()
+
+    def occuper():
+        with budget.reserver(80):
+            reserve.set()
+            liberer.wait(10)
+
+    thread = threading.Thread(target=occuper)
+    thread.start()
+    assert reserve.wait(10)
+    threading.Timer(0.1, liberer.set).start()
+    debut = time.monotonic()
+    with budget.reserver(50, attente=10):
+        assert budget.stats()["reserve_octets"] == 50
+        assert time.monotonic() - debut >= 0.05
+    thread.join()
+    assert budget.stats() == {"reserve_octets": 0, "budget_octets": 100, "en_cours": 0,
+                              "en_attente": 0, "refus": 0}
+
+def test_budget_refuse_apres_attente():
+    budget = BudgetMemoire(100)
+    with budget.reserver(80):
+        with pytest.raises(BudgetMemoireDepasse, match="occupé"):
+            with budget.reserver(50, attente=0.05):
+                pass
+    assert budget.stats()["refus"] == 1
+    with budget.reserver(100, attente=0):
+        pass  # Place rendue malgré le refus
+
+# ----------------------------------------------------------------------------
+# ESTIMATION
+# ----------------------------------------------------------------------------
+
+def paquet(membres):
+    flux = io.BytesIO()
+    with zipfile.ZipFile(flux, "w", zipfile.ZIP_STORED) as archive:
+        for nom, taille in membres.items():
+            archive.writestr(nom, bytes(taille))
+    flux.seek(0)
+    return flux
+
+def test_estimer_memoire():
+    flux = paquet({"ppt/slides/slide1.xml": 1000, "ppt/slides/_rels/slide1.xml.rels": 200,
+                   "ppt/slideMasters/slideMaster1.xml": 300, "ppt/media/image1.png": 5000})
+    zip_ = estimer_memoire(flux, "zip")
+    assert zip_ == FACTEUR_MEMOIRE_XML * 1500 + ressources.SEUIL_SPOOL_OCTETS
+    assert flux.tell() == 0
+    # Moteur python : toutes les parties chargées, compressées et non compressées
+    assert estimer_memoire(flux, "python") == zip_ + 2 * (1500 + 5000)
+    # Processus des slides : interpréteur et masters / layouts chacun
+    assert (estimer_memoire(flux, "zip", processus=3)
+            == zip_ + 3 * (MEMOIRE_PROCESSUS_OCTETS + FACTEUR_MEMOIRE_XML * 300))
+    assert estimer_memoire(io.BytesIO(b"pas un zip")) == ressources.SEUIL_SPOOL_OCTETS
+
+# ----------------------------------------------------------------------------
+# RÉSULTATS CONSERVÉS
+# ----------------------------------------------------------------------------
+
+def test_conserver_resultat_en_memoire_puis_sur_disque(telechargements, monkeypatch):
+    monkeypatch.setattr(ressources, "SEUIL_SPOOL_OCTETS", 10)
+    assert conserver_resultat("petit", io.BytesIO(b"0123456789")) == b"0123456789"
+    assert not os.path.exists(telechargements)
+
+    chemin = conserver_resultat("grand", io.BytesIO(b"0123456789A"))
+    assert chemin == os.path.join(telechargements, "grand")
+    assert ispa.lire_fichier(chemin) == b"0123456789A"
+
+    chemin = conserver_resultat("force", io.BytesIO(b"0"), seuil=0)
+    assert ispa.lire_fichier(chemin) == b"0"
+
+def test_lire_fichier_plafonne(telechargements):
+    chemin = conserver_resultat("grand", io.BytesIO(b"x" * 100), seuil=0)
+    assert ispa.telechargeable(chemin)
+    with pytest.raises(ValueError):
+        ispa.lire_fichier(chemin, max_octets=99)
+    assert not ispa.telechargeable(chemin + ".absent")
+
+def test_travail_ne_garde_qu_un_chemin(documents, telechargements):
+    cache = ispa.CacheResultats()
+    with open(documents["docx"], "rb") as f:
+        document = io.BytesIO(f.read())
+    executer = ispa.travail_de_traitement(document, documents["logo"], None, False, False,
+                                          "cle", cache, BudgetMemoire())
+    resultat = executer(ispa.ProgressionMuette())
+    assert resultat == os.path.join(telechargements, "cle")
+    assert cache.get("cle") == ispa.lire_fichier(resultat)
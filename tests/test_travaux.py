@@ -0,0 +1,91 @@
+"""File de traitements : places par utilisateur, tour de rôle, refus et conservation."""
+
+import threading
+import time
+
+import pytest
+
+from ispa import travaux
+from ispa.travaux import FileTraitements, TravailRefuse
+
+class Travaux:
+    """Travaux bloqués jusqu'à liberer() ; l'ordre de démarrage est noté."""
+
+    def __init__(self):
+        self.demarres = []
+        self._verrou = threading.Lock()
+        self._fin = threading.Event()
+
+    def travail(self, nom):
+        def executer(progression):
+            with self._verrou:
+                self.demarres.append(nom)
+            assert self._fin.wait(10)
+            return nom.encode()
+        return executer
+
+    def liberer(self):
+        self._fin.set()
+
+def attendre(condition, delai=10):
+    limite = time.monotonic() + delai
+    while not condition():
+        assert time.monotonic() < limite, "délai dépassé"
+        time.sleep(0.01)
+
+@pytest.fixture
+def bloques():
+    bloques = Travaux()
+    yield bloques
+    bloques.liberer()
+
+def test_tour_de_role_entre_utilisateurs(bloques):
+    file = FileTraitements(simultanes=1, par_utilisateur=1)
+    soumis = [file.soumettre("a", "a1", bloques.travail("a1"))]
+    attendre(lambda: bloques.demarres == ["a1"])
+    soumis += [file.soumettre(u, nom, bloques.travail(nom))
+               for u, nom in (("a", "a2"), ("a", "a3"), ("b", "b1"), ("c", "c1"))]
+    assert [file.position(t) for t in soumis[1:]] == [0, 1, 0, 0]
+    bloques.liberer()
+    attendre(lambda: all(t.termine for t in soumis))
+    # b et c, jamais servis, passent avant le deuxième travail de a
+    assert bloques.demarres == ["a1", "b1", "c1", "a2", "a3"]
+    assert all(t.statut == "termine" for t in soumis)
+    assert soumis[3].resultat == b"b1"
+
+def test_places_par_utilisateur(bloques):
+    file = FileTraitements(simultanes=3, par_utilisateur=1)
+    a1 = file.soumettre("a", "a1", bloques.travail("a1"))
+    a2 = file.soumettre("a", "a2", bloques.travail("a2"))
+    b1 = file.soumettre("b", "b1", bloques.travail("b1"))
+    attendre(lambda: len(bloques.demarres) == 2)
+    assert (a1.statut, a2.statut, b1.statut) == ("en_cours", "en_attente", "en_cours")
+    assert file.stats()["en_cours"] == 2
+
+def test_attente_limitee_par_utilisateur(bloques):
+    file = FileTraitements(simultanes=1, par_utilisateur=1, attente_max=2)
+    file.soumettre("a", "a1", bloques.travail("a1"))
+    attendre(lambda: bloques.demarres == ["a1"])
+    file.soumettre("a", "a2", bloques.travail("a2"))
+    file.soumettre("a", "a3", bloques.travail("a3"))
+    with pytest.raises(TravailRefuse):
+        file.soumettre("a", "a4", bloques.travail("a4"))
+    file.soumettre("b", "b1", bloques.travail("b1"))  # La file des autres reste ouverte
+    assert file.stats()["refus"] == 1
+
+def test_echec_puis_purge_apres_conservation(monkeypatch):
+    file = FileTraitements(simultanes=1, duree_conservation=60)
+
+    def echouer(progression):
+        raise ValueError("document illisible")
+
+    reussi = file.soumettre("a", "ok", lambda progression: b"ok")
+    echoue = file.soumettre("a", "ko", echouer)
+    attendre(lambda: reussi.termine and echoue.termine)
+    assert (echoue.statut, echoue.erreur) == ("echec", "document illisible")
+    assert file.obtenir(reussi.id) is reussi
+
+    maintenant = time.time()
+    monkeypatch.setattr(travaux.time, "time", lambda: maintenant + 61)
+    assert file.obtenir(reussi.id) is None
+    assert file.obtenir(echoue.id) is None